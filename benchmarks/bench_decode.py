@@ -0,0 +1,169 @@
+"""Compare validated, fast and lazy decoding of AIOBS sessions payloads.
+
+Builds synthetic ``/v1/sessions`` payloads, serializes them to JSON and
+times parsing plus decoding the way each client path does it, with the
+garbage collector in its normal state as in the server::
+
+    python benchmarks/bench_decode.py              # 10k, 100k and 1M events
+    python benchmarks/bench_decode.py 10000 50000  # custom sizes
+    python benchmarks/bench_decode.py --prompt-bytes 8192 10000
+
+``--prompt-bytes`` pads each system prompt to that many bytes, the shape
+where lazy payloads pay off; with the default short prompts every field is
+below the lazy threshold and is parsed normally.
+
+Each size runs in a fresh interpreter so one run's heap does not affect the
+next. The 1M event payload needs several GB of memory.
+"""
+
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+import time
+
+from shepherd_mcp.cache import estimate_size
+from shepherd_mcp.models.aiobs import SessionsResponse
+from shepherd_mcp.models.decode import FastDecoder
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+EVENTS_PER_SESSION = 20
+FUNCTION_EVENTS_PER_SESSION = 5
+
+
+def make_payload(event_count: int, prompt_bytes: int = 0) -> bytes:
+    """Return a JSON sessions payload with ``event_count`` LLM events."""
+    system = "You are a helpful agent."
+    system += " Follow the runbook." * max(0, (prompt_bytes - len(system)) // 20)
+    session_count = max(1, event_count // EVENTS_PER_SESSION)
+    sessions = []
+    events = []
+    function_events = []
+    for s in range(session_count):
+        session_id = f"session-{s}"
+        started = 1_700_000_000.0 + s * 60
+        sessions.append(
+            {
+                "id": session_id,
+                "name": f"agent run {s}",
+                "started_at": started,
+                "ended_at": started + 45,
+                "meta": {"git_sha": "abc123", "host": f"worker-{s % 8}"},
+                "labels": {"env": "prod" if s % 3 else "dev", "team": f"team-{s % 5}"},
+            }
+        )
+        for i in range(FUNCTION_EVENTS_PER_SESSION):
+            function_events.append(
+                {
+                    "provider": "function",
+                    "api": "call",
+                    "name": f"step_{i}",
+                    "module": "agent.steps",
+                    "args": [s, i],
+                    "kwargs": {"retry": False},
+                    "result": {"ok": True},
+                    "error": None,
+                    "started_at": started + i,
+                    "ended_at": started + i + 0.5,
+                    "duration_ms": 500.0,
+                    "callsite": {"file": "agent/steps.py", "line": 10 + i, "function": "run"},
+                    "span_id": f"{session_id}-fn-{i}",
+                    "parent_span_id": None,
+                    "enh_prompt": False,
+                    "enh_prompt_id": None,
+                    "auto_enhance_after": None,
+                    "session_id": session_id,
+                    "evaluations": [],
+                }
+            )
+    for e in range(event_count):
+        s = e // EVENTS_PER_SESSION
+        session_id = f"session-{min(s, session_count - 1)}"
+        started = 1_700_000_000.0 + s * 60 + e % EVENTS_PER_SESSION
+        events.append(
+            {
+                "provider": "openai",
+                "api": "chat.completions.create",
+                "request": {
+                    "model": "gpt-4o-mini",
+                    "messages": [
+                        {"role": "system", "content": system},
+                        {"role": "user", "content": f"Step {e}: what next?"},
+                    ],
+                    "temperature": 0.2,
+                },
+                "response": {
+                    "model": "gpt-4o-mini",
+                    "text": "Call the search tool.",
+                    "usage": {"prompt_tokens": 42, "completion_tokens": 7, "total_tokens": 49},
+                },
+                "error": None,
+                "started_at": started,
+                "ended_at": started + 0.8,
+                "duration_ms": 800.0,
+                "callsite": {"file": "agent/llm.py", "line": 88, "function": "complete"},
+                "span_id": f"{session_id}-llm-{e}",
+                "parent_span_id": f"{session_id}-fn-0",
+                "session_id": session_id,
+                "evaluations": [],
+            }
+        )
+    payload = {
+        "sessions": sessions,
+        "events": events,
+        "function_events": function_events,
+        "trace_tree": [],
+        "enh_prompt_traces": [],
+        "generated_at": 1_700_000_000.0 + session_count * 60,
+        "version": 1,
+    }
+    return json.dumps(payload).encode()
+
+
+def run(event_count: int, prompt_bytes: int = 0) -> None:
+    """Time each decode path on one payload size and print a result line."""
+    raw = make_payload(event_count, prompt_bytes)
+
+    start = time.perf_counter()
+    validated = SessionsResponse(**json.loads(raw))
+    validated_seconds = time.perf_counter() - start
+    del validated
+
+    decoder = FastDecoder()
+    start = time.perf_counter()
+    fast = decoder.decode(decoder.loads(raw))
+    fast_seconds = time.perf_counter() - start
+    fast_size = estimate_size(fast)
+    del fast
+
+    decoder = FastDecoder(lazy_payloads=True)
+    start = time.perf_counter()
+    lazy = decoder.decode(decoder.loads(raw))
+    lazy_seconds = time.perf_counter() - start
+    lazy_size = estimate_size(lazy)
+
+    print(
+        f"{event_count:>10,} events  {len(raw) / 2**20:>8.1f} MiB  "
+        f"validated {validated_seconds:>7.2f}s  fast {fast_seconds:>7.2f}s "
+        f"({validated_seconds / fast_seconds:.1f}x)  "
+        f"lazy {lazy_seconds:>7.2f}s, {lazy_size / fast_size:.0%} of the memory",
+        flush=True,
+    )
+
+
+def main(argv: list[str]) -> None:
+    prompt_bytes = 0
+    if len(argv) >= 2 and argv[0] == "--prompt-bytes":
+        prompt_bytes = int(argv[1])
+        argv = argv[2:]
+    if len(argv) == 2 and argv[0] == "--single":
+        run(int(argv[1]), prompt_bytes)
+        return
+    for size in [int(arg) for arg in argv] or DEFAULT_SIZES:
+        command = [sys.executable, __file__, "--prompt-bytes", str(prompt_bytes), "--single"]
+        subprocess.run([*command, str(size)], check=True)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
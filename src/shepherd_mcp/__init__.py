@@ -8,12 +8,19 @@ Supports multiple observability providers:
 __version__ = "0.1.0"
 
 # Re-export providers for programmatic use
-from shepherd_mcp.providers import AIOBSClient, LangfuseClient
+from shepherd_mcp.providers import (
+    AIOBSClient,
+    AsyncAIOBSClient,
+    AsyncLangfuseClient,
+    LangfuseClient,
+)
 from shepherd_mcp.providers.base import (
     AuthenticationError,
     NotFoundError,
     ProviderError,
     RateLimitError,
+    RetryPolicy,
+    retry_stats,
 )
 from shepherd_mcp.server import main
 
@@ -23,9 +30,14 @@ __all__ = [
     # Providers
     "AIOBSClient",
     "LangfuseClient",
+    "AsyncAIOBSClient",
+    "AsyncLangfuseClient",
     # Exceptions
     "AuthenticationError",
     "NotFoundError",
     "ProviderError",
     "RateLimitError",
+    # Retries
+    "RetryPolicy",
+    "retry_stats",
 ]
@@ -0,0 +1,374 @@
+"""In-memory response cache between the MCP tool handlers and provider clients.
+
+Entries expire after a per-endpoint TTL and are evicted least-recently-used
+first once the cache exceeds its memory budget. The budget is measured in
+(approximate) bytes rather than entries because a single AIOBS sessions
+payload can be tens of megabytes while a Langfuse score is a few hundred
+bytes.
+
+Endpoints with a staleness bound (see :data:`DEFAULT_MAX_STALE`) are served
+stale-while-revalidate: once an entry's TTL has passed, it is still returned
+immediately for up to that many seconds while a background task refreshes
+it. Concurrent misses for one request, and a miss during a background
+refresh, share a single load.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import math
+import os
+import sys
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+# Seconds each endpoint's responses stay fresh. Keys are "<provider>.<method>".
+DEFAULT_TTLS: dict[str, float] = {
+    "aiobs.list_sessions": 30.0,
+    "aiobs.list_session_records": 30.0,
+    "aiobs.get_session": 300.0,
+    "aiobs.get_session_records": 300.0,
+    "aiobs.scan_sessions": 30.0,
+    "aiobs.scan_session_records": 30.0,
+    "langfuse.list_traces": 30.0,
+    "langfuse.list_sessions": 30.0,
+    "langfuse.list_observations": 30.0,
+    "langfuse.list_scores": 30.0,
+    "langfuse.get_trace": 120.0,
+    "langfuse.get_session": 60.0,
+    "langfuse.get_observation": 300.0,
+    "langfuse.get_score": 600.0,
+}
+
+# Seconds past the TTL during which a stale entry is served while it is
+# refreshed in the background. Endpoints not listed are never served stale.
+DEFAULT_MAX_STALE: dict[str, float] = {
+    "aiobs.list_sessions": 300.0,
+    "aiobs.list_session_records": 300.0,
+}
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Containers longer than this are sized from an evenly spaced sample.
+_SAMPLE_SIZE = 32
+
+
+@functools.cache
+def _public_slots(cls: type) -> tuple[str, ...]:
+    """Return the public ``__slots__`` of ``cls`` and its bases.
+
+    Private slots hold caches or raw data already counted by the object's
+    ``__sizeof__``.
+    """
+    names: list[str] = []
+    for base in cls.__mro__:
+        slots = base.__dict__.get("__slots__", ())
+        names.extend((slots,) if isinstance(slots, str) else slots)
+    return tuple(name for name in names if not name.startswith("_"))
+
+
+def estimate_size(obj: Any) -> int:
+    """Approximate the memory held by ``obj`` in bytes.
+
+    Walks dicts, lists, tuples, sets, pydantic models and the public
+    attributes of slotted objects. Large containers
+    are extrapolated from a sample of their items, so the cost stays small
+    even for multi-megabyte payloads. Shared objects are counted once.
+    """
+    seen: set[int] = set()
+    total = 0
+    # Stack of (object, weight): weight scales sampled children.
+    stack: list[tuple[Any, float]] = [(obj, 1.0)]
+    while stack:
+        item, weight = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += int(sys.getsizeof(item) * weight)
+
+        if isinstance(item, BaseModel):
+            children: list[Any] = list(item.__dict__.values())
+        elif isinstance(item, dict):
+            children = [*item.keys(), *item.values()]
+        elif isinstance(item, list | tuple | set | frozenset):
+            children = list(item)
+        elif slots := _public_slots(type(item)):
+            children = [getattr(item, name, None) for name in slots]
+        else:
+            continue
+
+        scale = 1.0
+        if len(children) > _SAMPLE_SIZE:
+            scale = len(children) / _SAMPLE_SIZE
+            children = [children[int(i * scale)] for i in range(_SAMPLE_SIZE)]
+        stack.extend((child, weight * scale) for child in children)
+    return total
+
+
+@dataclass
+class CacheEntry:
+    """A cached value with its size and freshness."""
+
+    value: Any
+    size: int
+    stored_at: float
+    expires_at: float
+    stale_until: float
+
+
+class ResponseCache:
+    """TTL + LRU cache bounded by an approximate byte budget.
+
+    Keys are ``(endpoint, key)`` pairs where ``endpoint`` selects the TTL
+    (see :data:`DEFAULT_TTLS`) and ``key`` identifies the request within it.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttls: dict[str, float] | None = None,
+        default_ttl: float = 60.0,
+        max_stale: dict[str, float] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_bytes: Memory budget. ``0`` disables caching.
+            ttls: Per-endpoint TTLs in seconds, merged over :data:`DEFAULT_TTLS`.
+            default_ttl: TTL for endpoints without an explicit entry.
+            max_stale: Per-endpoint staleness bounds in seconds, merged over
+                      :data:`DEFAULT_MAX_STALE`.
+            clock: Monotonic clock, injectable for tests.
+        """
+        self.max_bytes = max_bytes
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self.max_stale = {**DEFAULT_MAX_STALE, **(max_stale or {})}
+        self._clock = clock
+        self._entries: OrderedDict[tuple[str, Hashable], CacheEntry] = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_hits = 0
+        self.refreshes = 0
+        # Loads in flight, shared by concurrent misses and background refreshes.
+        self._loading: dict[tuple[str, Hashable], asyncio.Task[Any]] = {}
+
+    @classmethod
+    def from_env(cls) -> ResponseCache:
+        """Build a cache sized by SHEPHERD_CACHE_MAX_MB (``0`` disables it)."""
+        max_mb = float(os.environ.get("SHEPHERD_CACHE_MAX_MB", DEFAULT_MAX_BYTES / 1024 / 1024))
+        return cls(max_bytes=int(max_mb * 1024 * 1024))
+
+    def ttl_for(self, endpoint: str) -> float:
+        """Return the TTL in seconds for ``endpoint``."""
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    def age(self, entry: CacheEntry) -> float:
+        """Return how many seconds ago ``entry`` was stored."""
+        return self._clock() - entry.stored_at
+
+    def is_stale(self, entry: CacheEntry) -> bool:
+        """Return True if ``entry`` is past its TTL (but still servable)."""
+        return entry.expires_at <= self._clock()
+
+    def _drop(self, cache_key: tuple[str, Hashable]) -> None:
+        entry = self._entries.pop(cache_key)
+        self.total_bytes -= entry.size
+
+    def get_entry(
+        self, endpoint: str, key: Hashable, allow_stale: bool = False
+    ) -> CacheEntry | None:
+        """Return the cached entry for a request, or None.
+
+        Counts a hit or a miss and marks a hit as most recently used.
+
+        Args:
+            endpoint: Endpoint name.
+            key: Request identity within the endpoint.
+            allow_stale: Also return entries past their TTL but within the
+                        endpoint's staleness bound.
+        """
+        cache_key = (endpoint, key)
+        entry = self._entries.get(cache_key)
+        now = self._clock()
+        if entry is not None and entry.stale_until <= now:
+            self._drop(cache_key)
+            self.expirations += 1
+            entry = None
+        if entry is not None and not allow_stale and entry.expires_at <= now:
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(cache_key)
+        self.hits += 1
+        return entry
+
+    def get(self, endpoint: str, key: Hashable) -> Any | None:
+        """Return the cached value for a request, or None if absent or expired."""
+        entry = self.get_entry(endpoint, key)
+        return entry.value if entry is not None else None
+
+    def put(self, endpoint: str, key: Hashable, value: Any, size: int | None = None) -> None:
+        """Store a value, evicting least recently used entries to fit the budget.
+
+        Args:
+            endpoint: Endpoint name, used to pick the TTL.
+            key: Request identity within the endpoint.
+            value: Value to cache. Callers must treat cached values as read-only.
+            size: Size in bytes; estimated with :func:`estimate_size` if omitted.
+        """
+        if self.max_bytes <= 0:
+            return
+        size = estimate_size(value) if size is None else size
+        cache_key = (endpoint, key)
+        if cache_key in self._entries:
+            self._drop(cache_key)
+        if size > self.max_bytes:
+            return
+
+        now = self._clock()
+        expires_at = now + self.ttl_for(endpoint)
+        stale_until = expires_at + self.max_stale.get(endpoint, 0.0)
+        self._entries[cache_key] = CacheEntry(value, size, now, expires_at, stale_until)
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    async def get_or_load(
+        self,
+        endpoint: str,
+        key: Hashable,
+        loader: Callable[[], Awaitable[T]],
+    ) -> T:
+        """Return the cached value for a request, loading and storing it on a miss."""
+        entry = await self.get_or_load_entry(endpoint, key, loader)
+        return entry.value
+
+    async def get_or_load_entry(
+        self,
+        endpoint: str,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        refresh: bool = False,
+    ) -> CacheEntry:
+        """Return the cache entry for a request, loading it on a miss.
+
+        A stale entry within the endpoint's staleness bound is returned as is
+        and refreshed in the background. A value that could not be stored
+        (caching disabled, or larger than the budget) is returned in a fresh
+        entry of its own.
+
+        Args:
+            endpoint: Endpoint name.
+            key: Request identity within the endpoint.
+            loader: Coroutine function fetching the value.
+            refresh: Skip the cache and load (and store) a fresh value.
+        """
+        if not refresh:
+            entry = self.get_entry(endpoint, key, allow_stale=True)
+            if entry is not None:
+                if self.is_stale(entry):
+                    self.stale_hits += 1
+                    self._load(endpoint, key, loader, background=True)
+                return entry
+        # Shielded, so a cancelled caller does not cancel the load for others.
+        value = await asyncio.shield(self._load(endpoint, key, loader))
+        entry = self._entries.get((endpoint, key))
+        if entry is not None and entry.value is value:
+            return entry
+        return CacheEntry(value, 0, self._clock(), math.inf, math.inf)
+
+    def _load(
+        self,
+        endpoint: str,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        background: bool = False,
+    ) -> asyncio.Task[Any]:
+        """Return the task loading and storing a request, starting one if none is running."""
+        cache_key = (endpoint, key)
+        task = self._loading.get(cache_key)
+        if task is not None:
+            return task
+
+        async def load() -> Any:
+            try:
+                value = await loader()
+                self.put(endpoint, key, value)
+                if background:
+                    self.refreshes += 1
+                return value
+            finally:
+                del self._loading[cache_key]
+
+        def done(task: asyncio.Task[Any]) -> None:
+            # Retrieve the error even if every caller has gone away.
+            error = None if task.cancelled() else task.exception()
+            if error is not None and background:
+                logger.warning("Background refresh of %s failed", endpoint, exc_info=error)
+
+        task = self._loading[cache_key] = asyncio.create_task(load())
+        task.add_done_callback(done)
+        return task
+
+    def invalidate(self, endpoint: str | None = None, key: Hashable | None = None) -> int:
+        """Drop cached entries.
+
+        Args:
+            endpoint: Only drop entries for this endpoint. All endpoints if None.
+            key: Only drop the entry for this request. Requires ``endpoint``.
+
+        Returns:
+            Number of entries dropped.
+        """
+        if endpoint is not None and key is not None:
+            targets = [(endpoint, key)] if (endpoint, key) in self._entries else []
+        elif endpoint is not None:
+            targets = [k for k in self._entries if k[0] == endpoint]
+        else:
+            targets = list(self._entries)
+        for cache_key in targets:
+            self._drop(cache_key)
+        return len(targets)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def aclose(self) -> None:
+        """Cancel loads and background refreshes that are still running."""
+        tasks = list(self._loading.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return cache counters as a JSON-serializable dictionary."""
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "stale_hits": self.stale_hits,
+            "refreshes": self.refreshes,
+        }
@@ -5,9 +5,26 @@ These models represent the data structures for the Shepherd/AIOBS backend.
 
 from __future__ import annotations
 
-from typing import Any
+from typing import Annotated, Any, TypeVar
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr, SerializerFunctionWrapHandler, WrapSerializer
+
+from shepherd_mcp.models.columns import EventColumns
+from shepherd_mcp.models.index import SessionIndex
+from shepherd_mcp.models.lazy import materialize
+from shepherd_mcp.models.trace import FlatTrace
+
+_T = TypeVar("_T")
+
+
+def _serialize_payload(value: Any, handler: SerializerFunctionWrapHandler) -> Any:
+    # Fast-decoded payload fields may be lazy wrappers; dump the plain value.
+    return handler(materialize(value))
+
+
+# A request, response, argument or result field, which the fast decoder may
+# keep as a LazyDict or LazyList.
+_Payload = Annotated[_T, WrapSerializer(_serialize_payload)]
 
 
 class Callsite(BaseModel):
@@ -41,8 +58,8 @@ class Event(BaseModel):
 
     provider: str
     api: str
-    request: dict[str, Any] = Field(default_factory=dict)
-    response: dict[str, Any] | None = None
+    request: _Payload[dict[str, Any]] = Field(default_factory=dict)
+    response: _Payload[dict[str, Any] | None] = None
     error: str | None = None
     started_at: float
     ended_at: float
@@ -61,9 +78,9 @@ class FunctionEvent(BaseModel):
     api: str
     name: str
     module: str | None = None
-    args: list[Any] | None = None
-    kwargs: dict[str, Any] | None = None
-    result: Any = None
+    args: _Payload[list[Any] | None] = None
+    kwargs: _Payload[dict[str, Any] | None] = None
+    result: _Payload[Any] = None
     error: str | None = None
     started_at: float
     ended_at: float
@@ -84,14 +101,14 @@ class TraceNode(BaseModel):
     provider: str
     api: str
     # Provider event fields
-    request: dict[str, Any] | None = None
-    response: dict[str, Any] | None = None
+    request: _Payload[dict[str, Any] | None] = None
+    response: _Payload[dict[str, Any] | None] = None
     # Function event fields
     name: str | None = None
     module: str | None = None
-    args: list[Any] | None = None
-    kwargs: dict[str, Any] | None = None
-    result: Any = None
+    args: _Payload[list[Any] | None] = None
+    kwargs: _Payload[dict[str, Any] | None] = None
+    result: _Payload[Any] = None
     error: str | None = None
     # Common fields
     started_at: float
@@ -117,7 +134,12 @@ class Session(BaseModel):
 
 
 class SessionsResponse(BaseModel):
-    """Response from /v1/sessions or /v1/sessions/{id}/tree."""
+    """Response from /v1/sessions or /v1/sessions/{id}/tree.
+
+    ``next_cursor`` and ``total`` are set on paged session lists: the cursor
+    of the next page (None on the last one) and the number of sessions in
+    the requested time range.
+    """
 
     sessions: list[Session] = Field(default_factory=list)
     events: list[Event] = Field(default_factory=list)
@@ -126,3 +148,30 @@ class SessionsResponse(BaseModel):
     enh_prompt_traces: list[Any] = Field(default_factory=list)
     generated_at: float = 0
     version: int = 1
+    next_cursor: str | None = None
+    total: int | None = None
+
+    _index: SessionIndex | None = PrivateAttr(default=None)
+    _columns: EventColumns | None = PrivateAttr(default=None)
+    _flat_trace: FlatTrace | None = PrivateAttr(default=None)
+
+    @property
+    def index(self) -> SessionIndex:
+        """Events grouped by session, built on first access and then reused."""
+        if self._index is None:
+            self._index = SessionIndex(self)
+        return self._index
+
+    @property
+    def columns(self) -> EventColumns:
+        """Columnar copy of the events' scalar fields, built on first access."""
+        if self._columns is None:
+            self._columns = EventColumns(self.events)
+        return self._columns
+
+    @property
+    def flat_trace(self) -> FlatTrace:
+        """The trace tree laid out in pre-order index arrays, built on first access."""
+        if self._flat_trace is None:
+            self._flat_trace = FlatTrace(self.trace_tree)
+        return self._flat_trace
@@ -0,0 +1,216 @@
+"""Decode-time size caps for large payload fields.
+
+Some sessions carry multi-megabyte message histories or base64 images in
+event requests, and Langfuse traces can hold as much in ``input`` and
+``output``. Once decoded, those values live as long as the cached response
+does. :class:`FieldCaps` bounds them when a response is decoded:
+
+- a string longer than the cap keeps the prefix that fits and ends with a
+  marker such as ``[elided: bytes=5242880 hash=...]``;
+- an array whose JSON is longer than the cap keeps the leading items that
+  fit, followed by one marker item such as
+  ``[elided: items=950 of 1000 hash=...]``. Values inside it that were
+  capped already count as their marker only, so one large image does not
+  elide the whole message list holding it.
+
+Markers record the original length (UTF-8 bytes of a string, item count of
+an array) and the blake2b digest of the original value, the same digest
+:func:`~shepherd_mcp.models.dedup.content_hash` gives for strings, so
+elided values can still be compared. Capped values keep their type, so the
+models and tool helpers read them unchanged. Objects are never elided
+themselves; their fields are capped one by one. Lazily decoded fields
+(:mod:`shepherd_mcp.models.lazy`) are only parsed when their JSON is larger
+than the cap. Clients skip the caps when asked for full content.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from typing import Any
+
+from shepherd_mcp.models.lazy import LazyDict, LazyList
+
+# Bytes kept free below the cap for the marker.
+_MARKER_BYTES = 96
+
+_MARKER = re.compile(r"\[elided: (?:bytes=(\d+)|items=(\d+) of (\d+)) hash=([0-9a-f]{32})\]$")
+
+_encode = json.JSONEncoder(separators=(",", ":"), default=str).encode
+
+# AIOBS payload fields that carry request and call data.
+_EVENT_FIELDS = ("request", "response")
+_FUNCTION_FIELDS = ("args", "kwargs", "result")
+_NODE_FIELDS = (*_EVENT_FIELDS, *_FUNCTION_FIELDS)
+
+
+def _digest(data: str) -> str:
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+
+def _text_bytes(value: str) -> int:
+    return len(value) if value.isascii() else len(value.encode())
+
+
+def elision(value: Any) -> dict[str, Any] | None:
+    """Describe the marker ending a capped string, or an array's marker item.
+
+    Returns:
+        ``{"bytes": ..., "hash": ...}`` for a string,
+        ``{"items": ..., "of": ..., "hash": ...}`` for an array, or None if
+        the value was not capped.
+    """
+    if type(value) is list and value:
+        value = value[-1]
+    if type(value) is not str or not value.endswith("]"):
+        return None
+    match = _MARKER.search(value)
+    if match is None:
+        return None
+    size, items, total, digest = match.groups()
+    if size is not None:
+        return {"bytes": int(size), "hash": digest}
+    return {"items": int(items), "of": int(total), "hash": digest}
+
+
+class FieldCaps:
+    """Caps the size of individual strings and arrays in decoded payloads.
+
+    Capping never mutates its input: changed containers are copied, so
+    responses shared with callers that asked for full content stay intact.
+
+    Attributes:
+        max_bytes: Largest string or array JSON kept whole, in bytes.
+        elided: Values capped so far.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        if max_bytes <= _MARKER_BYTES:
+            raise ValueError(f"max_bytes must be larger than {_MARKER_BYTES}")
+        self.max_bytes = max_bytes
+        self.elided = 0
+
+    @classmethod
+    def from_env(cls) -> FieldCaps | None:
+        """Return caps if SHEPHERD_MAX_FIELD_KB is set to a positive size, else None."""
+        kilobytes = float(os.environ.get("SHEPHERD_MAX_FIELD_KB", "0"))
+        if kilobytes <= 0:
+            return None
+        return cls(int(kilobytes * 1024))
+
+    @property
+    def fingerprint(self) -> str:
+        """Identify the cap settings, for keys of stored capped records."""
+        return f"max_bytes={self.max_bytes}"
+
+    def cap(self, value: Any) -> Any:
+        """Return ``value`` with every oversized string and array capped."""
+        return self._cap(value)[0]
+
+    def _cap(self, value: Any) -> tuple[Any, int]:
+        """Cap ``value`` and return it with the approximate size of its JSON."""
+        kind = type(value)
+        if kind is str:
+            size = _text_bytes(value) + 2
+            if size > self.max_bytes:
+                return self._cap_text(value, size - 2), _MARKER_BYTES
+            return value, size
+        if kind is dict:
+            copy = None
+            size = 2
+            for key, item in value.items():
+                capped, item_size = self._cap(item)
+                if capped is not item:
+                    if copy is None:
+                        copy = dict(value)
+                    copy[key] = capped
+                size += len(key) + item_size + 4
+            return (value if copy is None else copy), size
+        if kind is list:
+            items = []
+            sizes = []
+            changed = False
+            for item in value:
+                capped, item_size = self._cap(item)
+                changed = changed or capped is not item
+                items.append(capped)
+                sizes.append(item_size + 1)
+            size = sum(sizes) + 1
+            if size > self.max_bytes:
+                return self._cap_array(value, items, sizes), _MARKER_BYTES
+            return (items if changed else value), size
+        if kind is LazyDict or kind is LazyList:
+            # Raw JSON stays unparsed unless it is too large to keep whole.
+            size = value.raw_size
+            if size > self.max_bytes:
+                return self._cap(value.decode())
+            return value, size
+        return value, len(str(value))
+
+    def _cap_text(self, value: str, size: int) -> str:
+        self.elided += 1
+        keep = value.encode()[: self.max_bytes - _MARKER_BYTES].decode(errors="ignore")
+        return f"{keep}[elided: bytes={size} hash={_digest(value)}]"
+
+    def _cap_array(self, original: list[Any], items: list[Any], sizes: list[int]) -> list[Any]:
+        self.elided += 1
+        budget = self.max_bytes - _MARKER_BYTES
+        kept = 0
+        for size in sizes:
+            budget -= size
+            if budget < 0:
+                break
+            kept += 1
+        digest = _digest(_encode(original))
+        return [*items[:kept], f"[elided: items={len(items) - kept} of {len(items)} hash={digest}]"]
+
+    def _cap_fields(self, item: Any, fields: tuple[str, ...]) -> None:
+        if type(item) is dict:
+            for key in fields:
+                if key in item:
+                    item[key] = self.cap(item[key])
+
+    def sessions_payload(self, payload: dict[str, Any]) -> None:
+        """Cap the request and call data of a raw AIOBS sessions payload in place.
+
+        Only the event and trace node dicts are updated; the values they
+        held are not mutated.
+        """
+        for event in payload.get("events") or ():
+            self._cap_fields(event, _EVENT_FIELDS)
+        for event in payload.get("function_events") or ():
+            self._cap_fields(event, _FUNCTION_FIELDS)
+        for node in payload.get("trace_tree") or ():
+            self.trace_node(node)
+
+    def event(self, key: str, event: dict[str, Any]) -> None:
+        """Cap one raw event of the ``events`` or ``function_events`` array in place."""
+        self._cap_fields(event, _EVENT_FIELDS if key == "events" else _FUNCTION_FIELDS)
+
+    def trace_node(self, node: dict[str, Any]) -> None:
+        """Cap one raw trace node and its descendants in place."""
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            self._cap_fields(node, _NODE_FIELDS)
+            if type(node) is dict:
+                stack.extend(node.get("children") or ())
+
+    def langfuse(self, data: dict[str, Any]) -> dict[str, Any]:
+        """Return a raw Langfuse trace, observation or list page with ``input``/``output`` capped.
+
+        Covers the ``observations`` of a trace and the items of a page's
+        ``data``. The response dict is copied rather than updated, because
+        concurrent identical requests share it.
+        """
+        data = dict(data)
+        for key in ("input", "output"):
+            if key in data:
+                data[key] = self.cap(data[key])
+        for key in ("observations", "data", "traces"):
+            items = data.get(key)
+            if type(items) is list:
+                data[key] = [self.langfuse(i) if type(i) is dict else i for i in items]
+        return data
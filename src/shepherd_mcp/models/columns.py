@@ -0,0 +1,153 @@
+"""Columnar view of AIOBS events for aggregation.
+
+Summaries such as total tokens, average latency and provider or model
+counts only read a handful of scalar fields per event, but computing them
+from :class:`~shepherd_mcp.models.aiobs.Event` objects means an attribute
+lookup and a nested ``usage`` dict walk per event on every call.
+:class:`EventColumns` extracts those fields once into typed arrays, with
+providers, models and sessions dictionary-encoded as small integer codes.
+
+Aggregations run on NumPy when it is installed (``pip install
+shepherd-mcp[columnar]``) and on the standard library :mod:`array` module
+otherwise; both give the same results.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections import Counter
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Any
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when NumPy is absent
+    np = None
+
+if TYPE_CHECKING:
+    from shepherd_mcp.models.aiobs import Event
+
+# Code stored for an event without a request, which has no model.
+NO_MODEL = -1
+
+
+def _usage_tokens(event: Event) -> tuple[int, int, int]:
+    """Return (input, output, total) tokens reported in an event's usage."""
+    if not event.response or "usage" not in event.response:
+        return 0, 0, 0
+    usage = event.response["usage"]
+    return (
+        int(usage.get("prompt_tokens", 0) or usage.get("input_tokens", 0) or 0),
+        int(usage.get("completion_tokens", 0) or usage.get("output_tokens", 0) or 0),
+        int(usage.get("total_tokens", 0) or 0),
+    )
+
+
+class _Dictionary:
+    """Assigns consecutive integer codes to values in first-seen order."""
+
+    def __init__(self) -> None:
+        self.values: list[Any] = []
+        self._codes: dict[Any, int] = {}
+
+    def encode(self, value: Any) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class EventColumns:
+    """Typed per-event columns extracted from a list of events.
+
+    Attributes:
+        started_at: Start timestamps (``array('d')``).
+        ended_at: End timestamps (``array('d')``).
+        duration_ms: Durations in milliseconds (``array('d')``).
+        input_tokens: Prompt/input tokens from ``response.usage`` (``array('q')``).
+        output_tokens: Completion/output tokens (``array('q')``).
+        total_tokens: ``total_tokens`` as reported (``array('q')``).
+        errors: 1 where the event has an error, else 0 (``array('b')``).
+        provider_codes: Index into :attr:`providers` (``array('i')``).
+        model_codes: Index into :attr:`models`, or ``NO_MODEL`` for events
+            without a request (``array('i')``).
+        session_codes: Index into :attr:`session_ids` (``array('i')``).
+        providers: Distinct providers in first-seen order.
+        models: Distinct request models in first-seen order; ``"unknown"``
+            stands for a request without a ``model`` key.
+        session_ids: Distinct session IDs in first-seen order.
+    """
+
+    def __init__(self, events: Sequence[Event]) -> None:
+        providers, models, sessions = _Dictionary(), _Dictionary(), _Dictionary()
+        tokens = [_usage_tokens(event) for event in events]
+
+        self.started_at = array("d", [event.started_at for event in events])
+        self.ended_at = array("d", [event.ended_at for event in events])
+        self.duration_ms = array("d", [event.duration_ms for event in events])
+        self.input_tokens = array("q", [t[0] for t in tokens])
+        self.output_tokens = array("q", [t[1] for t in tokens])
+        self.total_tokens = array("q", [t[2] for t in tokens])
+        self.errors = array("b", [1 if event.error else 0 for event in events])
+        self.provider_codes = array("i", [providers.encode(event.provider) for event in events])
+        self.model_codes = array(
+            "i",
+            [
+                models.encode(event.request.get("model", "unknown")) if event.request else NO_MODEL
+                for event in events
+            ],
+        )
+        self.session_codes = array("i", [sessions.encode(event.session_id) for event in events])
+
+        self.providers: list[str] = providers.values
+        self.models: list[Any] = models.values
+        self.session_ids: list[str] = sessions.values
+
+    def __len__(self) -> int:
+        return len(self.duration_ms)
+
+    def token_totals(self) -> dict[str, int]:
+        """Return summed input, output and total tokens."""
+        if np is not None:
+            return {
+                "input": int(np.frombuffer(self.input_tokens, dtype=np.int64).sum()),
+                "output": int(np.frombuffer(self.output_tokens, dtype=np.int64).sum()),
+                "total": int(np.frombuffer(self.total_tokens, dtype=np.int64).sum()),
+            }
+        return {
+            "input": sum(self.input_tokens),
+            "output": sum(self.output_tokens),
+            "total": sum(self.total_tokens),
+        }
+
+    def avg_latency(self) -> float:
+        """Return the mean ``duration_ms``, or 0.0 without events."""
+        if not len(self):
+            return 0.0
+        if np is not None:
+            return float(np.frombuffer(self.duration_ms, dtype=np.float64).mean())
+        return sum(self.duration_ms) / len(self)
+
+    def error_count(self) -> int:
+        """Return the number of events with an error."""
+        if np is not None:
+            return int(np.frombuffer(self.errors, dtype=np.int8).sum())
+        return sum(self.errors)
+
+    def _counts(self, codes: array, values: list[Any]) -> dict[Any, int]:
+        if np is not None:
+            encoded = np.frombuffer(codes, dtype=np.int32)
+            counts = np.bincount(encoded[encoded >= 0], minlength=len(values)).tolist()
+        else:
+            tally = Counter(codes)
+            counts = [tally[code] for code in range(len(values))]
+        return {value: count for value, count in zip(values, counts, strict=True) if count}
+
+    def provider_distribution(self) -> dict[str, int]:
+        """Return the number of events per provider, in first-seen order."""
+        return self._counts(self.provider_codes, self.providers)
+
+    def model_distribution(self) -> dict[Any, int]:
+        """Return the number of events with a request per model, in first-seen order."""
+        return self._counts(self.model_codes, self.models)
@@ -0,0 +1,282 @@
+"""Compact in-memory records for AIOBS events and trace trees.
+
+A pydantic model instance carries a per-instance ``__dict__`` and a
+``fields_set`` set on top of its values, which for the small, numerous
+events of a session costs more than the values themselves. A session's
+trace tree then repeats every event it contains, payloads included.
+
+:class:`SessionRecords` holds the same data as a
+:class:`~shepherd_mcp.models.aiobs.SessionsResponse` in ``__slots__``
+records instead:
+
+- :class:`EventRecord` and :class:`FunctionEventRecord` keep one slot per
+  model field, with the provider, API, session ID (and function name and
+  module) strings interned so every event shares one copy;
+- :class:`TraceNodeRecord` points at the event or function event it
+  describes instead of copying it, and only keeps its own data for nodes
+  that differ from any event.
+
+Records expose the same attributes as the models they replace, so the
+tool helpers read them unchanged. They are internal: clients return
+pydantic models and :meth:`SessionRecords.to_response` converts back.
+"""
+
+from __future__ import annotations
+
+import sys
+from typing import Any, ClassVar
+
+from pydantic import BaseModel
+
+from shepherd_mcp.models.aiobs import Event, FunctionEvent, Session, SessionsResponse, TraceNode
+from shepherd_mcp.models.columns import EventColumns
+from shepherd_mcp.models.index import SessionIndex
+from shepherd_mcp.models.trace import FlatTrace
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
+class _Record:
+    """Base for slotted copies of a pydantic model's fields."""
+
+    __slots__ = ()
+
+    model: ClassVar[type[BaseModel]]
+    # Fields whose string values are interned.
+    interned: ClassVar[frozenset[str]] = frozenset()
+
+    @classmethod
+    def from_model(cls, model: BaseModel) -> Any:
+        """Copy a model instance's field values into a record."""
+        record = cls.__new__(cls)
+        values = model.__dict__
+        interned = cls.interned
+        for name in cls.__slots__:
+            value = values[name]
+            setattr(record, name, _intern(value) if name in interned else value)
+        return record
+
+    def to_model(self) -> Any:
+        """Return the pydantic model holding this record's values."""
+        return self.model.model_construct(**{name: getattr(self, name) for name in self.__slots__})
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class EventRecord(_Record):
+    """Slotted counterpart of :class:`~shepherd_mcp.models.aiobs.Event`."""
+
+    __slots__ = tuple(Event.model_fields)
+    model = Event
+    interned = frozenset({"provider", "api", "session_id"})
+
+
+class FunctionEventRecord(_Record):
+    """Slotted counterpart of :class:`~shepherd_mcp.models.aiobs.FunctionEvent`."""
+
+    __slots__ = tuple(FunctionEvent.model_fields)
+    model = FunctionEvent
+    interned = frozenset({"provider", "api", "session_id", "name", "module"})
+
+
+# TraceNode fields describing the call itself, as opposed to its place in
+# the tree.
+_NODE_FIELDS = tuple(
+    name for name in TraceNode.model_fields if name not in ("children", "event_type")
+)
+
+
+class _NodeData(_Record):
+    """Own data of a trace node that matches no event."""
+
+    __slots__ = _NODE_FIELDS
+    model = TraceNode
+    interned = frozenset({"provider", "api", "session_id", "name", "module"})
+
+
+def _describes(node: TraceNode, record: _Record) -> bool:
+    """Whether ``record`` holds exactly the call data of ``node``."""
+    defaults = TraceNode.model_fields
+    for name in _NODE_FIELDS:
+        value = getattr(node, name)
+        if hasattr(record, name):
+            if getattr(record, name) != value:
+                return False
+        elif value != defaults[name].get_default(call_default_factory=True):
+            return False
+    return True
+
+
+class TraceNodeRecord:
+    """Trace node that refers to the event or function event it describes.
+
+    Reads of the call fields (``provider``, ``request``, ``name``, ...) go to
+    the referenced record; fields that record does not have read as None.
+    """
+
+    __slots__ = ("record", "event_type", "children")
+
+    def __init__(
+        self,
+        record: EventRecord | FunctionEventRecord | _NodeData,
+        event_type: str | None = None,
+        children: list[TraceNodeRecord] | None = None,
+    ) -> None:
+        self.record = record
+        self.event_type = event_type
+        self.children = children or []
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for names that are not slots.
+        if name in _NODE_FIELDS:
+            return getattr(self.record, name, None)
+        raise AttributeError(name)
+
+    def to_model(self) -> TraceNode:
+        """Return the pydantic node for this subtree."""
+        return FlatTrace([self]).rebuild(_node_model)[0]
+
+    def __repr__(self) -> str:
+        return f"TraceNodeRecord({self.record!r}, children={len(self.children)})"
+
+
+def _node_model(node: TraceNodeRecord, children: list[TraceNode]) -> TraceNode:
+    return TraceNode.model_construct(
+        **{name: getattr(node, name) for name in _NODE_FIELDS},
+        event_type=node.event_type,
+        children=children,
+    )
+
+
+class SessionRecords:
+    """A sessions payload held as compact records.
+
+    Offers the attributes of :class:`~shepherd_mcp.models.aiobs.SessionsResponse`
+    the tool helpers use, including :attr:`index`, :attr:`columns` and
+    :attr:`flat_trace`.
+    """
+
+    __slots__ = (
+        "sessions",
+        "events",
+        "function_events",
+        "trace_tree",
+        "enh_prompt_traces",
+        "generated_at",
+        "version",
+        "next_cursor",
+        "total",
+        "_index",
+        "_columns",
+        "_flat_trace",
+    )
+
+    def __init__(
+        self,
+        sessions: list[Session],
+        events: list[EventRecord],
+        function_events: list[FunctionEventRecord],
+        trace_tree: list[TraceNodeRecord],
+        enh_prompt_traces: list[Any],
+        generated_at: float = 0,
+        version: int = 1,
+        next_cursor: str | None = None,
+        total: int | None = None,
+    ) -> None:
+        self.sessions = sessions
+        self.events = events
+        self.function_events = function_events
+        self.trace_tree = trace_tree
+        self.enh_prompt_traces = enh_prompt_traces
+        self.generated_at = generated_at
+        self.version = version
+        self.next_cursor = next_cursor
+        self.total = total
+        self._index: SessionIndex | None = None
+        self._columns: EventColumns | None = None
+        self._flat_trace: FlatTrace | None = None
+
+    @classmethod
+    def from_response(cls, response: SessionsResponse) -> SessionRecords:
+        """Convert a decoded sessions payload into records."""
+        events = [EventRecord.from_model(e) for e in response.events]
+        function_events = [FunctionEventRecord.from_model(e) for e in response.function_events]
+        by_span: dict[tuple[str, str], _Record] = {}
+        for record in (*events, *function_events):
+            by_span.setdefault((record.session_id, record.span_id), record)
+
+        def convert(node: TraceNode, children: list[TraceNodeRecord]) -> TraceNodeRecord:
+            record = by_span.get((node.session_id, node.span_id))
+            if record is None or not _describes(node, record):
+                record = _NodeData.from_model(node)
+            return TraceNodeRecord(record, _intern(node.event_type), children)
+
+        return cls(
+            sessions=response.sessions,
+            events=events,
+            function_events=function_events,
+            trace_tree=response.flat_trace.rebuild(convert),
+            enh_prompt_traces=response.enh_prompt_traces,
+            generated_at=response.generated_at,
+            version=response.version,
+            next_cursor=response.next_cursor,
+            total=response.total,
+        )
+
+    def to_response(self) -> SessionsResponse:
+        """Return the payload as pydantic models, for the public API."""
+        return SessionsResponse.model_construct(
+            sessions=self.sessions,
+            events=[e.to_model() for e in self.events],
+            function_events=[e.to_model() for e in self.function_events],
+            trace_tree=self.flat_trace.rebuild(_node_model),
+            enh_prompt_traces=self.enh_prompt_traces,
+            generated_at=self.generated_at,
+            version=self.version,
+            next_cursor=self.next_cursor,
+            total=self.total,
+        )
+
+    @property
+    def index(self) -> SessionIndex:
+        """Events grouped by session, built on first access and then reused."""
+        if self._index is None:
+            self._index = SessionIndex(self)
+        return self._index
+
+    @property
+    def columns(self) -> EventColumns:
+        """Columnar copy of the events' scalar fields, built on first access."""
+        if self._columns is None:
+            self._columns = EventColumns(self.events)
+        return self._columns
+
+    @property
+    def flat_trace(self) -> FlatTrace:
+        """The trace tree laid out in pre-order index arrays, built on first access."""
+        if self._flat_trace is None:
+            self._flat_trace = FlatTrace(self.trace_tree)
+        return self._flat_trace
+
+    # The record store persists values through these two pydantic methods;
+    # records are stored as the JSON of the equivalent SessionsResponse.
+
+    @classmethod
+    def model_validate_json(cls, data: str | bytes) -> SessionRecords:
+        """Parse a stored sessions payload into records."""
+        return cls.from_response(SessionsResponse.model_validate_json(data))
+
+    def model_dump_json(self, **kwargs: Any) -> str:
+        """Serialize the records as a sessions payload."""
+        return self.to_response().model_dump_json(**kwargs)
@@ -0,0 +1,373 @@
+"""Fast decoding of AIOBS sessions payloads.
+
+``SessionsResponse(**payload)`` validates every field of every session,
+event, function event and trace node, which dominates the time spent on
+large accounts. :class:`FastDecoder` builds the same models with
+``model_construct`` instead, skipping per-field validation, and guards
+against schema drift in two ways:
+
+- every item must carry its model's required keys (a cheap set check), and
+- a random sample of items per list is validated in strict mode, so a value
+  that would only pass after coercion (say a timestamp sent as a string)
+  counts as drift.
+
+If either check fails the whole payload is decoded with full validation, so
+a drifted payload is never silently half-trusted. Fields the models do not
+know about are reported once per model in the log.
+
+pydantic's validator is compiled, so skipping it saves less than one might
+expect; most of the gain comes from pausing the cyclic garbage collector
+while the objects are built (see ``benchmarks/bench_decode.py``).
+
+With ``lazy_payloads``, :meth:`FastDecoder.loads` leaves request, response,
+argument and result values unparsed, as
+:class:`~shepherd_mcp.models.lazy.LazyDict` / ``LazyList`` over their bytes
+of the response body, so a cached payload holds raw JSON instead of nested
+dicts (see :mod:`shepherd_mcp.models.lazy`).
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import logging
+import os
+import random
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from pydantic import BaseModel, ValidationError
+
+from shepherd_mcp.models.aiobs import (
+    Callsite,
+    Event,
+    FunctionEvent,
+    Session,
+    SessionsResponse,
+    TraceNode,
+)
+from shepherd_mcp.models.caps import FieldCaps
+from shepherd_mcp.models.dedup import dedup_payload
+from shepherd_mcp.models.lazy import LazyDict, LazyList, loads_lazy, materialize
+
+logger = logging.getLogger(__name__)
+
+_setattr = object.__setattr__
+
+DEFAULT_SAMPLE_SIZE = 32
+
+# Top-level payload lists and the model of their items.
+_LISTS: tuple[tuple[str, type[BaseModel]], ...] = (
+    ("sessions", Session),
+    ("events", Event),
+    ("function_events", FunctionEvent),
+    ("trace_tree", TraceNode),
+)
+
+
+def _required(model: type[BaseModel]) -> frozenset[str]:
+    return frozenset(name for name, info in model.model_fields.items() if info.is_required())
+
+
+_REQUIRED = {model: _required(model) for _, model in _LISTS}
+_KNOWN = {model: frozenset(model.model_fields) for model in (*_REQUIRED, Callsite)}
+
+
+class _Constructor:
+    """Builds model instances from trusted dicts without validation.
+
+    This does what ``model_construct`` does, minus the parts that make it
+    slower than validation on large payloads: ``model_construct`` resolves
+    the default of every missing field per call (inspecting the signature of
+    each ``default_factory``) and copies values field by field in Python.
+    Here the defaults are prepared once per model and the instance's
+    ``__dict__`` is filled in a single update. Models with a
+    ``model_post_init`` hook go through ``model_construct`` unchanged.
+    """
+
+    def __init__(self, model: type[BaseModel]) -> None:
+        self.model = model
+        self.known = _KNOWN[model]
+        self.defaults: dict[str, Any] = {}
+        self.factories: dict[str, Any] = {}
+        for name, info in model.model_fields.items():
+            if info.default_factory is not None:
+                self.factories[name] = info.default_factory
+            elif not info.is_required():
+                self.defaults[name] = info.default
+        self._direct = not model.__pydantic_post_init__
+
+    def __call__(self, item: dict[str, Any]) -> Any:
+        if item.keys() == self.known:
+            # The common case for a backend that serializes every field: the
+            # decoded dict becomes the instance's __dict__ as it is.
+            fields_set = set(self.known)
+            values = item
+        else:
+            fields_set = self.known & item.keys()
+            values = {}
+            # Field order, as validation would produce; _check guarantees
+            # that every required field is present.
+            for name in self.model.model_fields:
+                if name in item:
+                    values[name] = item[name]
+                elif name in self.factories:
+                    values[name] = self.factories[name]()
+                else:
+                    values[name] = self.defaults[name]
+        if not self._direct:
+            return self.model.model_construct(_fields_set=fields_set, **values)
+        instance = self.model.__new__(self.model)
+        _setattr(instance, "__dict__", values)
+        _setattr(instance, "__pydantic_fields_set__", fields_set)
+        _setattr(instance, "__pydantic_extra__", None)
+        _setattr(instance, "__pydantic_private__", None)
+        return instance
+
+
+_construct_session = _Constructor(Session)
+_construct_event = _Constructor(Event)
+_construct_function_event = _Constructor(FunctionEvent)
+_construct_trace_node = _Constructor(TraceNode)
+_construct_callsite_model = _Constructor(Callsite)
+
+
+def _with_callsite(item: dict[str, Any]) -> dict[str, Any]:
+    callsite = item.get("callsite")
+    if isinstance(callsite, dict):
+        item["callsite"] = _construct_callsite_model(callsite)
+    return item
+
+
+def _construct_node(node: dict[str, Any]) -> TraceNode:
+    # Children are built before their parents by walking a pre-order list
+    # backwards, so deep trees need no recursion.
+    order = []
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        order.append(item)
+        stack.extend(item.get("children") or ())
+    built: dict[int, TraceNode] = {}
+    for item in reversed(order):
+        children = item.get("children")
+        if children:
+            item["children"] = [built.pop(id(child)) for child in children]
+        built[id(item)] = _construct_trace_node(item)
+    return built[id(node)]
+
+
+def _walk_nodes(nodes: list[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(node.get("children") or ())
+
+
+# Payload fields that fast decoding stores lazily, per top-level list.
+_EVENT_PAYLOADS = ("request", "response")
+_FUNCTION_PAYLOADS = ("args", "kwargs", "result")
+_NODE_PAYLOADS = (*_EVENT_PAYLOADS, *_FUNCTION_PAYLOADS)
+_LAZY_FIELDS = {
+    "events": _EVENT_PAYLOADS,
+    "function_events": _FUNCTION_PAYLOADS,
+    "trace_tree": _NODE_PAYLOADS,
+}
+
+
+def _lazy_items(payload: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    """Yield every event, function event and trace node dict of a payload."""
+    yield from payload.get("events") or ()
+    yield from payload.get("function_events") or ()
+    yield from _walk_nodes(payload.get("trace_tree") or [])
+
+
+def _without_lazy(item: dict[str, Any]) -> dict[str, Any]:
+    """Return ``item`` with lazy fields swapped for empty values of their type.
+
+    Sampled items are validated without decoding their lazy fields; the
+    wrappers only ever hold JSON objects and arrays.
+    """
+    if not any(isinstance(v, LazyDict | LazyList) for v in item.values()):
+        return item
+    return {
+        key: {} if isinstance(v, LazyDict) else [] if isinstance(v, LazyList) else v
+        for key, v in item.items()
+    }
+
+
+def _materialize_payload(payload: dict[str, Any]) -> None:
+    """Decode every lazy field of a payload in place, for full validation."""
+    for item in _lazy_items(payload):
+        if type(item) is dict:
+            for key in _NODE_PAYLOADS:
+                if key in item:
+                    item[key] = materialize(item[key])
+
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    """Pause the cyclic garbage collector while building many objects.
+
+    Decoding allocates millions of containers, each allocation counting
+    towards the next collection; the resulting full collections walk the
+    whole heap repeatedly and cost more than the decoding itself. Nothing
+    built here is garbage yet, so there is nothing to collect.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class SchemaDrift(Exception):
+    """A payload no longer matches the models closely enough to skip validation."""
+
+
+class FastDecoder:
+    """Builds ``SessionsResponse`` objects without per-field validation.
+
+    Only use this for payloads from a trusted AIOBS backend. Decoded models
+    are indistinguishable from validated ones as long as the backend sends
+    the documented types; the sampled validation exists to notice when it
+    stops doing so.
+    """
+
+    def __init__(
+        self,
+        sample_size: int = DEFAULT_SAMPLE_SIZE,
+        rng: random.Random | None = None,
+        lazy_payloads: bool = False,
+    ) -> None:
+        """Initialize the decoder.
+
+        Args:
+            sample_size: Items per payload list that are fully validated.
+            rng: Random source for sampling, injectable for tests.
+            lazy_payloads: Leave request, response, argument and result
+                          values unparsed in :meth:`loads` (see
+                          :mod:`shepherd_mcp.models.lazy`).
+        """
+        self.sample_size = sample_size
+        self.lazy_payloads = lazy_payloads
+        self._rng = rng or random.Random()
+        self._reported_unknown: set[type[BaseModel]] = set()
+        self.fast_decodes = 0
+        self.fallbacks = 0
+
+    @classmethod
+    def from_env(cls) -> FastDecoder | None:
+        """Return a decoder if SHEPHERD_AIOBS_FAST_DECODE is enabled, else None.
+
+        SHEPHERD_AIOBS_DECODE_SAMPLE sets the sample size and
+        SHEPHERD_AIOBS_LAZY_PAYLOADS=1 enables lazy payload fields.
+        """
+        if os.environ.get("SHEPHERD_AIOBS_FAST_DECODE", "0") != "1":
+            return None
+        return cls(
+            sample_size=int(os.environ.get("SHEPHERD_AIOBS_DECODE_SAMPLE", DEFAULT_SAMPLE_SIZE)),
+            lazy_payloads=os.environ.get("SHEPHERD_AIOBS_LAZY_PAYLOADS", "0") == "1",
+        )
+
+    def _check(self, payload: dict[str, Any]) -> None:
+        """Raise :class:`SchemaDrift` if the payload cannot be trusted as-is."""
+        for key, model in _LISTS:
+            items = payload.get(key) or []
+            if not isinstance(items, list):
+                raise SchemaDrift(f"{key} is not a list")
+            walked = list(_walk_nodes(items)) if model is TraceNode else items
+            required = _REQUIRED[model]
+            for item in walked:
+                if not isinstance(item, dict) or not required <= item.keys():
+                    raise SchemaDrift(f"{key} item is missing required fields")
+            sample = self._rng.sample(walked, min(self.sample_size, len(walked)))
+            for item in sample:
+                try:
+                    if model is TraceNode:
+                        # Children are sampled on their own; validating them
+                        # here would validate whole subtrees.
+                        model.model_validate({**_without_lazy(item), "children": []}, strict=True)
+                    else:
+                        model.model_validate(_without_lazy(item), strict=True)
+                except ValidationError as e:
+                    raise SchemaDrift(f"{key} item failed validation: {e}") from e
+                if model not in self._reported_unknown and not item.keys() <= _KNOWN[model]:
+                    self._reported_unknown.add(model)
+                    logger.info(
+                        "AIOBS %s carry fields the models ignore: %s",
+                        key,
+                        sorted(item.keys() - _KNOWN[model]),
+                    )
+
+    def loads(self, content: bytes) -> Any:
+        """Parse a JSON response body with the garbage collector paused.
+
+        With :attr:`lazy_payloads`, event requests and responses and function
+        arguments and results are left as raw JSON.
+        """
+        with _gc_paused():
+            if self.lazy_payloads:
+                return loads_lazy(content, _LAZY_FIELDS, {"trace_tree": "children"})
+            return json.loads(content)
+
+    def decode(self, payload: dict[str, Any]) -> SessionsResponse:
+        """Decode a sessions payload, validating fully only if drift is detected.
+
+        The decoder takes ownership of ``payload``: its dicts become the
+        models' attribute dicts and must not be modified afterwards.
+        """
+        with _gc_paused():
+            try:
+                self._check(payload)
+            except SchemaDrift as e:
+                self.fallbacks += 1
+                logger.warning("AIOBS payload failed fast decode checks, validating fully: %s", e)
+                _materialize_payload(payload)
+                return SessionsResponse(**payload)
+
+            self.fast_decodes += 1
+            fields = {
+                "sessions": [_construct_session(s) for s in payload.get("sessions") or []],
+                "events": [
+                    _construct_event(_with_callsite(e)) for e in payload.get("events") or []
+                ],
+                "function_events": [
+                    _construct_function_event(_with_callsite(e))
+                    for e in payload.get("function_events") or []
+                ],
+                "trace_tree": [_construct_node(n) for n in payload.get("trace_tree") or []],
+            }
+            for key in ("enh_prompt_traces", "generated_at", "version", "next_cursor", "total"):
+                if key in payload:
+                    fields[key] = payload[key]
+            return SessionsResponse.model_construct(**fields)
+
+    def snapshot(self) -> dict[str, int]:
+        """Return how many payloads were decoded fast and how many fell back."""
+        return {"fast_decodes": self.fast_decodes, "fallbacks": self.fallbacks}
+
+
+def decode_sessions(
+    payload: dict[str, Any], decoder: FastDecoder | None = None, caps: FieldCaps | None = None
+) -> SessionsResponse:
+    """Decode a sessions payload, with ``decoder`` if given and full validation otherwise.
+
+    Oversized request and call data is capped first when ``caps`` is given
+    (see :mod:`shepherd_mcp.models.caps`). Repeated strings, prompts and
+    tool lists are then shared (see :mod:`shepherd_mcp.models.dedup`),
+    unless the decoder stores payloads lazily, as raw JSON that is not
+    parsed yet.
+    """
+    if caps is not None:
+        caps.sessions_payload(payload)
+    if decoder is None or not decoder.lazy_payloads:
+        with _gc_paused():
+            dedup_payload(payload)
+    if decoder is None:
+        return SessionsResponse(**payload)
+    return decoder.decode(payload)
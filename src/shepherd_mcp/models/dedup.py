@@ -0,0 +1,163 @@
+"""Sharing of repeated values within an AIOBS sessions payload.
+
+An agent sends the same system prompt, tool schemas and model name with
+every LLM call, and a parsed payload holds a separate copy of each for
+every event. :func:`dedup_payload` runs once per payload, before it is
+decoded into models, and makes equal values the same object:
+
+- short strings (model names, roles, stop reasons) are interned;
+- longer strings are pooled by value;
+- large message, tool and system sub-objects are pooled by a hash of their
+  JSON (see :meth:`PayloadPool.pooled`), so identical ones are stored once.
+
+Shared values are never mutated afterwards: payloads are read-only once
+decoded. :func:`content_hash` gives the digest used for pooling, so callers
+can compare large values by hash instead of by content.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import sys
+from collections.abc import Hashable
+from typing import Any
+
+# Strings up to this length are interned process-wide; longer ones are
+# only shared within a payload.
+MAX_INTERNED_LENGTH = 64
+
+# Sub-objects whose JSON is shorter than this are cheaper to keep than to
+# hash; their strings are still shared.
+MIN_POOLED_BYTES = 256
+
+# Request keys holding values that repeat across an agent's calls.
+_POOLED_REQUEST_KEYS = ("tools", "functions", "system", "tool_choice", "response_format")
+
+_encode = json.JSONEncoder(separators=(",", ":"), default=str).encode
+
+
+def _digest(data: str) -> str:
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+
+@functools.lru_cache(maxsize=256)
+def content_hash(value: str) -> str:
+    """Return a short hex digest of a string, memoized for repeated prompts."""
+    return _digest(value)
+
+
+class PayloadPool:
+    """Shared strings and sub-objects of one payload.
+
+    Attributes:
+        shared: Values replaced by an equal value seen before.
+    """
+
+    def __init__(self, min_pooled_bytes: int = MIN_POOLED_BYTES) -> None:
+        self.min_pooled_bytes = min_pooled_bytes
+        self.shared = 0
+        self._strings: dict[str, str] = {}
+        self._objects: dict[str, Any] = {}
+        self._last: dict[Hashable, Any] = {}
+
+    def string(self, value: str) -> str:
+        """Return the shared copy of a string."""
+        if len(value) <= MAX_INTERNED_LENGTH:
+            return sys.intern(value)
+        shared = self._strings.setdefault(value, value)
+        if shared is not value:
+            self.shared += 1
+        return shared
+
+    def value(self, value: Any) -> Any:
+        """Return ``value`` with its strings shared, walking nested containers."""
+        if type(value) is str:
+            return self.string(value)
+        if type(value) is dict:
+            for key, item in value.items():
+                if type(item) in (str, dict, list):
+                    value[key] = self.value(item)
+        elif type(value) is list:
+            for i, item in enumerate(value):
+                if type(item) in (str, dict, list):
+                    value[i] = self.value(item)
+        return value
+
+    def pooled(self, value: Any, slot: Hashable) -> Any:
+        """Return the shared copy of a large sub-object.
+
+        ``slot`` names where the value sits in a request (say the first
+        message). An agent usually repeats the value of the previous call
+        in the same slot, which a direct comparison confirms faster than
+        encoding; otherwise the value is pooled by a hash of its JSON. The
+        comparison is Python equality, under which JSON ``1``, ``1.0`` and
+        ``true`` are equal; repeated calls from one agent send the same
+        types, so in practice this never merges values that differ.
+        """
+        if type(value) not in (dict, list):
+            return self.value(value)
+        last = self._last.get(slot)
+        if last is not None and last == value:
+            self.shared += 1
+            return last
+        encoded = _encode(value)
+        if len(encoded) < self.min_pooled_bytes:
+            return self.value(value)
+        digest = _digest(encoded)
+        shared = self._objects.get(digest)
+        if shared is not None:
+            self.shared += 1
+        else:
+            shared = self._objects[digest] = self.value(value)
+        self._last[slot] = shared
+        return shared
+
+    def request(self, request: dict[str, Any]) -> None:
+        """Share the repeated parts of an LLM request in place."""
+        for key, item in request.items():
+            if key == "messages" and type(item) is list:
+                request[key] = [self.pooled(message, i) for i, message in enumerate(item)]
+            elif key in _POOLED_REQUEST_KEYS:
+                request[key] = self.pooled(item, key)
+            elif type(item) is str:
+                request[key] = self.string(item)
+
+    def response(self, response: dict[str, Any]) -> None:
+        """Share the short strings of an LLM response in place."""
+        for key, item in response.items():
+            if type(item) is str and len(item) <= MAX_INTERNED_LENGTH:
+                response[key] = sys.intern(item)
+
+    def event(self, event: dict[str, Any]) -> None:
+        """Share the repeated values of a raw event in place."""
+        for key in ("provider", "api", "session_id", "parent_span_id"):
+            if type(event.get(key)) is str:
+                event[key] = self.string(event[key])
+        if type(event.get("request")) is dict:
+            self.request(event["request"])
+        if type(event.get("response")) is dict:
+            self.response(event["response"])
+
+    def function_event(self, event: dict[str, Any]) -> None:
+        """Share the repeated strings of a raw function event in place."""
+        for key in ("provider", "api", "session_id", "parent_span_id", "name", "module"):
+            if type(event.get(key)) is str:
+                event[key] = self.string(event[key])
+
+
+def dedup_payload(payload: dict[str, Any], pool: PayloadPool | None = None) -> PayloadPool:
+    """Share repeated values across the events of a sessions payload, in place.
+
+    Returns:
+        The pool used, for its counters.
+    """
+    pool = pool or PayloadPool()
+    for event in payload.get("events") or ():
+        if type(event) is dict:
+            pool.event(event)
+    for event in payload.get("function_events") or ():
+        if type(event) is dict:
+            pool.function_event(event)
+    return pool
@@ -0,0 +1,298 @@
+"""Lookup structures built over a :class:`~shepherd_mcp.models.aiobs.SessionsResponse`.
+
+A sessions payload is a flat list of sessions plus flat lists of events and
+function events that point back at their session by ID. Answering "which
+events belong to this session?" by scanning those lists makes every
+per-session helper O(events). :class:`SessionIndex` groups the events once
+so those lookups become O(events in the session).
+
+:class:`TextIndex` serves free-text search: a trigram inverted index over
+each session's ID, name, label values and meta values narrows a substring
+query down to a few candidate sessions before any string is compared.
+:class:`AttributeIndex` holds posting lists (attribute value → session IDs)
+for labels, providers, models and functions, so structured filters become
+set intersections. :class:`TimeIndex` keeps sessions sorted by start time so
+a date range is two binary searches.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from shepherd_mcp.models.aiobs import Event, FunctionEvent, Session, SessionsResponse
+
+# Distinct queries whose results a TextIndex remembers.
+_QUERY_MEMO_SIZE = 64
+
+
+@dataclass
+class SessionEntry:
+    """Positions and counts of one session's events in a sessions payload.
+
+    Attributes:
+        events: Indices into ``SessionsResponse.events``, in payload order.
+        function_events: Indices into ``SessionsResponse.function_events``.
+        error_count: Events and function events with an error.
+    """
+
+    events: list[int] = field(default_factory=list)
+    function_events: list[int] = field(default_factory=list)
+    error_count: int = 0
+
+    @property
+    def event_count(self) -> int:
+        return len(self.events)
+
+    @property
+    def function_event_count(self) -> int:
+        return len(self.function_events)
+
+
+_EMPTY = SessionEntry()
+
+
+class SessionIndex:
+    """Session ID → event positions for one sessions payload.
+
+    Built in a single pass over the events. The index is tied to the
+    payload it was built from; payloads are treated as read-only once
+    fetched, so it never needs updating.
+    """
+
+    def __init__(self, response: SessionsResponse) -> None:
+        self._sessions = response.sessions
+        self._events = response.events
+        self._function_events = response.function_events
+        self._text: TextIndex | None = None
+        self._attributes: AttributeIndex | None = None
+        self._by_start: TimeIndex | None = None
+        self.entries: dict[str, SessionEntry] = {}
+        for i, event in enumerate(response.events):
+            entry = self.entries.setdefault(event.session_id, SessionEntry())
+            entry.events.append(i)
+            if event.error:
+                entry.error_count += 1
+        for i, event in enumerate(response.function_events):
+            entry = self.entries.setdefault(event.session_id, SessionEntry())
+            entry.function_events.append(i)
+            if event.error:
+                entry.error_count += 1
+
+    @property
+    def sessions_with_errors(self) -> int:
+        """Number of sessions with at least one failed event or function event."""
+        return sum(1 for entry in self.entries.values() if entry.error_count)
+
+    @property
+    def by_start(self) -> TimeIndex:
+        """Sessions sorted by ``started_at``, built on first use."""
+        if self._by_start is None:
+            self._by_start = TimeIndex(self._sessions)
+        return self._by_start
+
+    @property
+    def text_built(self) -> bool:
+        """Whether :attr:`text` has been built already."""
+        return self._text is not None
+
+    @property
+    def attributes_built(self) -> bool:
+        """Whether :attr:`attributes` has been built already."""
+        return self._attributes is not None
+
+    def entry(self, session_id: str) -> SessionEntry:
+        """Return the index entry for a session (empty if it has no events)."""
+        return self.entries.get(session_id, _EMPTY)
+
+    def events(self, session_id: str) -> list[Event]:
+        """Return a session's events in payload order."""
+        return [self._events[i] for i in self.entry(session_id).events]
+
+    def function_events(self, session_id: str) -> list[FunctionEvent]:
+        """Return a session's function events in payload order."""
+        return [self._function_events[i] for i in self.entry(session_id).function_events]
+
+    @property
+    def text(self) -> TextIndex:
+        """Free-text index over the payload's sessions, built on first use."""
+        if self._text is None:
+            self._text = TextIndex(self._sessions)
+        return self._text
+
+    @property
+    def attributes(self) -> AttributeIndex:
+        """Label, provider, model and function posting lists, built on first use."""
+        if self._attributes is None:
+            self._attributes = AttributeIndex(self._sessions, self._events, self._function_events)
+        return self._attributes
+
+
+def session_search_fields(session: Session) -> list[str]:
+    """Return the lowercased strings a free-text query is matched against."""
+    fields = [session.id.lower(), session.name.lower()]
+    fields.extend(str(value).lower() for value in session.labels.values())
+    fields.extend(str(value).lower() for value in session.meta.values())
+    return fields
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class TextIndex:
+    """Trigram inverted index for case-insensitive substring search.
+
+    Every searchable field of every session is lowercased once and split
+    into trigrams; each trigram maps to the sessions containing it. A query
+    of three or more characters is answered by intersecting the posting
+    sets of its trigrams and confirming the substring only in those
+    candidates. Shorter queries fall back to scanning the lowercased fields.
+    """
+
+    def __init__(self, sessions: list[Session]) -> None:
+        self.session_ids = [session.id for session in sessions]
+        self._fields = [session_search_fields(session) for session in sessions]
+        self.postings: dict[str, set[int]] = {}
+        for position, fields in enumerate(self._fields):
+            for text in fields:
+                for trigram in _trigrams(text):
+                    self.postings.setdefault(trigram, set()).add(position)
+        self._memo: dict[str, frozenset[str]] = {}
+
+    def _candidates(self, query: str) -> set[int] | range:
+        if len(query) < 3:
+            return range(len(self._fields))
+        postings = []
+        for trigram in _trigrams(query):
+            posting = self.postings.get(trigram)
+            if not posting:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+        return postings[0].intersection(*postings[1:])
+
+    def search(self, query: str) -> frozenset[str]:
+        """Return the IDs of sessions with a field containing ``query`` (any case)."""
+        query = query.lower()
+        matches = self._memo.get(query)
+        if matches is None:
+            matches = frozenset(
+                self.session_ids[position]
+                for position in self._candidates(query)
+                if any(query in text for text in self._fields[position])
+            )
+            if len(self._memo) >= _QUERY_MEMO_SIZE:
+                self._memo.pop(next(iter(self._memo)))
+            self._memo[query] = matches
+        return matches
+
+
+def _containing(postings: dict[str, set[str]], needle: str) -> set[str]:
+    """Union the postings of every key that contains ``needle``."""
+    matches: set[str] = set()
+    for key, session_ids in postings.items():
+        if needle in key:
+            matches |= session_ids
+    return matches
+
+
+class AttributeIndex:
+    """Posting lists from session attributes to session IDs.
+
+    Attributes:
+        labels: ``(label key, value)`` → sessions carrying that label.
+        providers: Lowercased provider of any event → sessions.
+        models: Lowercased request ``model`` of any LLM event → sessions.
+        functions: Lowercased function name or module → sessions.
+
+    Model and function filters match substrings, so they are answered by
+    unioning the postings of every key containing the query. There are far
+    fewer distinct models and functions than events, and results are
+    memoized per query.
+    """
+
+    def __init__(
+        self,
+        sessions: list[Session],
+        events: list[Event],
+        function_events: list[FunctionEvent],
+    ) -> None:
+        self.labels: dict[tuple[str, str], set[str]] = {}
+        self.providers: dict[str, set[str]] = {}
+        self.models: dict[str, set[str]] = {}
+        self.functions: dict[str, set[str]] = {}
+        for session in sessions:
+            for item in session.labels.items():
+                self.labels.setdefault(item, set()).add(session.id)
+        for event in events:
+            self.providers.setdefault(event.provider.lower(), set()).add(event.session_id)
+            if event.request:
+                model = str(event.request.get("model", "")).lower()
+                self.models.setdefault(model, set()).add(event.session_id)
+        for event in function_events:
+            self.providers.setdefault(event.provider.lower(), set()).add(event.session_id)
+            for name in (event.name, event.module):
+                if name:
+                    self.functions.setdefault(name.lower(), set()).add(event.session_id)
+        self._memo: dict[tuple[str, str], frozenset[str]] = {}
+
+    def with_labels(self, labels: dict[str, str]) -> set[str]:
+        """Return the sessions carrying every one of ``labels``."""
+        postings = [self.labels.get(item, set()) for item in labels.items()]
+        if not postings:
+            return set()
+        postings.sort(key=len)
+        return postings[0].intersection(*postings[1:])
+
+    def with_provider(self, provider: str) -> set[str]:
+        """Return the sessions with an event from ``provider`` (any case)."""
+        return self.providers.get(provider.lower(), set())
+
+    def _memoized(self, kind: str, postings: dict[str, set[str]], query: str) -> frozenset[str]:
+        key = (kind, query.lower())
+        matches = self._memo.get(key)
+        if matches is None:
+            matches = frozenset(_containing(postings, key[1]))
+            if len(self._memo) >= _QUERY_MEMO_SIZE:
+                self._memo.pop(next(iter(self._memo)))
+            self._memo[key] = matches
+        return matches
+
+    def with_model(self, model: str) -> frozenset[str]:
+        """Return the sessions with an LLM call whose model contains ``model``."""
+        return self._memoized("model", self.models, model)
+
+    def with_function(self, function: str) -> frozenset[str]:
+        """Return the sessions calling a function whose name or module contains ``function``."""
+        return self._memoized("function", self.functions, function)
+
+
+class TimeIndex:
+    """Session positions sorted by ``started_at``.
+
+    A ``[after, before]`` window maps to one contiguous slice found with two
+    binary searches, however many sessions fall outside it.
+    """
+
+    def __init__(self, sessions: list[Session]) -> None:
+        self._sessions = sessions
+        self.positions = sorted(range(len(sessions)), key=lambda i: sessions[i].started_at)
+        self.starts = [sessions[i].started_at for i in self.positions]
+
+    def window(self, after: float | None = None, before: float | None = None) -> list[int]:
+        """Return positions of sessions started in ``[after, before]``, in payload order.
+
+        Either bound may be None for an open-ended window.
+        """
+        low = bisect_left(self.starts, after) if after is not None else 0
+        high = bisect_right(self.starts, before) if before is not None else len(self.starts)
+        return sorted(self.positions[low:high])
+
+    def sessions_between(
+        self, after: float | None = None, before: float | None = None
+    ) -> list[Session]:
+        """Return the sessions started in ``[after, before]``, in payload order."""
+        return [self._sessions[i] for i in self.window(after, before)]
@@ -0,0 +1,449 @@
+"""Payload fields kept as raw JSON until they are read.
+
+Event requests and responses and function arguments and results hold
+prompts, tool schemas and retrieved documents, yet most tools only read a
+request's ``model`` or a response's ``usage``. Kept as nested dicts, they
+make up most of the memory a cached sessions payload holds.
+
+:func:`loads_lazy` parses a response body without building them. A search
+for the field keys locates each value, a regular expression finds where it
+ends and picks out the handful of hot keys tools read all the time, and the
+value is kept as a :class:`LazyDict` or :class:`LazyList` over its byte
+slice of the original document. Only the rest of the document goes through
+:func:`json.loads`. A wrapped value is decoded, once, the first time
+anything beyond its keys, length and hot keys is read. Both wrappers are
+read-only and behave like the ``dict`` or ``list`` they replace for every
+read operation.
+
+Scanning costs about as much as :func:`json.loads` would spend building the
+values, so parse time stays roughly the same; the memory held drops several
+times over for structured values such as tool schemas and message lists,
+and much less for long strings, whose bytes take as much room as the
+``str``. Fields shorter than :data:`MIN_LAZY_BYTES` are parsed as usual.
+Values nested deeper than :data:`MAX_DEPTH` levels are wrapped too, found
+by pairing brackets, but without their hot keys.
+
+A wrapped value's brackets are checked to pair up, and the rest of the
+document is checked by :func:`json.loads`; if a value cannot be delimited,
+the whole document goes through :func:`json.loads` instead, which raises
+for invalid JSON. Other syntax errors inside a wrapped value, such as a
+missing comma, are only raised when it is decoded.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import re
+import sys
+from collections.abc import Collection, Iterator, Mapping, Sequence
+from typing import Any
+
+# Top-level keys picked out of a wrapped object, so reading them never
+# decodes the whole value.
+HOT_KEYS = ("model", "usage", "stop_reason", "finish_reason")
+
+# Container nesting below an item that the expressions can match.
+MAX_DEPTH = 8
+
+# Fields with shorter JSON are parsed as usual: json.loads builds a small
+# value faster than it can be wrapped, and it costs little memory.
+MIN_LAZY_BYTES = 1024
+
+# Most strings end at the first quote; ``[^"]`` runs far faster than a
+# class excluding backslashes too. Whether that quote follows a backslash
+# picks exactly one branch, so a failed match never retries a string.
+_STRING = rb'"(?:[^"]*(?<!\\)"|(?=[^"]*\\")[^"\\]*(?:\\.[^"\\]*)*")'
+_SCALAR = rb'[^\s"\[\]{},:]+'
+
+
+def _container(depth: int) -> bytes:
+    """Return an expression for an object or array nested up to ``depth`` levels."""
+    # Runs of plain characters alternate with tokens that each start with a
+    # distinct character, so a failed match has only one way to backtrack.
+    # Objects and arrays share one branch to keep the expression linear in
+    # ``depth``; :func:`_balanced` checks that the brackets pair up.
+    plain = rb'[^"\[\]{}]*'
+    body = plain + rb"(?:" + _STRING + plain + rb")*"
+    for _ in range(depth - 1):
+        token = _STRING + rb"|[\[{]" + body + rb"[\]}]"
+        body = plain + rb"(?:(?:" + token + rb")" + plain + rb")*"
+    return rb"\{" + body + rb"\}|\[" + body + rb"\]"
+
+
+_VALUE = rb"(?:" + _container(MAX_DEPTH) + rb"|" + _STRING + rb"|" + _SCALAR + rb")"
+_VALUE_RE = re.compile(_VALUE)
+_WHITESPACE = re.compile(rb"\s*")
+_SEPARATOR = re.compile(rb"\s*,?\s*")
+_KEY_RE = re.compile(rb"(" + _STRING + rb")\s*:\s*")
+_ANY_TOKEN = re.compile(_STRING + rb"|[\[\]{}]")
+_STRING_RE = re.compile(_STRING)
+_CLOSING = {ord("{"): ord("}"), ord("["): ord("]")}
+# Every byte but the four brackets, deleted to leave a value's bracket skeleton.
+_NOT_BRACKETS = bytes(b for b in range(256) if b not in b"[]{}")
+
+# Marks a field's position in the skeleton until the wrapper replaces it.
+_PLACEHOLDER = "\x00lazy:"
+
+
+@functools.lru_cache(maxsize=16)
+def _object_pattern(keys: tuple[str, ...]) -> re.Pattern[bytes]:
+    """Return an expression matching a whole JSON object.
+
+    Each of ``keys`` gets a group ``k<i>`` spanning its value; a group
+    inside a repetition keeps its last match, and keys are unique.
+    """
+    named = b"".join(
+        b'"' + re.escape(key.encode()) + rb'"\s*:\s*(?P<k' + str(i).encode() + b">" + _VALUE + b")|"
+        for i, key in enumerate(keys)
+    )
+    member = rb"(?:" + named + _STRING + rb"\s*:\s*" + _VALUE + rb")"
+    # Commas are optional here; a missing one is caught when the value is decoded.
+    return re.compile(rb"\{\s*(?:" + member + rb"\s*,?\s*)*\}")
+
+
+_RESPONSE = (*HOT_KEYS, "choices")
+_FIRST_OBJECT = re.compile(rb"\[\s*(?=\{)")
+
+
+class LazyDict(Mapping[str, Any]):
+    """Read-only mapping backed by a JSON object, decoded on first use.
+
+    Key membership, iteration order, length and the :data:`HOT_KEYS` are
+    answered without decoding; the keys are scanned for on first use.
+
+    Attributes:
+        finish_reason: The response's stop or finish reason, in either
+            provider format, if it has one.
+    """
+
+    __slots__ = ("_raw", "_keys", "_hot", "_value", "finish_reason")
+
+    def __init__(self, raw: bytes, hot: dict[str, Any], finish_reason: Any = None) -> None:
+        self._raw: bytes | None = raw
+        self._keys: tuple[str, ...] | None = None
+        self._hot = hot
+        self._value: dict[str, Any] | None = None
+        self.finish_reason = finish_reason
+
+    @property
+    def decoded(self) -> bool:
+        """Whether the full value has been decoded."""
+        return self._value is not None
+
+    @property
+    def raw_size(self) -> int:
+        """Length of the value's JSON in bytes."""
+        return len(self._raw) if self._raw is not None else len(json.dumps(self._value))
+
+    def decode(self) -> dict[str, Any]:
+        """Return the full value as a plain dict, decoding it once."""
+        if self._value is None:
+            self._value = json.loads(self._raw)
+            self._raw = None
+        return self._value
+
+    def _member_keys(self) -> tuple[str, ...]:
+        if self._keys is None:
+            if self._value is not None:
+                self._keys = tuple(self._value)
+            else:
+                self._keys = tuple(_key(raw) for raw in _members(self._raw, keys=True))
+        return self._keys
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._hot:
+            return self._hot[key]
+        if self._value is None and key not in self._member_keys():
+            raise KeyError(key)
+        return self.decode()[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._hot or key in self._member_keys()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._member_keys())
+
+    def __len__(self) -> int:
+        return len(self._member_keys())
+
+    def __repr__(self) -> str:
+        return f"LazyDict({self.decode()!r})"
+
+    def __sizeof__(self) -> int:
+        raw = sys.getsizeof(self._raw) if self._raw is not None else 0
+        return object.__sizeof__(self) + raw + sys.getsizeof(self._hot)
+
+
+class LazyList(Sequence[Any]):
+    """Read-only sequence backed by a JSON array, decoded on first use.
+
+    Its length is answered without decoding, counted on first use.
+    """
+
+    __slots__ = ("_raw", "_length", "_value")
+
+    def __init__(self, raw: bytes) -> None:
+        self._raw: bytes | None = raw
+        self._length: int | None = None
+        self._value: list[Any] | None = None
+
+    @property
+    def decoded(self) -> bool:
+        """Whether the full value has been decoded."""
+        return self._value is not None
+
+    @property
+    def raw_size(self) -> int:
+        """Length of the value's JSON in bytes."""
+        return len(self._raw) if self._raw is not None else len(json.dumps(self._value))
+
+    def decode(self) -> list[Any]:
+        """Return the full value as a plain list, decoding it once."""
+        if self._value is None:
+            self._value = json.loads(self._raw)
+            self._raw = None
+        return self._value
+
+    def __getitem__(self, index: Any) -> Any:
+        return self.decode()[index]
+
+    def __len__(self) -> int:
+        if self._length is None:
+            if self._value is not None:
+                self._length = len(self._value)
+            else:
+                self._length = sum(1 for _ in _members(self._raw, keys=False))
+        return self._length
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, LazyList):
+            other = other.decode()
+        return isinstance(other, list) and self.decode() == other
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"LazyList({self.decode()!r})"
+
+    def __sizeof__(self) -> int:
+        raw = sys.getsizeof(self._raw) if self._raw is not None else 0
+        return object.__sizeof__(self) + raw
+
+
+def _members(raw: bytes, keys: bool) -> Iterator[bytes]:
+    """Yield the keys of the JSON object ``raw``, or the values of the array ``raw``."""
+    pos = _WHITESPACE.match(raw, 1).end()
+    while pos < len(raw) - 1:
+        if keys:
+            key = _KEY_RE.match(raw, pos)
+            if key is None:
+                raise ValueError("Invalid JSON object")
+            yield key.group(1)
+            pos = _value_end(raw, key.end())
+        else:
+            end = _value_end(raw, pos)
+            yield raw[pos:end]
+            pos = end
+        pos = _SEPARATOR.match(raw, pos).end()
+
+
+def _key(raw: bytes) -> str:
+    return raw[1:-1].decode() if b"\\" not in raw else json.loads(raw)
+
+
+def _json_value(raw: bytes) -> Any:
+    if raw[:1] == b'"' and b"\\" not in raw:
+        return raw[1:-1].decode()
+    return json.loads(raw)
+
+
+def _match_field(content: bytes, start: int) -> tuple[int, dict[str, Any], Any]:
+    """Return where the object or array at ``start`` ends, its hot keys and finish reason."""
+    if content[start : start + 1] == b"[":
+        return _value_end(content, start), {}, None
+    match = _object_pattern(_RESPONSE).match(content, start)
+    if match is None:
+        # Nested deeper than the expression reaches.
+        return _scan_end(content, start), {}, None
+    if match.end() - start < MIN_LAZY_BYTES:
+        return match.end(), {}, None
+    hot: dict[str, Any] = {}
+    spans = [match.span(f"k{i}") for i in range(len(_RESPONSE))]
+    for key, (s, e) in zip(HOT_KEYS, spans, strict=False):
+        if s >= 0:
+            hot[key] = _json_value(content[s:e])
+    finish = hot.get("stop_reason") or hot.get("finish_reason")
+    s, e = spans[-1]
+    first = _FIRST_OBJECT.match(content, s, e) if s >= 0 else None
+    if not finish and first is not None:
+        choice = _object_pattern(("finish_reason",)).match(content, first.end(), e)
+        if choice is not None and choice.start("k0") >= 0:
+            finish = _json_value(choice.group("k0"))
+    return match.end(), hot, finish
+
+
+def _value_end(content: bytes, start: int) -> int:
+    """Return where the JSON value at ``start`` ends, however deeply it nests."""
+    match = _VALUE_RE.match(content, start)
+    if match is not None:
+        return match.end()
+    return _scan_end(content, start)
+
+
+def _scan_end(content: bytes, start: int) -> int:
+    """Return where the object or array at ``start`` ends by pairing brackets."""
+    expected: list[int] = []
+    for token in _ANY_TOKEN.finditer(content, start):
+        char = content[token.start()]
+        if char in _CLOSING:
+            expected.append(_CLOSING[char])
+        elif char in b"}]":
+            if not expected or expected.pop() != char:
+                raise ValueError("Mismatched bracket in JSON document")
+            if not expected:
+                return token.end()
+    raise ValueError("Truncated JSON document")
+
+
+def _balanced(raw: bytes) -> bool:
+    """Whether the brackets of the JSON value ``raw`` pair up, outside its strings."""
+    skeleton = _STRING_RE.sub(b"", raw).translate(None, _NOT_BRACKETS)
+    while True:
+        reduced = skeleton.replace(b"{}", b"").replace(b"[]", b"")
+        if len(reduced) == len(skeleton):
+            return not reduced
+        skeleton = reduced
+
+
+def loads_lazy(
+    content: bytes,
+    fields: Mapping[str, Collection[str]],
+    children: Mapping[str, str] | None = None,
+) -> Any:
+    """Parse a JSON object, keeping selected item fields as raw JSON.
+
+    Args:
+        content: The JSON document.
+        fields: Top-level array keys mapped to the keys of their items whose
+               object or array values are wrapped, such as
+               ``{"events": ("request", "response")}``. Values shorter
+               than :data:`MIN_LAZY_BYTES` are parsed as usual.
+        children: Top-level array keys whose items nest more items under
+                 this key (e.g. trace nodes under ``children``); their
+                 fields are wrapped too.
+
+    Returns:
+        The parsed document, with :class:`LazyDict` and :class:`LazyList`
+        in place of the selected fields.
+
+    Raises:
+        ValueError: If ``content`` is not valid JSON.
+    """
+    children = children or {}
+    keys = tuple(sorted({key for item_keys in fields.values() for key in item_keys}))
+    try:
+        spans = _find_fields(content, keys)
+    except ValueError:
+        # A field value the scan cannot delimit; json.loads reports where.
+        spans = []
+    if not spans:
+        return json.loads(content)
+    pieces: list[bytes] = []
+    wrapped: dict[str, LazyDict | LazyList] = {}
+    copied = 0
+    for s, e, hot, finish in spans:
+        placeholder = f"{_PLACEHOLDER}{len(wrapped)}"
+        raw = content[s:e]
+        wrapped[placeholder] = LazyList(raw) if raw[:1] == b"[" else LazyDict(raw, hot, finish)
+        pieces.append(content[copied:s])
+        pieces.append(json.dumps(placeholder).encode())
+        copied = e
+    pieces.append(content[copied:])
+    document = json.loads(b"".join(pieces))
+    if _replace_placeholders(document, fields, children, wrapped) != len(wrapped):
+        # A field key also appears somewhere else, e.g. inside an evaluation.
+        _restore_placeholders(document, wrapped)
+    return document
+
+
+@functools.lru_cache(maxsize=16)
+def _field_pattern(keys: tuple[str, ...]) -> re.Pattern[bytes]:
+    names = b"|".join(re.escape(key.encode()) for key in keys)
+    return re.compile(rb'"(?:' + names + rb')"\s*:\s*(?=[\[{])')
+
+
+def _find_fields(
+    content: bytes, keys: tuple[str, ...]
+) -> list[tuple[int, int, dict[str, Any], Any]]:
+    """Return the spans, hot keys and finish reasons of large values of ``keys``, in order.
+
+    An unescaped ``"key":`` can only be an object key, so a plain search
+    finds the fields; values inside a returned span are not searched again.
+    Keys found outside the selected items are put back by the caller.
+
+    Raises:
+        ValueError: If a returned value's brackets do not pair up.
+    """
+    pattern = _field_pattern(keys)
+    spans = []
+    pos = 0
+    while (match := pattern.search(content, pos)) is not None:
+        value_end, hot, finish = _match_field(content, match.end())
+        if value_end - match.end() >= MIN_LAZY_BYTES:
+            if not _balanced(content[match.end() : value_end]):
+                raise ValueError("Mismatched bracket in JSON document")
+            spans.append((match.end(), value_end, hot, finish))
+            pos = value_end
+        else:
+            pos = match.end()
+    return spans
+
+
+def _replace_placeholders(
+    document: Any,
+    fields: Mapping[str, Collection[str]],
+    children: Mapping[str, str],
+    wrapped: dict[str, LazyDict | LazyList],
+) -> int:
+    """Put the wrappers in place of their placeholders and return how many were placed."""
+    placed = 0
+    if type(document) is not dict:
+        return placed
+    for top, keys in fields.items():
+        items = document.get(top)
+        stack = list(items) if type(items) is list else []
+        nested = children.get(top)
+        while stack:
+            item = stack.pop()
+            if type(item) is not dict:
+                continue
+            for key in keys:
+                value = item.get(key)
+                if type(value) is str and value in wrapped:
+                    item[key] = wrapped[value]
+                    placed += 1
+            if nested is not None and type(item.get(nested)) is list:
+                stack.extend(item[nested])
+    return placed
+
+
+def _restore_placeholders(document: Any, wrapped: dict[str, LazyDict | LazyList]) -> None:
+    """Decode the wrappers whose placeholders were left anywhere in ``document``."""
+    stack = [document]
+    while stack:
+        container = stack.pop()
+        entries = container.items() if type(container) is dict else enumerate(container)
+        for key, value in entries:
+            if type(value) is str:
+                if value in wrapped:
+                    container[key] = wrapped[value].decode()
+            elif type(value) is dict or type(value) is list:
+                stack.append(value)
+
+
+def materialize(value: Any) -> Any:
+    """Return the plain dict or list behind a lazy value; return anything else as is."""
+    if isinstance(value, LazyDict | LazyList):
+        return value.decode()
+    return value
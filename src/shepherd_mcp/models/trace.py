@@ -0,0 +1,141 @@
+"""Flattened view of an AIOBS trace tree.
+
+``SessionsResponse.trace_tree`` is nested: each
+:class:`~shepherd_mcp.models.aiobs.TraceNode` holds its children. Walking it
+recursively costs a Python frame per level, so deep agent call chains can
+hit the recursion limit, and every helper walks the whole tree again.
+
+:class:`FlatTrace` lays the tree out once in pre-order, with the structure
+in parallel integer arrays (parent, depth, first child, next sibling). Depth,
+subtree sizes and durations, and serialization are then single loops over
+those arrays. The nodes themselves are not copied: :attr:`FlatTrace.nodes`
+refers to the original nested nodes, which remain usable as before.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Callable, Sequence
+from typing import Any, TypeVar
+
+# Index stored for "no such node" (a root's parent, a leaf's first child).
+NONE = -1
+
+T = TypeVar("T")
+
+
+class FlatTrace:
+    """A trace tree in pre-order, with its structure in index arrays.
+
+    Works on any nodes with a ``children`` list, such as ``TraceNode`` and
+    ``TraceNodeRecord``.
+
+    Attributes:
+        roots: The top-level nodes, as given.
+        nodes: Every node in pre-order; node ``i`` is ``nodes[i]``.
+        parent: Index of each node's parent, or ``NONE`` for roots.
+        depth: Distance of each node from its root (roots are at 0).
+        first_child: Index of each node's first child, or ``NONE``.
+        next_sibling: Index of the next node with the same parent (for roots,
+            the next root), or ``NONE``.
+    """
+
+    def __init__(self, roots: Sequence[Any]) -> None:
+        self.roots = roots
+        self.nodes: list[Any] = []
+        self.parent = array("i")
+        self.depth = array("i")
+        self.first_child = array("i")
+        self.next_sibling = array("i")
+
+        # Last child linked so far per parent index (NONE for the roots).
+        last_child: dict[int, int] = {}
+        # Children are pushed in reverse so they are popped in order.
+        stack: list[tuple[Any, int, int]] = [(node, NONE, 0) for node in reversed(roots)]
+        while stack:
+            node, parent, depth = stack.pop()
+            index = len(self.nodes)
+            self.nodes.append(node)
+            self.parent.append(parent)
+            self.depth.append(depth)
+            self.first_child.append(NONE)
+            self.next_sibling.append(NONE)
+
+            previous = last_child.get(parent)
+            if previous is not None:
+                self.next_sibling[previous] = index
+            elif parent != NONE:
+                self.first_child[parent] = index
+            last_child[parent] = index
+
+            children = node.children
+            if children:
+                stack.extend((child, index, depth + 1) for child in reversed(children))
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def children(self, index: int) -> list[int]:
+        """Return the indices of a node's children, in order."""
+        result = []
+        child = self.first_child[index]
+        while child != NONE:
+            result.append(child)
+            child = self.next_sibling[child]
+        return result
+
+    def max_depth(self) -> int:
+        """Return the number of levels in the tree (0 when it is empty)."""
+        return max(self.depth) + 1 if self.depth else 0
+
+    def _accumulate(self, values: array) -> array:
+        # In reverse pre-order every node comes after its descendants, so
+        # one pass adds each finished subtree into its parent.
+        parent = self.parent
+        for index in range(len(values) - 1, -1, -1):
+            if parent[index] != NONE:
+                values[parent[index]] += values[index]
+        return values
+
+    def subtree_sizes(self) -> array:
+        """Return the number of nodes in each node's subtree, itself included."""
+        return self._accumulate(array("i", [1]) * len(self.nodes))
+
+    def subtree_durations(self) -> array:
+        """Return the summed ``duration_ms`` of each node's subtree, itself included."""
+        return self._accumulate(array("d", [node.duration_ms for node in self.nodes]))
+
+    def rebuild(self, make: Callable[[Any, list[T]], T]) -> list[T]:
+        """Build a new tree bottom-up without recursion.
+
+        Args:
+            make: Called once per node with the node and the values already
+                 built for its children, in order.
+
+        Returns:
+            The values built for the root nodes.
+        """
+        built: list[Any] = [None] * len(self.nodes)
+        for index in range(len(self.nodes) - 1, -1, -1):
+            built[index] = make(self.nodes[index], [built[c] for c in self.children(index)])
+        return [built[index] for index, parent in enumerate(self.parent) if parent == NONE]
+
+    def to_dicts(self, convert: Callable[[Any], dict[str, Any]]) -> list[dict[str, Any]]:
+        """Serialize the tree as nested dicts without recursion.
+
+        Args:
+            convert: Builds the dict for one node, without its children.
+                    Nodes with children get a ``children`` list of their
+                    children's dicts, in order.
+
+        Returns:
+            The dicts of the root nodes.
+        """
+        dicts = [convert(node) for node in self.nodes]
+        roots = []
+        for index, parent in enumerate(self.parent):
+            if parent == NONE:
+                roots.append(dicts[index])
+            else:
+                dicts[parent].setdefault("children", []).append(dicts[index])
+        return roots
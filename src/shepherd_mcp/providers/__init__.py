@@ -1,6 +1,6 @@
 """Provider clients for Shepherd MCP."""
 
-from shepherd_mcp.providers.aiobs import AIOBSClient
-from shepherd_mcp.providers.langfuse import LangfuseClient
+from shepherd_mcp.providers.aiobs import AIOBSClient, AsyncAIOBSClient
+from shepherd_mcp.providers.langfuse import AsyncLangfuseClient, LangfuseClient
 
-__all__ = ["AIOBSClient", "LangfuseClient"]
+__all__ = ["AIOBSClient", "AsyncAIOBSClient", "AsyncLangfuseClient", "LangfuseClient"]
@@ -2,8 +2,16 @@
 
 from __future__ import annotations
 
+import base64
+import binascii
+import json
+import math
 import os
+from collections.abc import Callable
+from collections.abc import Set as AbstractSet
+from dataclasses import asdict, dataclass
 from datetime import datetime
+from typing import Any, Literal, TypeVar, overload
 
 import httpx
 
@@ -12,42 +20,81 @@ from shepherd_mcp.models.aiobs import (
     FunctionEvent,
     Session,
     SessionsResponse,
+    TraceNode,
 )
+from shepherd_mcp.models.caps import FieldCaps
+from shepherd_mcp.models.compact import SessionRecords
+from shepherd_mcp.models.decode import FastDecoder, decode_sessions
+from shepherd_mcp.models.dedup import PayloadPool
+from shepherd_mcp.models.index import SessionIndex
 from shepherd_mcp.providers.base import (
+    AsyncBaseProvider,
     AuthenticationError,
     BaseProvider,
     NotFoundError,
     ProviderError,
+    RateLimitError,
+    RetryPolicy,
+    async_call_with_retry,
+    call_with_retry,
+    error_details,
+)
+from shepherd_mcp.providers.jsonstream import JSONItemStream
+from shepherd_mcp.providers.mirror import SessionMirror
+from shepherd_mcp.providers.planner import FilterPlan, PlanStep, Predicate, run_plan
+from shepherd_mcp.providers.ratelimit import AdaptiveRateLimiter
+from shepherd_mcp.providers.singleflight import (
+    SingleFlight,
+    credential_fingerprint,
+    request_key,
 )
 
 DEFAULT_ENDPOINT = "https://shepherd-api-48963996968.us-central1.run.app"
 
+# Payload arrays whose items a streaming scan reads one at a time.
+_STREAMED_ARRAYS = ("sessions", "events", "function_events", "trace_tree")
 
-class AIOBSClient(BaseProvider):
-    """Client for AIOBS API."""
+# Orders a session list page can be sorted in: oldest or newest first.
+SESSION_SORTS = ("started_at", "-started_at")
 
-    def __init__(self, api_key: str | None = None, endpoint: str | None = None) -> None:
-        """Initialize the client.
+_T = TypeVar("_T")
+# A sessions payload, as pydantic models or compact records.
+_Sessions = TypeVar("_Sessions", SessionsResponse, SessionRecords)
 
-        Args:
-            api_key: AIOBS API key. If not provided, reads from AIOBS_API_KEY env var.
-            endpoint: AIOBS API endpoint URL. If not provided, reads from AIOBS_ENDPOINT
-                     env var or uses the default.
+
+class _AIOBSRequests:
+    """Configuration and error handling shared by AIOBS clients."""
+
+    @staticmethod
+    def resolve_config(api_key: str | None, endpoint: str | None) -> tuple[str, str]:
+        """Resolve the API key and endpoint from arguments or environment.
+
+        Returns:
+            Tuple of (api_key, endpoint).
         """
-        self.api_key = api_key or os.environ.get("AIOBS_API_KEY")
-        if not self.api_key:
+        api_key = api_key or os.environ.get("AIOBS_API_KEY")
+        if not api_key:
             raise AuthenticationError(
                 "No API key provided. Set AIOBS_API_KEY environment variable."
             )
 
-        self.endpoint = (endpoint or os.environ.get("AIOBS_ENDPOINT", DEFAULT_ENDPOINT)).rstrip("/")
-        self._client = httpx.Client(timeout=30.0)
+        endpoint = (endpoint or os.environ.get("AIOBS_ENDPOINT", DEFAULT_ENDPOINT)).rstrip("/")
+        return api_key, endpoint
+
+    def _configure(self, api_key: str | None, endpoint: str | None) -> None:
+        """Resolve the API key and endpoint from arguments or environment."""
+        self.api_key, self.endpoint = self.resolve_config(api_key, endpoint)
 
     @property
     def name(self) -> str:
         """Return the provider name."""
         return "aiobs"
 
+    @property
+    def fingerprint(self) -> str:
+        """Hash identifying this account and endpoint, safe to use in cache keys."""
+        return credential_fingerprint(self.endpoint, self.api_key)
+
     def _handle_error_response(self, response: httpx.Response) -> None:
         """Handle error responses from the API."""
         if response.status_code == 401:
@@ -55,52 +102,164 @@ class AIOBSClient(BaseProvider):
                 detail = response.json().get("detail", "Authentication failed")
             except Exception:
                 detail = "Authentication failed"
-            raise AuthenticationError(detail)
+            raise AuthenticationError(detail, **error_details(response))
 
         if response.status_code == 404:
             try:
                 detail = response.json().get("detail", "Not found")
             except Exception:
                 detail = "Not found"
-            raise NotFoundError(detail)
+            raise NotFoundError(detail, **error_details(response))
+
+        if response.status_code == 429:
+            raise RateLimitError("Rate limit exceeded.", **error_details(response))
 
         if response.status_code >= 400:
             try:
                 detail = response.json().get("detail", f"HTTP {response.status_code}")
             except Exception:
                 detail = f"HTTP {response.status_code}"
-            raise ProviderError(detail)
+            raise ProviderError(detail, **error_details(response))
+
 
-    def list_sessions(self) -> SessionsResponse:
-        """List all sessions.
+class AIOBSClient(_AIOBSRequests, BaseProvider):
+    """Client for AIOBS API."""
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        endpoint: str | None = None,
+        retry_policy: RetryPolicy | None = None,
+        rate_limiter: AdaptiveRateLimiter | None = None,
+        decoder: FastDecoder | None = None,
+        caps: FieldCaps | None = None,
+    ) -> None:
+        """Initialize the client.
+
+        Args:
+            api_key: AIOBS API key. If not provided, reads from AIOBS_API_KEY env var.
+            endpoint: AIOBS API endpoint URL. If not provided, reads from AIOBS_ENDPOINT
+                     env var or uses the default.
+            retry_policy: Backoff applied to transient failures. Defaults to
+                         ``RetryPolicy()``.
+            rate_limiter: Adaptive limiter pacing requests. Defaults to no limiting.
+            decoder: Builds responses without full validation. Defaults to
+                    validating every payload.
+            caps: Size caps applied to request and call data when decoding.
+                 Defaults to keeping every field whole.
+        """
+        self._configure(api_key, endpoint)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.decoder = decoder
+        self.caps = caps
+        self._client = httpx.Client(timeout=30.0)
+
+    def _post(self, path: str, body: dict[str, Any] | None = None) -> dict[str, Any]:
+        """POST the API key to a read endpoint, retrying transient failures."""
+
+        def attempt() -> dict[str, Any]:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire_sync()
+            response = self._client.post(
+                f"{self.endpoint}{path}",
+                json={"api_key": self.api_key, **(body or {})},
+            )
+            if self.rate_limiter is not None:
+                self.rate_limiter.observe(response)
+            self._handle_error_response(response)
+            if self.decoder is not None:
+                return self.decoder.loads(response.content)
+            return response.json()
+
+        # The AIOBS read endpoints are POSTs only to carry the API key in the body.
+        return call_with_retry(attempt, self.retry_policy, self.name, idempotent=True)
+
+    def list_sessions(
+        self,
+        since: float | None = None,
+        limit: int | None = None,
+        cursor: str | None = None,
+        after: float | None = None,
+        before: float | None = None,
+        sort: str | None = None,
+    ) -> SessionsResponse:
+        """List sessions, optionally one page at a time.
+
+        The page arguments are sent to the backend. A backend that pages
+        answers with ``next_cursor``; from one that does not, the full list
+        is paged here before decoding, so events of sessions outside the
+        page are never built (see :class:`SessionPage`).
+
+        Args:
+            since: Only return sessions and events newer than this Unix
+                  timestamp. Backends without incremental support ignore it.
+            limit: Maximum number of sessions to return.
+            cursor: ``next_cursor`` of the previous page.
+            after: Only sessions started at or after this Unix timestamp.
+            before: Only sessions started at or before this Unix timestamp.
+            sort: ``"started_at"`` or ``"-started_at"`` (newest first).
+                 Defaults to the backend's order.
 
         Returns:
-            SessionsResponse with all sessions and their events.
+            SessionsResponse with the sessions and their events.
         """
-        response = self._client.post(
-            f"{self.endpoint}/v1/sessions",
-            json={"api_key": self.api_key},
-        )
+        page = SessionPage(limit, cursor, after, before, sort)
+        body = {"since": since} if since is not None else {}
+        payload = self._post("/v1/sessions", {**body, **page.body()} or None)
+        if page and "next_cursor" not in payload:
+            page.apply_payload(payload)
+        return decode_sessions(payload, self.decoder, self.caps)
 
-        self._handle_error_response(response)
-        return SessionsResponse(**response.json())
+    def scan_sessions(
+        self,
+        query: str | None = None,
+        labels: dict[str, str] | None = None,
+        after: float | None = None,
+        before: float | None = None,
+    ) -> SessionsResponse:
+        """List the sessions matching cheap filters, streaming the response.
 
-    def get_session(self, session_id: str) -> SessionsResponse:
+        The body is parsed item by item as it arrives and sessions that do
+        not match are dropped with their events, so the full payload is
+        never held in memory. See :class:`SessionScan`. The date range is
+        also sent to the backend, so one that pages sends only that window.
+
+        Returns:
+            SessionsResponse with the matching sessions and their events.
+        """
+
+        def attempt() -> SessionsResponse:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire_sync()
+            scan = SessionScan(
+                query=query, labels=labels, after=after, before=before, caps=self.caps
+            )
+            body = {"api_key": self.api_key, **SessionPage(after=after, before=before).body()}
+            with self._client.stream("POST", f"{self.endpoint}/v1/sessions", json=body) as response:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.observe(response)
+                if response.status_code >= 400:
+                    response.read()
+                    self._handle_error_response(response)
+                for chunk in response.iter_bytes():
+                    scan.feed(chunk)
+            return scan.close()
+
+        return call_with_retry(attempt, self.retry_policy, self.name, idempotent=True)
+
+    def get_session(self, session_id: str, full: bool = False) -> SessionsResponse:
         """Get a specific session with its trace tree.
 
         Args:
             session_id: The session ID to fetch.
+            full: Keep oversized fields whole instead of applying :attr:`caps`.
 
         Returns:
             SessionsResponse with the session data.
         """
-        response = self._client.post(
-            f"{self.endpoint}/v1/sessions/{session_id}/tree",
-            json={"api_key": self.api_key},
-        )
-
-        self._handle_error_response(response)
-        return SessionsResponse(**response.json())
+        payload = self._post(f"/v1/sessions/{session_id}/tree")
+        return decode_sessions(payload, self.decoder, None if full else self.caps)
 
     def close(self) -> None:
         """Close the HTTP client."""
@@ -113,6 +272,256 @@ class AIOBSClient(BaseProvider):
         self.close()
 
 
+class AsyncAIOBSClient(_AIOBSRequests, AsyncBaseProvider):
+    """Async client for AIOBS API built on ``httpx.AsyncClient``."""
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        endpoint: str | None = None,
+        timeout: float = 30.0,
+        limits: httpx.Limits | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+        retry_policy: RetryPolicy | None = None,
+        rate_limiter: AdaptiveRateLimiter | None = None,
+        single_flight: SingleFlight | None = None,
+        mirror: SessionMirror | None = None,
+        decoder: FastDecoder | None = None,
+        streaming: bool = False,
+        caps: FieldCaps | None = None,
+    ) -> None:
+        """Initialize the client.
+
+        Args:
+            api_key: AIOBS API key. If not provided, reads from AIOBS_API_KEY env var.
+            endpoint: AIOBS API endpoint URL. If not provided, reads from AIOBS_ENDPOINT
+                     env var or uses the default.
+            timeout: Request timeout in seconds.
+            limits: Connection pool limits. Defaults to httpx's limits.
+            transport: Optional transport, e.g. ``httpx.MockTransport`` in tests.
+            retry_policy: Backoff applied to transient failures. Defaults to
+                         ``RetryPolicy()``.
+            rate_limiter: Adaptive limiter pacing requests. Defaults to no limiting.
+            single_flight: Coalesces concurrent identical requests. Defaults to a
+                          private instance.
+            mirror: Local copy of the session list that :meth:`list_sessions`
+                   syncs incrementally. Defaults to full fetches every time.
+            decoder: Builds responses without full validation. Defaults to
+                    validating every payload.
+            streaming: Have searches call :meth:`scan_sessions` instead of
+                      fetching the whole session list. The registry turns
+                      this on unless SHEPHERD_AIOBS_STREAMING is ``0``.
+            caps: Size caps applied to request and call data when decoding.
+                 Defaults to keeping every field whole.
+        """
+        self._configure(api_key, endpoint)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.single_flight = single_flight or SingleFlight()
+        self.mirror = mirror
+        self.decoder = decoder
+        self.streaming = streaming
+        self.caps = caps
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=limits or httpx.Limits(),
+            transport=transport,
+        )
+
+    async def _post(self, path: str, body: dict[str, Any] | None = None) -> dict[str, Any]:
+        """POST the API key to a read endpoint, retrying transient failures."""
+
+        async def attempt() -> dict[str, Any]:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            response = await self._client.post(
+                f"{self.endpoint}{path}",
+                json={"api_key": self.api_key, **(body or {})},
+            )
+            if self.rate_limiter is not None:
+                self.rate_limiter.observe(response)
+            self._handle_error_response(response)
+            if self.decoder is not None:
+                return self.decoder.loads(response.content)
+            return response.json()
+
+        return await async_call_with_retry(attempt, self.retry_policy, self.name, idempotent=True)
+
+    async def _fetch_sessions(
+        self,
+        path: str,
+        body: dict[str, Any] | None = None,
+        full: bool = False,
+        page: SessionPage | None = None,
+    ) -> SessionsResponse:
+        """Fetch and parse a sessions payload, capped by :attr:`caps` unless ``full``.
+
+        With a ``page`` its fields are sent in the body, and a payload the
+        backend did not page is paged before decoding.
+
+        Concurrent calls for the same path and body share one request and one
+        parsed ``SessionsResponse``, which callers must treat as read-only.
+        """
+        caps = None if full else self.caps
+        if page:
+            body = {**(body or {}), **page.body()}
+        url = f"{self.endpoint}{path}" if caps is None else f"{self.endpoint}{path}#capped"
+        key = request_key(self.name, url, body, (self.api_key,))
+
+        async def fetch() -> SessionsResponse:
+            payload = await self._post(path, body)
+            if page and "next_cursor" not in payload:
+                page.apply_payload(payload)
+            return decode_sessions(payload, self.decoder, caps)
+
+        return await self.single_flight.do(key, fetch)
+
+    async def list_sessions(
+        self,
+        since: float | None = None,
+        limit: int | None = None,
+        cursor: str | None = None,
+        after: float | None = None,
+        before: float | None = None,
+        sort: str | None = None,
+    ) -> SessionsResponse:
+        """List sessions, optionally one page at a time.
+
+        With a :class:`SessionMirror`, only the first call downloads the full
+        list; later calls fetch what changed since the mirror's watermark and
+        return the merged snapshot, paged locally. Without one, the page
+        arguments go to the backend as in :meth:`AIOBSClient.list_sessions`.
+
+        Args:
+            since: Only return sessions and events newer than this Unix
+                  timestamp, bypassing the mirror.
+
+        See :meth:`AIOBSClient.list_sessions` for the page arguments.
+
+        Returns:
+            SessionsResponse with the sessions and their events.
+        """
+        page = SessionPage(limit, cursor, after, before, sort)
+        if since is not None or self.mirror is None:
+            body = {"since": since} if since is not None else None
+            return await self._fetch_sessions("/v1/sessions", body, page=page)
+
+        since = self.mirror.since()
+        body = {"since": since} if since is not None else None
+        delta = await self._fetch_sessions("/v1/sessions", body)
+        snapshot = self.mirror.apply(delta, full=since is None)
+        return page.apply(snapshot) if page else snapshot
+
+    async def scan_sessions(
+        self,
+        query: str | None = None,
+        labels: dict[str, str] | None = None,
+        after: float | None = None,
+        before: float | None = None,
+    ) -> SessionsResponse:
+        """List the sessions matching cheap filters, streaming the response.
+
+        The body is parsed item by item as it arrives and sessions that do
+        not match are dropped with their events, so the full payload is
+        never held in memory. See :class:`SessionScan`. The date range is
+        also sent to the backend, as in :meth:`AIOBSClient.scan_sessions`.
+        Concurrent identical scans share one request.
+
+        Returns:
+            SessionsResponse with the matching sessions and their events.
+        """
+        url = f"{self.endpoint}/v1/sessions"
+        filters = {"query": query, "labels": labels, "after": after, "before": before}
+        key = request_key(self.name, f"{url}#scan", filters, (self.api_key,))
+
+        async def attempt() -> SessionsResponse:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            scan = SessionScan(**filters, caps=self.caps)
+            body = {"api_key": self.api_key, **SessionPage(after=after, before=before).body()}
+            async with self._client.stream("POST", url, json=body) as response:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.observe(response)
+                if response.status_code >= 400:
+                    await response.aread()
+                    self._handle_error_response(response)
+                async for chunk in response.aiter_bytes():
+                    scan.feed(chunk)
+            return scan.close()
+
+        async def fetch() -> SessionsResponse:
+            return await async_call_with_retry(
+                attempt, self.retry_policy, self.name, idempotent=True
+            )
+
+        return await self.single_flight.do(key, fetch)
+
+    async def list_session_records(
+        self,
+        limit: int | None = None,
+        cursor: str | None = None,
+        after: float | None = None,
+        before: float | None = None,
+        sort: str | None = None,
+    ) -> SessionRecords:
+        """List sessions as compact records; see :meth:`list_sessions`."""
+        return SessionRecords.from_response(
+            await self.list_sessions(
+                limit=limit, cursor=cursor, after=after, before=before, sort=sort
+            )
+        )
+
+    async def scan_session_records(
+        self,
+        query: str | None = None,
+        labels: dict[str, str] | None = None,
+        after: float | None = None,
+        before: float | None = None,
+    ) -> SessionRecords:
+        """Scan sessions into compact records; see :meth:`scan_sessions`."""
+        return SessionRecords.from_response(
+            await self.scan_sessions(query=query, labels=labels, after=after, before=before)
+        )
+
+    async def get_session(self, session_id: str, full: bool = False) -> SessionsResponse:
+        """Get a specific session with its trace tree.
+
+        Args:
+            session_id: The session ID to fetch.
+            full: Keep oversized fields whole instead of applying :attr:`caps`.
+
+        Returns:
+            SessionsResponse with the session data.
+        """
+        return await self._fetch_sessions(f"/v1/sessions/{session_id}/tree", full=full)
+
+    async def get_session_records(self, session_id: str, full: bool = False) -> SessionRecords:
+        """Get a specific session with its trace tree as compact records.
+
+        This is what the tool handlers cache: trace nodes refer to the
+        session's events instead of repeating them. Use :meth:`get_session`
+        for pydantic models.
+
+        Args:
+            session_id: The session ID to fetch.
+            full: Keep oversized fields whole instead of applying :attr:`caps`.
+
+        Returns:
+            SessionRecords with the session data.
+        """
+        return SessionRecords.from_response(await self.get_session(session_id, full))
+
+    async def aclose(self) -> None:
+        """Close the HTTP client."""
+        await self._client.aclose()
+
+    async def __aenter__(self) -> AsyncAIOBSClient:
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
+
+
 # ============================================================================
 # Filtering utilities
 # ============================================================================
@@ -134,8 +543,14 @@ def parse_date(date_str: str) -> float:
     raise ValueError(f"Invalid date format: {date_str}. Use YYYY-MM-DD or YYYY-MM-DD HH:MM:SS")
 
 
-def session_matches_query(session: Session, query: str) -> bool:
-    """Check if a session matches the text query."""
+def session_matches_query(session: Session, query: str, index: SessionIndex | None = None) -> bool:
+    """Check if a session matches the text query.
+
+    With the payload's ``SessionsResponse.index``, the query is answered from
+    its trigram text index, which is built once and reused across searches.
+    """
+    if index is not None:
+        return session.id in index.text.search(query)
     query_lower = query.lower()
     if query_lower in session.id.lower():
         return True
@@ -146,8 +561,12 @@ def session_matches_query(session: Session, query: str) -> bool:
     return any(query_lower in str(value).lower() for value in session.meta.values())
 
 
-def session_matches_labels(session: Session, labels: dict[str, str]) -> bool:
+def session_matches_labels(
+    session: Session, labels: dict[str, str], index: SessionIndex | None = None
+) -> bool:
     """Check if a session has all the specified labels."""
+    if index is not None and labels:
+        return session.id in index.attributes.with_labels(labels)
     for key, value in labels.items():
         if key not in session.labels:
             return False
@@ -156,13 +575,36 @@ def session_matches_labels(session: Session, labels: dict[str, str]) -> bool:
     return True
 
 
+def _events_of(session: Session, events: list[Event], index: SessionIndex | None) -> list[Event]:
+    """Return the session's events, from the index when one is given."""
+    if index is not None:
+        return index.events(session.id)
+    return [event for event in events if event.session_id == session.id]
+
+
+def _function_events_of(
+    session: Session, function_events: list[FunctionEvent], index: SessionIndex | None
+) -> list[FunctionEvent]:
+    """Return the session's function events, from the index when one is given."""
+    if index is not None:
+        return index.function_events(session.id)
+    return [event for event in function_events if event.session_id == session.id]
+
+
 def session_has_provider(
     session: Session,
     events: list[Event],
     function_events: list[FunctionEvent],
     provider: str,
+    index: SessionIndex | None = None,
 ) -> bool:
-    """Check if a session has events from the specified provider."""
+    """Check if a session has events from the specified provider.
+
+    Pass the payload's ``SessionsResponse.index`` to look the session up in
+    its posting lists instead of scanning every event.
+    """
+    if index is not None:
+        return session.id in index.attributes.with_provider(provider)
     provider_lower = provider.lower()
     for event in events:
         if event.session_id == session.id and event.provider.lower() == provider_lower:
@@ -177,8 +619,11 @@ def session_has_model(
     session: Session,
     events: list[Event],
     model: str,
+    index: SessionIndex | None = None,
 ) -> bool:
     """Check if a session has events using the specified model."""
+    if index is not None:
+        return session.id in index.attributes.with_model(model)
     model_lower = model.lower()
     for event in events:
         if event.session_id != session.id:
@@ -194,8 +639,11 @@ def session_has_errors(
     session: Session,
     events: list[Event],
     function_events: list[FunctionEvent],
+    index: SessionIndex | None = None,
 ) -> bool:
     """Check if a session has any errors."""
+    if index is not None:
+        return index.entry(session.id).error_count > 0
     if any(event.session_id == session.id and event.error for event in events):
         return True
     return any(event.session_id == session.id and event.error for event in function_events)
@@ -205,8 +653,11 @@ def session_has_function(
     session: Session,
     function_events: list[FunctionEvent],
     function_name: str,
+    index: SessionIndex | None = None,
 ) -> bool:
     """Check if a session has calls to the specified function."""
+    if index is not None:
+        return session.id in index.attributes.with_function(function_name)
     name_lower = function_name.lower()
     for event in function_events:
         if event.session_id != session.id:
@@ -235,25 +686,177 @@ def session_has_failed_evals(
     session: Session,
     events: list[Event],
     function_events: list[FunctionEvent],
+    index: SessionIndex | None = None,
 ) -> bool:
     """Check if a session has any failed evaluations."""
-    for event in events:
-        if event.session_id != session.id:
-            continue
+    for event in _events_of(session, events, index):
         for evaluation in event.evaluations:
             if eval_is_failed(evaluation):
                 return True
-    for event in function_events:
-        if event.session_id != session.id:
-            continue
+    for event in _function_events_of(session, function_events, index):
         for evaluation in event.evaluations:
             if eval_is_failed(evaluation):
                 return True
     return False
 
 
+def _plan_predicates(
+    response: SessionsResponse | SessionRecords,
+    query: str | None,
+    labels: dict[str, str] | None,
+    provider: str | None,
+    model: str | None,
+    function: str | None,
+    has_errors: bool,
+    evals_failed: bool,
+) -> list[Predicate]:
+    """Describe the active filters with cost and selectivity estimates.
+
+    Estimates come from the payload's index: event counts per session, the
+    share of sessions with errors, and the exact posting list sizes once
+    those have been built. Filters whose posting
+    lists are not built yet carry the cost of building them, so a query
+    that other filters have already narrowed to a handful of sessions scans
+    those sessions instead.
+    """
+    index = response.index
+    sessions = max(len(response.sessions), 1)
+    events_per_session = len(response.events) / sessions
+    function_events_per_session = len(response.function_events) / sessions
+    attributes_cost = (
+        0.0
+        if index.attributes_built
+        else float(len(response.sessions) + len(response.events) + len(response.function_events))
+    )
+
+    def fraction(matching: AbstractSet[str]) -> float:
+        return len(matching) / sessions
+
+    predicates: list[Predicate] = []
+    if query:
+        text_cost = 0.0 if index.text_built else 20.0 * sessions
+        predicates.append(
+            Predicate(
+                "query",
+                fraction(index.text.search(query)) if index.text_built else 0.1,
+                row_cost=4.0 + len(query),
+                check=lambda s: session_matches_query(s, query),
+                lookup_cost=text_cost + 3.0 * len(query),
+                lookup=lambda: index.text.search(query),
+            )
+        )
+    if labels:
+        predicates.append(
+            Predicate(
+                "labels",
+                fraction(index.attributes.with_labels(labels))
+                if index.attributes_built
+                else 0.2 ** len(labels),
+                row_cost=float(len(labels)),
+                check=lambda s: session_matches_labels(s, labels),
+                lookup_cost=attributes_cost + len(labels),
+                lookup=lambda: index.attributes.with_labels(labels),
+            )
+        )
+    if provider:
+        predicates.append(
+            Predicate(
+                "provider",
+                fraction(index.attributes.with_provider(provider))
+                if index.attributes_built
+                else 0.5,
+                row_cost=1.0 + events_per_session + function_events_per_session,
+                check=lambda s: session_has_provider(
+                    s, index.events(s.id), index.function_events(s.id), provider
+                ),
+                lookup_cost=attributes_cost + 1.0,
+                lookup=lambda: index.attributes.with_provider(provider),
+            )
+        )
+    if model:
+        predicates.append(
+            Predicate(
+                "model",
+                fraction(index.attributes.with_model(model)) if index.attributes_built else 0.3,
+                row_cost=1.0 + 2.0 * events_per_session,
+                check=lambda s: session_has_model(s, index.events(s.id), model),
+                lookup_cost=attributes_cost
+                + (len(index.attributes.models) if index.attributes_built else 10.0),
+                lookup=lambda: index.attributes.with_model(model),
+            )
+        )
+    if function:
+        predicates.append(
+            Predicate(
+                "function",
+                fraction(index.attributes.with_function(function))
+                if index.attributes_built
+                else 0.2,
+                row_cost=1.0 + 2.0 * function_events_per_session,
+                check=lambda s: session_has_function(s, index.function_events(s.id), function),
+                lookup_cost=attributes_cost
+                + (len(index.attributes.functions) if index.attributes_built else 10.0),
+                lookup=lambda: index.attributes.with_function(function),
+            )
+        )
+    if has_errors:
+        predicates.append(
+            Predicate(
+                "has_errors",
+                index.sessions_with_errors / sessions,
+                row_cost=1.0,
+                check=lambda s: index.entry(s.id).error_count > 0,
+            )
+        )
+    if evals_failed:
+        predicates.append(
+            Predicate(
+                "evals_failed",
+                0.3,
+                row_cost=1.0 + 2.0 * (events_per_session + function_events_per_session),
+                check=lambda s: session_has_failed_evals(
+                    s, response.events, response.function_events, index
+                ),
+            )
+        )
+    return predicates
+
+
+@overload
+def filter_sessions(
+    response: _Sessions,
+    query: str | None = ...,
+    labels: dict[str, str] | None = ...,
+    provider: str | None = ...,
+    model: str | None = ...,
+    function: str | None = ...,
+    after: float | None = ...,
+    before: float | None = ...,
+    has_errors: bool = ...,
+    evals_failed: bool = ...,
+    explain: Literal[False] = ...,
+) -> _Sessions: ...
+
+
+@overload
 def filter_sessions(
-    response: SessionsResponse,
+    response: _Sessions,
+    query: str | None = ...,
+    labels: dict[str, str] | None = ...,
+    provider: str | None = ...,
+    model: str | None = ...,
+    function: str | None = ...,
+    after: float | None = ...,
+    before: float | None = ...,
+    has_errors: bool = ...,
+    evals_failed: bool = ...,
+    *,
+    explain: Literal[True],
+) -> tuple[_Sessions, FilterPlan]: ...
+
+
+def filter_sessions(
+    response: _Sessions,
     query: str | None = None,
     labels: dict[str, str] | None = None,
     provider: str | None = None,
@@ -263,64 +866,271 @@ def filter_sessions(
     before: float | None = None,
     has_errors: bool = False,
     evals_failed: bool = False,
-) -> SessionsResponse:
-    """Filter sessions based on criteria."""
-    filtered_sessions = []
-
-    for session in response.sessions:
-        # Text query filter
-        if query and not session_matches_query(session, query):
-            continue
-
-        # Labels filter
-        if labels and not session_matches_labels(session, labels):
-            continue
+    explain: bool = False,
+) -> _Sessions | tuple[_Sessions, FilterPlan]:
+    """Filter sessions based on criteria.
 
-        # Provider filter
-        if provider and not session_has_provider(
-            session, response.events, response.function_events, provider
-        ):
-            continue
+    A date range first narrows the sessions to a slice of the start-time
+    index. The remaining filters are run by a small cost-based planner (see
+    :mod:`shepherd_mcp.providers.planner`): cheap, selective filters go
+    first, each one either scans the remaining candidates or intersects them
+    with a posting list, and evaluation stops once no candidates are left.
 
-        # Model filter
-        if model and not session_has_model(session, response.events, model):
-            continue
+    Args:
+        explain: Also return the :class:`FilterPlan` that was executed.
 
-        # Function filter
-        if function and not session_has_function(session, response.function_events, function):
-            continue
-
-        # Date range filters
-        if after and session.started_at < after:
-            continue
-        if before and session.started_at > before:
-            continue
-
-        # Errors filter
-        if has_errors and not session_has_errors(
-            session, response.events, response.function_events
-        ):
-            continue
+    Returns:
+        The filtered sessions with their events, of the same kind as
+        ``response``, and the plan if ``explain``.
+    """
+    index = response.index
+    predicates = _plan_predicates(
+        response, query, labels, provider, model, function, has_errors, evals_failed
+    )
 
-        # Failed evaluations filter
-        if evals_failed and not session_has_failed_evals(
-            session, response.events, response.function_events
-        ):
-            continue
+    # A date range is two binary searches over the start-time index; every
+    # other filter only sees the sessions inside the window.
+    sessions = response.sessions
+    range_step = None
+    if after or before:
+        sessions = index.by_start.sessions_between(after or None, before or None)
+        range_step = PlanStep(
+            "started_at",
+            "range",
+            estimated_cost=math.log2(len(response.sessions) + 1) + len(sessions),
+            estimated_selectivity=len(sessions) / max(len(response.sessions), 1),
+            rows_in=len(response.sessions),
+            rows_out=len(sessions),
+        )
 
-        filtered_sessions.append(session)
+    filtered_sessions, plan = run_plan(sessions, predicates)
+    if range_step is not None:
+        plan.steps.insert(0, range_step)
 
-    # Filter events to only include those from matching sessions
-    session_ids = {s.id for s in filtered_sessions}
-    filtered_events = [e for e in response.events if e.session_id in session_ids]
-    filtered_function_events = [e for e in response.function_events if e.session_id in session_ids]
+    # Keep only the events of matching sessions, in their original order
+    event_indices = sorted(i for s in filtered_sessions for i in index.entry(s.id).events)
+    function_event_indices = sorted(
+        i for s in filtered_sessions for i in index.entry(s.id).function_events
+    )
 
-    return SessionsResponse(
+    payload = SessionRecords if isinstance(response, SessionRecords) else SessionsResponse
+    filtered = payload(
         sessions=filtered_sessions,
-        events=filtered_events,
-        function_events=filtered_function_events,
+        events=[response.events[i] for i in event_indices],
+        function_events=[response.function_events[i] for i in function_event_indices],
         trace_tree=response.trace_tree,
         enh_prompt_traces=response.enh_prompt_traces,
         generated_at=response.generated_at,
         version=response.version,
     )
+    if explain:
+        return filtered, plan
+    return filtered
+
+
+def _encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> int:
+    try:
+        offset = json.loads(base64.urlsafe_b64decode(cursor.encode()))["offset"]
+    except (binascii.Error, ValueError, TypeError, KeyError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return offset
+
+
+@dataclass(frozen=True)
+class SessionPage:
+    """One page of the session list.
+
+    Sent to the backend with a list request. When the backend returns the
+    whole list instead, the client applies the page itself: the start-time
+    window (inclusive, as in :func:`filter_sessions`) and the order first,
+    then the cursor and the limit. Cursors made by the client are opaque
+    offsets into that ordered window; a backend that pages uses its own.
+
+    Attributes:
+        limit: Maximum number of sessions in the page.
+        cursor: ``next_cursor`` of the previous page.
+        after: Only sessions started at or after this Unix timestamp.
+        before: Only sessions started at or before this Unix timestamp.
+        sort: One of :data:`SESSION_SORTS`, or None for the backend's order.
+    """
+
+    limit: int | None = None
+    cursor: str | None = None
+    after: float | None = None
+    before: float | None = None
+    sort: str | None = None
+
+    def __post_init__(self) -> None:
+        if self.sort is not None and self.sort not in SESSION_SORTS:
+            raise ValueError(f"sort must be one of {', '.join(SESSION_SORTS)}")
+        if self.limit is not None and self.limit < 1:
+            raise ValueError("limit must be at least 1")
+
+    def __bool__(self) -> bool:
+        return any(value is not None for value in asdict(self).values())
+
+    def body(self) -> dict[str, Any]:
+        """Return the fields that are set, for a request body."""
+        return {key: value for key, value in asdict(self).items() if value is not None}
+
+    def select(
+        self, sessions: list[_T], started_at: Callable[[_T], float]
+    ) -> tuple[list[_T], str | None, int]:
+        """Page a full session list.
+
+        Returns:
+            The sessions in the page, the cursor of the next page (None if
+            this is the last), and the number of sessions in the window.
+        """
+        window = [
+            session
+            for session in sessions
+            if (self.after is None or started_at(session) >= self.after)
+            and (self.before is None or started_at(session) <= self.before)
+        ]
+        if self.sort is not None:
+            window.sort(key=started_at, reverse=self.sort.startswith("-"))
+        start = _decode_cursor(self.cursor) if self.cursor is not None else 0
+        end = len(window) if self.limit is None else start + self.limit
+        next_cursor = _encode_cursor(end) if end < len(window) else None
+        return window[start:end], next_cursor, len(window)
+
+    def apply_payload(self, payload: dict[str, Any]) -> None:
+        """Page a raw ``/v1/sessions`` payload in place, before it is decoded.
+
+        Events, function events and trace nodes of sessions outside the page
+        are dropped unparsed.
+        """
+        sessions = [s for s in payload.get("sessions") or () if type(s) is dict]
+        kept, payload["next_cursor"], payload["total"] = self.select(
+            sessions, lambda s: s.get("started_at") or 0
+        )
+        payload["sessions"] = kept
+        ids = {s.get("id") for s in kept}
+        for key in ("events", "function_events", "trace_tree"):
+            payload[key] = [
+                e for e in payload.get(key) or () if type(e) is dict and e.get("session_id") in ids
+            ]
+
+    def apply(self, response: _Sessions) -> _Sessions:
+        """Page a decoded session list, sharing its models or records."""
+        kept, next_cursor, total = self.select(response.sessions, lambda s: s.started_at)
+        ids = {s.id for s in kept}
+        payload = (
+            SessionRecords
+            if isinstance(response, SessionRecords)
+            else SessionsResponse.model_construct
+        )
+        return payload(
+            sessions=kept,
+            events=[e for e in response.events if e.session_id in ids],
+            function_events=[e for e in response.function_events if e.session_id in ids],
+            trace_tree=[n for n in response.trace_tree if n.session_id in ids],
+            enh_prompt_traces=response.enh_prompt_traces,
+            generated_at=response.generated_at,
+            version=response.version,
+            next_cursor=next_cursor,
+            total=total,
+        )
+
+
+class SessionScan:
+    """Filters a streamed ``/v1/sessions`` body while it is being parsed.
+
+    Each session is validated as soon as its JSON is complete and kept only
+    if it matches the text query, the labels and the start-time window
+    (inclusive, as in :func:`filter_sessions`). Events, function events and
+    trace tree roots are kept only for kept sessions. Items that arrive
+    before the sessions array has ended are held back, unvalidated, until it
+    does; the AIOBS backend sends sessions first, so in practice nothing is
+    held back.
+
+    The other filters of :func:`filter_sessions` need a session's events and
+    are applied to the result afterwards. With ``caps``, the request and
+    call data of kept events and trace nodes is capped before validation.
+    """
+
+    def __init__(
+        self,
+        query: str | None = None,
+        labels: dict[str, str] | None = None,
+        after: float | None = None,
+        before: float | None = None,
+        caps: FieldCaps | None = None,
+    ) -> None:
+        self.query = query
+        self.labels = labels
+        self.after = after
+        self.before = before
+        self.caps = caps
+        self._stream = JSONItemStream(_STREAMED_ARRAYS)
+        self._session_ids: set[str] = set()
+        self._fields: dict[str, Any] = {key: [] for key in _STREAMED_ARRAYS}
+        self._pending: list[tuple[str, dict[str, Any]]] = []
+        self._pool = PayloadPool()
+
+    def _matches(self, session: Session) -> bool:
+        if self.after is not None and session.started_at < self.after:
+            return False
+        if self.before is not None and session.started_at > self.before:
+            return False
+        if self.query and not session_matches_query(session, self.query):
+            return False
+        return not self.labels or session_matches_labels(session, self.labels)
+
+    def _add_event(self, key: str, item: dict[str, Any]) -> None:
+        if type(item) is not dict:
+            raise ValueError(f"{key} item is not an object")
+        if item.get("session_id") not in self._session_ids:
+            return
+        if key == "trace_tree":
+            if self.caps is not None:
+                self.caps.trace_node(item)
+            self._fields[key].append(TraceNode.model_validate(item))
+            return
+        if self.caps is not None:
+            self.caps.event(key, item)
+        if key == "events":
+            self._pool.event(item)
+            self._fields[key].append(Event.model_validate(item))
+        else:
+            self._pool.function_event(item)
+            self._fields[key].append(FunctionEvent.model_validate(item))
+
+    def _add(self, key: str, value: Any) -> None:
+        if key == "sessions":
+            session = Session.model_validate(value)
+            if self._matches(session):
+                self._session_ids.add(session.id)
+                self._fields["sessions"].append(session)
+        elif key in _STREAMED_ARRAYS:
+            if "sessions" in self._stream.completed:
+                self._add_event(key, value)
+            else:
+                self._pending.append((key, value))
+        else:
+            self._fields[key] = value
+
+    def feed(self, chunk: bytes) -> None:
+        """Parse a chunk of the body, keeping the matching items it completed."""
+        for key, value in self._stream.feed(chunk):
+            self._add(key, value)
+
+    def close(self) -> SessionsResponse:
+        """Finish parsing and return the matching sessions and their events.
+
+        Raises:
+            ValueError: If the body is not a complete JSON object.
+        """
+        for key, value in self._stream.close():
+            self._add(key, value)
+        for key, item in self._pending:
+            self._add_event(key, item)
+        self._pending = []
+        return SessionsResponse(**self._fields)
@@ -6,10 +6,22 @@ for all provider implementations.
 
 from __future__ import annotations
 
+import asyncio
 import os
+import random
+import threading
+import time
 from abc import ABC, abstractmethod
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, TypeVar
+
+import httpx
+
+T = TypeVar("T")
 
 
 def load_dotenv() -> None:
@@ -43,9 +55,22 @@ load_dotenv()
 
 
 class ProviderError(Exception):
-    """Base exception for provider errors."""
+    """Base exception for provider errors.
 
-    pass
+    Attributes:
+        status_code: HTTP status code of the failed response, if any.
+        retry_after: Seconds the server asked us to wait (``Retry-After``), if any.
+    """
+
+    def __init__(
+        self,
+        message: str = "",
+        status_code: int | None = None,
+        retry_after: float | None = None,
+    ) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
 
 
 class AuthenticationError(ProviderError):
@@ -66,6 +91,199 @@ class RateLimitError(ProviderError):
     pass
 
 
+# ============================================================================
+# Retries
+# ============================================================================
+
+
+def parse_retry_after(value: Any) -> float | None:
+    """Parse a ``Retry-After`` header value into seconds.
+
+    Accepts both the delta-seconds and the HTTP-date forms. Returns None for
+    missing or unparseable values.
+    """
+    if not isinstance(value, str) or not value.strip():
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def error_details(response: httpx.Response) -> dict[str, Any]:
+    """Return the ``ProviderError`` keyword arguments describing a response."""
+    headers = getattr(response, "headers", None)
+    retry_after = headers.get("Retry-After") if headers is not None else None
+    return {
+        "status_code": response.status_code,
+        "retry_after": parse_retry_after(retry_after),
+    }
+
+
+class RetryStats:
+    """Process-wide counters of provider retries.
+
+    Every retry is recorded by provider and reason (the HTTP status code or
+    the transport exception name), so throttling shows up as a count rather
+    than as unexplained latency.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.retries: Counter[tuple[str, str]] = Counter()
+        self.exhausted: Counter[tuple[str, str]] = Counter()
+
+    def record_retry(self, provider: str, reason: str) -> None:
+        """Record that a call to ``provider`` is being retried."""
+        with self._lock:
+            self.retries[(provider, reason)] += 1
+
+    def record_exhausted(self, provider: str, reason: str) -> None:
+        """Record that a call to ``provider`` failed after using up its retries."""
+        with self._lock:
+            self.exhausted[(provider, reason)] += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return the counters as a JSON-serializable dictionary."""
+        with self._lock:
+            retries = dict(self.retries)
+            exhausted = dict(self.exhausted)
+        return {
+            "total_retries": sum(retries.values()),
+            "retries": {f"{p}:{r}": n for (p, r), n in sorted(retries.items())},
+            "exhausted": {f"{p}:{r}": n for (p, r), n in sorted(exhausted.items())},
+        }
+
+    def reset(self) -> None:
+        """Clear all counters."""
+        with self._lock:
+            self.retries.clear()
+            self.exhausted.clear()
+
+
+retry_stats = RetryStats()
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Jittered exponential backoff for idempotent provider calls.
+
+    Attributes:
+        max_retries: Retry budget per call (attempts = max_retries + 1).
+        base_delay: Backoff base in seconds; attempt ``n`` waits up to
+            ``base_delay * 2**n`` ("full jitter").
+        max_delay: Upper bound for a single backoff or ``Retry-After`` wait.
+        deadline: Overall time budget in seconds for a call including all
+            retries. A retry whose wait would overrun it is not attempted.
+        retry_statuses: HTTP status codes considered transient.
+    """
+
+    max_retries: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 10.0
+    deadline: float = 30.0
+    retry_statuses: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+
+    @classmethod
+    def from_env(cls) -> RetryPolicy:
+        """Build a policy from SHEPHERD_MAX_RETRIES and SHEPHERD_RETRY_DEADLINE."""
+        defaults = cls()
+        return cls(
+            max_retries=int(os.environ.get("SHEPHERD_MAX_RETRIES", defaults.max_retries)),
+            deadline=float(os.environ.get("SHEPHERD_RETRY_DEADLINE", defaults.deadline)),
+        )
+
+    def retry_reason(self, error: Exception) -> str | None:
+        """Return why ``error`` is retryable, or None if it is not."""
+        if isinstance(error, RateLimitError):
+            return str(error.status_code or 429)
+        if isinstance(error, ProviderError):
+            if error.status_code in self.retry_statuses:
+                return str(error.status_code)
+            return None
+        if isinstance(error, httpx.TransportError):
+            return type(error).__name__
+        return None
+
+    def backoff(self, attempt: int, error: Exception) -> float:
+        """Return the delay before retry number ``attempt`` (0-indexed)."""
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def next_delay(
+        self, attempt: int, error: Exception, started: float, provider: str
+    ) -> float | None:
+        """Decide whether to retry after ``error``.
+
+        Returns the delay to sleep before the next attempt, or None if the
+        error should be raised. Records the outcome in :data:`retry_stats`.
+        """
+        reason = self.retry_reason(error)
+        if reason is None:
+            return None
+        delay = self.backoff(attempt, error)
+        if attempt >= self.max_retries or time.monotonic() - started + delay > self.deadline:
+            retry_stats.record_exhausted(provider, reason)
+            return None
+        retry_stats.record_retry(provider, reason)
+        return delay
+
+
+def call_with_retry(
+    call: Callable[[], T],
+    policy: RetryPolicy,
+    provider: str,
+    idempotent: bool = True,
+) -> T:
+    """Run ``call``, retrying transient failures according to ``policy``.
+
+    Args:
+        call: Zero-argument callable performing one request attempt.
+        policy: Retry policy to apply.
+        provider: Provider name used for retry accounting.
+        idempotent: Non-idempotent calls are attempted exactly once.
+    """
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        try:
+            return call()
+        except Exception as e:
+            delay = policy.next_delay(attempt, e, started, provider) if idempotent else None
+            if delay is None:
+                raise
+        time.sleep(delay)
+        attempt += 1
+
+
+async def async_call_with_retry(
+    call: Callable[[], Awaitable[T]],
+    policy: RetryPolicy,
+    provider: str,
+    idempotent: bool = True,
+) -> T:
+    """Async variant of :func:`call_with_retry`."""
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        try:
+            return await call()
+        except Exception as e:
+            delay = policy.next_delay(attempt, e, started, provider) if idempotent else None
+            if delay is None:
+                raise
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
 # ============================================================================
 # Base Provider Interface
 # ============================================================================
@@ -94,3 +312,28 @@ class BaseProvider(ABC):
 
     def __exit__(self, *args: Any) -> None:
         self.close()
+
+
+class AsyncBaseProvider(ABC):
+    """Abstract base class for async observability providers.
+
+    Async counterpart of :class:`BaseProvider`, used by the MCP server so
+    that provider calls never block the event loop.
+    """
+
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        """Return the provider name (e.g., 'aiobs', 'langfuse')."""
+        pass
+
+    @abstractmethod
+    async def aclose(self) -> None:
+        """Close the provider client and release resources."""
+        pass
+
+    async def __aenter__(self) -> AsyncBaseProvider:
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.aclose()
@@ -0,0 +1,190 @@
+"""Incremental parsing of a JSON object whose arrays are read item by item.
+
+``POST /v1/sessions`` returns one JSON object holding large ``sessions``,
+``events`` and ``function_events`` arrays. :class:`JSONItemStream` is fed
+the body chunk by chunk as it arrives and hands out each array item as soon
+as it is complete, so a caller can inspect and drop items without the whole
+body or its parsed tree ever being in memory.
+
+The parser does no I/O; both the sync and async clients feed it.
+"""
+
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from collections.abc import Collection, Iterator
+from json.decoder import scanstring
+from typing import Any
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# A partial value is re-parsed only once the buffer has grown by at least
+# this many characters or by the size of the partial value, whichever is
+# larger, so items spanning many chunks cost amortized linear time.
+_MIN_RETRY_GROWTH = 4096
+
+
+class _NeedMore(Exception):
+    """The buffer ends before the next token is complete."""
+
+
+class JSONItemStream:
+    """Parses a JSON object incrementally, streaming selected top-level arrays.
+
+    Feed body chunks to :meth:`feed` and call :meth:`close` at the end. Both
+    produce ``(key, value)`` pairs in document order: one pair per item of a
+    streamed array, and one pair with the whole value for every other key.
+
+    Attributes:
+        completed: Top-level keys whose value has been fully read.
+    """
+
+    def __init__(self, streamed: Collection[str]) -> None:
+        """Initialize the parser.
+
+        Args:
+            streamed: Top-level keys whose array values are yielded item by
+                     item. Other keys are yielded once, parsed whole.
+        """
+        self.streamed = frozenset(streamed)
+        self.completed: set[str] = set()
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._state = "start"
+        self._key: str | None = None
+        self._retry_at = 0
+        self._closed = False
+
+    def feed(self, chunk: bytes) -> Iterator[tuple[str, Any]]:
+        """Add a chunk of the body and iterate over the values it completed.
+
+        Consume the iterator before feeding the next chunk. While it runs,
+        :attr:`completed` describes the document up to the last value
+        yielded, so a caller can tell which arrays had ended before it.
+        """
+        # Keep only the unparsed tail so the buffer never holds more than one
+        # partial value plus the last chunk.
+        self._buffer = self._buffer[self._pos :] + self._text.decode(chunk)
+        self._pos = 0
+        if len(self._buffer) < self._retry_at:
+            return iter(())
+        return self._drain()
+
+    def close(self) -> list[tuple[str, Any]]:
+        """Signal the end of the body and return the remaining values.
+
+        Raises:
+            ValueError: If the body is not a complete JSON object.
+        """
+        self._buffer += self._text.decode(b"", final=True)
+        self._closed = True
+        values = list(self._drain())
+        if self._state != "done":
+            raise ValueError("Truncated JSON body")
+        if self._buffer[self._pos :].strip():
+            raise ValueError("Unexpected data after JSON body")
+        return values
+
+    def _drain(self) -> Iterator[tuple[str, Any]]:
+        self._retry_at = 0
+        try:
+            while self._state != "done":
+                value = self._step()
+                if value is not None:
+                    yield value
+        except _NeedMore:
+            # The next feed trims the buffer to the pending tail first.
+            pending = len(self._buffer) - self._pos
+            self._retry_at = pending + max(pending, _MIN_RETRY_GROWTH)
+
+    def _next_char(self) -> str:
+        """Skip whitespace and return the next character without consuming it."""
+        self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+        if self._pos >= len(self._buffer):
+            if self._closed:
+                raise ValueError("Truncated JSON body")
+            raise _NeedMore
+        return self._buffer[self._pos]
+
+    def _expect(self, allowed: str) -> str:
+        char = self._next_char()
+        if char not in allowed:
+            raise ValueError(f"Expected one of {allowed!r} at offset {self._pos}, got {char!r}")
+        self._pos += 1
+        return char
+
+    def _value(self) -> Any:
+        """Decode one complete JSON value at the current position."""
+        self._next_char()
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            if self._closed:
+                raise
+            raise _NeedMore from None
+        # A number cut by a chunk boundary ("12" of "12.5") decodes fine on
+        # its own; inside an object or array a complete value is always
+        # followed by a delimiter, so wait until one has arrived.
+        if not self._closed:
+            after = _WHITESPACE.match(self._buffer, end).end()
+            if after >= len(self._buffer) or self._buffer[after] not in ",]}":
+                raise _NeedMore
+        self._pos = end
+        return value
+
+    def _step(self) -> tuple[str, Any] | None:
+        state = self._state
+        if state == "start":
+            self._expect("{")
+            self._state = "key_or_end"
+        elif state in ("key_or_end", "key"):
+            char = self._next_char()
+            if char == "}" and state == "key_or_end":
+                self._pos += 1
+                self._state = "done"
+                return None
+            if char != '"':
+                raise ValueError(f"Expected a key at offset {self._pos}")
+            try:
+                key, end = scanstring(self._buffer, self._pos + 1)
+            except json.JSONDecodeError:
+                if self._closed:
+                    raise
+                raise _NeedMore from None
+            self._pos = end
+            self._key = key
+            self._state = "colon"
+        elif state == "colon":
+            self._expect(":")
+            self._state = "value"
+        elif state == "value":
+            if self._key in self.streamed and self._next_char() == "[":
+                self._pos += 1
+                self._state = "item_or_end"
+                return None
+            value = self._value()
+            self.completed.add(self._key)
+            self._state = "after_value"
+            return self._key, value
+        elif state == "after_value":
+            self._state = "key" if self._expect(",}") == "," else "done"
+        elif state in ("item_or_end", "item"):
+            if state == "item_or_end" and self._next_char() == "]":
+                self._pos += 1
+                self.completed.add(self._key)
+                self._state = "after_value"
+                return None
+            item = self._value()
+            self._state = "after_item"
+            return self._key, item
+        elif state == "after_item":
+            if self._expect(",]") == ",":
+                self._state = "item"
+            else:
+                self.completed.add(self._key)
+                self._state = "after_value"
+        return None
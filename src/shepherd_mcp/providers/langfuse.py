@@ -2,13 +2,21 @@
 
 from __future__ import annotations
 
+import asyncio
 import base64
+import binascii
+import json
 import os
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import aclosing
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Any
 
 import httpx
 
+from shepherd_mcp.models.caps import FieldCaps
 from shepherd_mcp.models.langfuse import (
     LangfuseObservation,
     LangfuseObservationsResponse,
@@ -20,89 +28,126 @@ from shepherd_mcp.models.langfuse import (
     LangfuseTracesResponse,
 )
 from shepherd_mcp.providers.base import (
+    AsyncBaseProvider,
     AuthenticationError,
     BaseProvider,
     NotFoundError,
     ProviderError,
     RateLimitError,
+    RetryPolicy,
+    async_call_with_retry,
+    call_with_retry,
+    error_details,
+)
+from shepherd_mcp.providers.ratelimit import AdaptiveRateLimiter
+from shepherd_mcp.providers.singleflight import (
+    SingleFlight,
+    credential_fingerprint,
+    request_key,
 )
 
+# Pages the auto-paginating iterators request ahead of the consumer.
+DEFAULT_PREFETCH = 4
 
-class LangfuseClient(BaseProvider):
-    """Client for Langfuse API.
+# List methods the auto-paginating iterators can walk.
+_LIST_METHODS = ("list_traces", "list_sessions", "list_observations", "list_scores")
 
-    Uses Basic Auth with public_key:secret_key.
-    API Reference: https://api.reference.langfuse.com/
-    """
+
+class _LangfuseRequests:
+    """Configuration, error handling and request building shared by Langfuse clients."""
 
     DEFAULT_HOST = "https://cloud.langfuse.com"
 
-    def __init__(
-        self,
-        public_key: str | None = None,
-        secret_key: str | None = None,
-        host: str | None = None,
-    ) -> None:
-        """Initialize the client.
+    @classmethod
+    def resolve_config(
+        cls,
+        public_key: str | None,
+        secret_key: str | None,
+        host: str | None,
+    ) -> tuple[str, str, str]:
+        """Resolve credentials and host from arguments or environment.
 
-        Args:
-            public_key: Langfuse public API key. If not provided, reads from
-                       LANGFUSE_PUBLIC_KEY env var.
-            secret_key: Langfuse secret API key. If not provided, reads from
-                       LANGFUSE_SECRET_KEY env var.
-            host: Langfuse host URL. If not provided, reads from LANGFUSE_HOST
-                  env var or defaults to cloud.langfuse.com.
+        Returns:
+            Tuple of (public_key, secret_key, host).
         """
-        self.public_key = public_key or os.environ.get("LANGFUSE_PUBLIC_KEY")
-        self.secret_key = secret_key or os.environ.get("LANGFUSE_SECRET_KEY")
+        public_key = public_key or os.environ.get("LANGFUSE_PUBLIC_KEY")
+        secret_key = secret_key or os.environ.get("LANGFUSE_SECRET_KEY")
 
-        if not self.public_key or not self.secret_key:
+        if not public_key or not secret_key:
             raise AuthenticationError(
                 "No API keys provided. Set LANGFUSE_PUBLIC_KEY and LANGFUSE_SECRET_KEY "
                 "environment variables."
             )
 
-        self.host = (host or os.environ.get("LANGFUSE_HOST", self.DEFAULT_HOST)).rstrip("/")
+        host = (host or os.environ.get("LANGFUSE_HOST", cls.DEFAULT_HOST)).rstrip("/")
+        return public_key, secret_key, host
+
+    def _configure(
+        self,
+        public_key: str | None,
+        secret_key: str | None,
+        host: str | None,
+    ) -> None:
+        """Resolve credentials and host from arguments or environment."""
+        self.public_key, self.secret_key, self.host = self.resolve_config(
+            public_key, secret_key, host
+        )
 
         # Create Basic Auth header
         credentials = f"{self.public_key}:{self.secret_key}"
         encoded = base64.b64encode(credentials.encode()).decode()
         self._auth_header = f"Basic {encoded}"
 
-        self._client = httpx.Client(
-            timeout=30.0,
-            headers={
-                "Authorization": self._auth_header,
-                "Content-Type": "application/json",
-            },
-        )
+    @property
+    def _headers(self) -> dict[str, str]:
+        return {
+            "Authorization": self._auth_header,
+            "Content-Type": "application/json",
+        }
 
     @property
     def name(self) -> str:
         """Return the provider name."""
         return "langfuse"
 
+    @property
+    def fingerprint(self) -> str:
+        """Hash identifying this account and host, safe to use in cache keys."""
+        return credential_fingerprint(self.host, self.public_key, self.secret_key)
+
+    caps: FieldCaps | None
+
+    def _capped(self, data: dict[str, Any], full: bool = False) -> dict[str, Any]:
+        """Apply :attr:`caps` to the ``input``/``output`` of a raw response."""
+        if full or self.caps is None:
+            return data
+        return self.caps.langfuse(data)
+
     def _handle_error_response(self, response: httpx.Response) -> None:
         """Handle error responses from the API."""
         if response.status_code == 401:
-            raise AuthenticationError("Authentication failed. Check your API keys.")
+            raise AuthenticationError(
+                "Authentication failed. Check your API keys.", **error_details(response)
+            )
 
         if response.status_code == 404:
             try:
                 detail = response.json().get("message", "Resource not found")
             except Exception:
                 detail = "Resource not found"
-            raise NotFoundError(detail)
+            raise NotFoundError(detail, **error_details(response))
 
         if response.status_code == 429:
-            raise RateLimitError("Rate limit exceeded. Please try again later.")
+            raise RateLimitError(
+                "Rate limit exceeded. Please try again later.", **error_details(response)
+            )
 
         if response.status_code >= 400:
             try:
                 detail = response.json().get("message", f"HTTP {response.status_code}")
             except Exception:
                 detail = f"HTTP {response.status_code}"
-            raise ProviderError(detail)
+            raise ProviderError(detail, **error_details(response))
 
     def _parse_timestamp(self, timestamp: str | None) -> str | None:
         """Parse timestamp to ISO 8601 format."""
@@ -129,17 +174,98 @@ class LangfuseClient(BaseProvider):
         # Return as-is if no format matches
         return timestamp
 
+    def _list_params(
+        self,
+        limit: int,
+        page: int,
+        from_timestamp: str | None,
+        to_timestamp: str | None,
+        **filters: Any,
+    ) -> dict[str, Any]:
+        """Build query parameters for a paginated list endpoint.
+
+        Args:
+            limit: Maximum number of results per page.
+            page: Page number (1-indexed).
+            from_timestamp: Filter by start timestamp.
+            to_timestamp: Filter by end timestamp.
+            **filters: Additional API filters keyed by their Langfuse parameter
+                name. Empty values are omitted.
+        """
+        params: dict[str, Any] = {
+            "limit": limit,
+            "page": page,
+        }
+
+        for key, value in filters.items():
+            if value:
+                params[key] = value
+        if from_timestamp:
+            params["fromTimestamp"] = self._parse_timestamp(from_timestamp)
+        if to_timestamp:
+            params["toTimestamp"] = self._parse_timestamp(to_timestamp)
+
+        return params
+
+
+class LangfuseClient(_LangfuseRequests, BaseProvider):
+    """Client for Langfuse API.
+
+    Uses Basic Auth with public_key:secret_key.
+    API Reference: https://api.reference.langfuse.com/
+    """
+
+    def __init__(
+        self,
+        public_key: str | None = None,
+        secret_key: str | None = None,
+        host: str | None = None,
+        retry_policy: RetryPolicy | None = None,
+        rate_limiter: AdaptiveRateLimiter | None = None,
+        caps: FieldCaps | None = None,
+    ) -> None:
+        """Initialize the client.
+
+        Args:
+            public_key: Langfuse public API key. If not provided, reads from
+                       LANGFUSE_PUBLIC_KEY env var.
+            secret_key: Langfuse secret API key. If not provided, reads from
+                       LANGFUSE_SECRET_KEY env var.
+            host: Langfuse host URL. If not provided, reads from LANGFUSE_HOST
+                  env var or defaults to cloud.langfuse.com.
+            retry_policy: Backoff applied to transient failures of idempotent
+                         requests. Defaults to ``RetryPolicy()``.
+            rate_limiter: Adaptive limiter pacing requests. Defaults to no limiting.
+            caps: Size caps applied to trace and observation ``input`` and
+                 ``output`` when decoding. Defaults to keeping them whole.
+        """
+        self._configure(public_key, secret_key, host)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.caps = caps
+        self._client = httpx.Client(timeout=30.0, headers=self._headers)
+
+    def _request(self, method: str, path: str, idempotent: bool, **kwargs: Any) -> dict[str, Any]:
+        """Send a request, retrying transient failures of idempotent calls."""
+
+        def attempt() -> dict[str, Any]:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire_sync()
+            response = self._client.request(method, f"{self.host}{path}", **kwargs)
+            if self.rate_limiter is not None:
+                self.rate_limiter.observe(response)
+            self._handle_error_response(response)
+            return response.json()
+
+        return call_with_retry(attempt, self.retry_policy, self.name, idempotent)
+
     def _get(self, path: str, params: dict[str, Any] | None = None) -> dict[str, Any]:
         """Make a GET request."""
-        response = self._client.get(f"{self.host}{path}", params=params)
-        self._handle_error_response(response)
-        return response.json()
+        return self._request("GET", path, idempotent=True, params=params)
 
     def _post(self, path: str, json: dict[str, Any] | None = None) -> dict[str, Any]:
         """Make a POST request."""
-        response = self._client.post(f"{self.host}{path}", json=json)
-        self._handle_error_response(response)
-        return response.json()
+        return self._request("POST", path, idempotent=False, json=json)
 
     # ========================================================================
     # Traces API
@@ -171,38 +297,32 @@ class LangfuseClient(BaseProvider):
         Returns:
             LangfuseTracesResponse with traces data and pagination meta.
         """
-        params: dict[str, Any] = {
-            "limit": limit,
-            "page": page,
-        }
-
-        if user_id:
-            params["userId"] = user_id
-        if name:
-            params["name"] = name
-        if session_id:
-            params["sessionId"] = session_id
-        if tags:
-            params["tags"] = tags
-        if from_timestamp:
-            params["fromTimestamp"] = self._parse_timestamp(from_timestamp)
-        if to_timestamp:
-            params["toTimestamp"] = self._parse_timestamp(to_timestamp)
-
+        params = self._list_params(
+            limit,
+            page,
+            from_timestamp,
+            to_timestamp,
+            userId=user_id,
+            name=name,
+            sessionId=session_id,
+            tags=tags,
+        )
         data = self._get("/api/public/traces", params)
-        return LangfuseTracesResponse(**data)
+        return LangfuseTracesResponse(**self._capped(data))
 
-    def get_trace(self, trace_id: str) -> LangfuseTrace:
+    def get_trace(self, trace_id: str, full: bool = False) -> LangfuseTrace:
         """Get a specific trace with its observations.
 
         Args:
             trace_id: The trace ID to fetch.
+            full: Keep oversized ``input``/``output`` whole instead of
+                 applying :attr:`caps`.
 
         Returns:
             LangfuseTrace with full trace data including observations.
         """
         data = self._get(f"/api/public/traces/{trace_id}")
-        return LangfuseTrace(**data)
+        return LangfuseTrace(**self._capped(data, full))
 
     # ========================================================================
     # Sessions API
@@ -226,16 +346,7 @@ class LangfuseClient(BaseProvider):
         Returns:
             LangfuseSessionsResponse with sessions data and pagination meta.
         """
-        params: dict[str, Any] = {
-            "limit": limit,
-            "page": page,
-        }
-
-        if from_timestamp:
-            params["fromTimestamp"] = self._parse_timestamp(from_timestamp)
-        if to_timestamp:
-            params["toTimestamp"] = self._parse_timestamp(to_timestamp)
-
+        params = self._list_params(limit, page, from_timestamp, to_timestamp)
         data = self._get("/api/public/sessions", params)
         return LangfuseSessionsResponse(**data)
 
@@ -249,7 +360,7 @@ class LangfuseClient(BaseProvider):
             LangfuseSession with session data.
         """
         data = self._get(f"/api/public/sessions/{session_id}")
-        return LangfuseSession(**data)
+        return LangfuseSession(**self._capped(data))
 
     # ========================================================================
     # Observations API
@@ -281,38 +392,32 @@ class LangfuseClient(BaseProvider):
         Returns:
             LangfuseObservationsResponse with observations data.
         """
-        params: dict[str, Any] = {
-            "limit": limit,
-            "page": page,
-        }
-
-        if name:
-            params["name"] = name
-        if user_id:
-            params["userId"] = user_id
-        if trace_id:
-            params["traceId"] = trace_id
-        if obs_type:
-            params["type"] = obs_type
-        if from_timestamp:
-            params["fromTimestamp"] = self._parse_timestamp(from_timestamp)
-        if to_timestamp:
-            params["toTimestamp"] = self._parse_timestamp(to_timestamp)
-
+        params = self._list_params(
+            limit,
+            page,
+            from_timestamp,
+            to_timestamp,
+            name=name,
+            userId=user_id,
+            traceId=trace_id,
+            type=obs_type,
+        )
         data = self._get("/api/public/observations", params)
-        return LangfuseObservationsResponse(**data)
+        return LangfuseObservationsResponse(**self._capped(data))
 
-    def get_observation(self, observation_id: str) -> LangfuseObservation:
+    def get_observation(self, observation_id: str, full: bool = False) -> LangfuseObservation:
         """Get a specific observation.
 
         Args:
             observation_id: The observation ID to fetch.
+            full: Keep oversized ``input``/``output`` whole instead of
+                 applying :attr:`caps`.
 
         Returns:
             LangfuseObservation with observation data.
         """
         data = self._get(f"/api/public/observations/{observation_id}")
-        return LangfuseObservation(**data)
+        return LangfuseObservation(**self._capped(data, full))
 
     # ========================================================================
     # Scores API
@@ -342,22 +447,15 @@ class LangfuseClient(BaseProvider):
         Returns:
             LangfuseScoresResponse with scores data.
         """
-        params: dict[str, Any] = {
-            "limit": limit,
-            "page": page,
-        }
-
-        if name:
-            params["name"] = name
-        if user_id:
-            params["userId"] = user_id
-        if trace_id:
-            params["traceId"] = trace_id
-        if from_timestamp:
-            params["fromTimestamp"] = self._parse_timestamp(from_timestamp)
-        if to_timestamp:
-            params["toTimestamp"] = self._parse_timestamp(to_timestamp)
-
+        params = self._list_params(
+            limit,
+            page,
+            from_timestamp,
+            to_timestamp,
+            name=name,
+            userId=user_id,
+            traceId=trace_id,
+        )
         data = self._get("/api/public/scores", params)
         return LangfuseScoresResponse(**data)
 
@@ -382,3 +480,436 @@ class LangfuseClient(BaseProvider):
 
     def __exit__(self, *args) -> None:
         self.close()
+
+
+class AsyncLangfuseClient(_LangfuseRequests, AsyncBaseProvider):
+    """Async client for Langfuse API built on ``httpx.AsyncClient``.
+
+    Mirrors :class:`LangfuseClient` method for method, so tool handlers can
+    await provider calls without blocking the event loop.
+    """
+
+    def __init__(
+        self,
+        public_key: str | None = None,
+        secret_key: str | None = None,
+        host: str | None = None,
+        timeout: float = 30.0,
+        limits: httpx.Limits | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+        retry_policy: RetryPolicy | None = None,
+        rate_limiter: AdaptiveRateLimiter | None = None,
+        single_flight: SingleFlight | None = None,
+        caps: FieldCaps | None = None,
+    ) -> None:
+        """Initialize the client.
+
+        Args:
+            public_key: Langfuse public API key. If not provided, reads from
+                       LANGFUSE_PUBLIC_KEY env var.
+            secret_key: Langfuse secret API key. If not provided, reads from
+                       LANGFUSE_SECRET_KEY env var.
+            host: Langfuse host URL. If not provided, reads from LANGFUSE_HOST
+                  env var or defaults to cloud.langfuse.com.
+            timeout: Request timeout in seconds.
+            limits: Connection pool limits. Defaults to httpx's limits.
+            transport: Optional transport, e.g. ``httpx.MockTransport`` in tests.
+            retry_policy: Backoff applied to transient failures of idempotent
+                         requests. Defaults to ``RetryPolicy()``.
+            rate_limiter: Adaptive limiter pacing requests. Defaults to no limiting.
+            single_flight: Coalesces concurrent identical GET requests. Defaults
+                          to a private instance.
+            caps: Size caps applied to trace and observation ``input`` and
+                 ``output`` when decoding. Defaults to keeping them whole.
+        """
+        self._configure(public_key, secret_key, host)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.caps = caps
+        self.single_flight = single_flight or SingleFlight()
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            headers=self._headers,
+            limits=limits or httpx.Limits(),
+            transport=transport,
+        )
+
+    async def _request(
+        self, method: str, path: str, idempotent: bool, **kwargs: Any
+    ) -> dict[str, Any]:
+        """Send a request, retrying transient failures of idempotent calls."""
+
+        async def attempt() -> dict[str, Any]:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            response = await self._client.request(method, f"{self.host}{path}", **kwargs)
+            if self.rate_limiter is not None:
+                self.rate_limiter.observe(response)
+            self._handle_error_response(response)
+            return response.json()
+
+        return await async_call_with_retry(attempt, self.retry_policy, self.name, idempotent)
+
+    async def _get(self, path: str, params: dict[str, Any] | None = None) -> dict[str, Any]:
+        """Make a GET request, sharing concurrent identical requests."""
+        key = request_key(
+            self.name, f"{self.host}{path}", params, (self.public_key, self.secret_key)
+        )
+        return await self.single_flight.do(
+            key, lambda: self._request("GET", path, idempotent=True, params=params)
+        )
+
+    async def _post(self, path: str, json: dict[str, Any] | None = None) -> dict[str, Any]:
+        """Make a POST request."""
+        return await self._request("POST", path, idempotent=False, json=json)
+
+    # ========================================================================
+    # Traces API
+    # ========================================================================
+
+    async def list_traces(
+        self,
+        limit: int = 50,
+        page: int = 1,
+        user_id: str | None = None,
+        name: str | None = None,
+        session_id: str | None = None,
+        tags: list[str] | None = None,
+        from_timestamp: str | None = None,
+        to_timestamp: str | None = None,
+    ) -> LangfuseTracesResponse:
+        """List traces with pagination and filters.
+
+        See :meth:`LangfuseClient.list_traces` for the arguments.
+        """
+        params = self._list_params(
+            limit,
+            page,
+            from_timestamp,
+            to_timestamp,
+            userId=user_id,
+            name=name,
+            sessionId=session_id,
+            tags=tags,
+        )
+        data = await self._get("/api/public/traces", params)
+        return LangfuseTracesResponse(**self._capped(data))
+
+    async def get_trace(self, trace_id: str, full: bool = False) -> LangfuseTrace:
+        """Get a specific trace with its observations.
+
+        See :meth:`LangfuseClient.get_trace` for the arguments.
+        """
+        data = await self._get(f"/api/public/traces/{trace_id}")
+        return LangfuseTrace(**self._capped(data, full))
+
+    # ========================================================================
+    # Sessions API
+    # ========================================================================
+
+    async def list_sessions(
+        self,
+        limit: int = 50,
+        page: int = 1,
+        from_timestamp: str | None = None,
+        to_timestamp: str | None = None,
+    ) -> LangfuseSessionsResponse:
+        """List sessions with pagination.
+
+        See :meth:`LangfuseClient.list_sessions` for the arguments.
+        """
+        params = self._list_params(limit, page, from_timestamp, to_timestamp)
+        data = await self._get("/api/public/sessions", params)
+        return LangfuseSessionsResponse(**data)
+
+    async def get_session(self, session_id: str) -> LangfuseSession:
+        """Get a specific session."""
+        data = await self._get(f"/api/public/sessions/{session_id}")
+        return LangfuseSession(**self._capped(data))
+
+    # ========================================================================
+    # Observations API
+    # ========================================================================
+
+    async def list_observations(
+        self,
+        limit: int = 50,
+        page: int = 1,
+        name: str | None = None,
+        user_id: str | None = None,
+        trace_id: str | None = None,
+        obs_type: str | None = None,
+        from_timestamp: str | None = None,
+        to_timestamp: str | None = None,
+    ) -> LangfuseObservationsResponse:
+        """List observations with pagination and filters.
+
+        See :meth:`LangfuseClient.list_observations` for the arguments.
+        """
+        params = self._list_params(
+            limit,
+            page,
+            from_timestamp,
+            to_timestamp,
+            name=name,
+            userId=user_id,
+            traceId=trace_id,
+            type=obs_type,
+        )
+        data = await self._get("/api/public/observations", params)
+        return LangfuseObservationsResponse(**self._capped(data))
+
+    async def get_observation(self, observation_id: str, full: bool = False) -> LangfuseObservation:
+        """Get a specific observation.
+
+        See :meth:`LangfuseClient.get_observation` for the arguments.
+        """
+        data = await self._get(f"/api/public/observations/{observation_id}")
+        return LangfuseObservation(**self._capped(data, full))
+
+    # ========================================================================
+    # Scores API
+    # ========================================================================
+
+    async def list_scores(
+        self,
+        limit: int = 50,
+        page: int = 1,
+        name: str | None = None,
+        user_id: str | None = None,
+        trace_id: str | None = None,
+        from_timestamp: str | None = None,
+        to_timestamp: str | None = None,
+    ) -> LangfuseScoresResponse:
+        """List scores with pagination and filters.
+
+        See :meth:`LangfuseClient.list_scores` for the arguments.
+        """
+        params = self._list_params(
+            limit,
+            page,
+            from_timestamp,
+            to_timestamp,
+            name=name,
+            userId=user_id,
+            traceId=trace_id,
+        )
+        data = await self._get("/api/public/scores", params)
+        return LangfuseScoresResponse(**data)
+
+    async def get_score(self, score_id: str) -> LangfuseScore:
+        """Get a specific score."""
+        data = await self._get(f"/api/public/scores/{score_id}")
+        return LangfuseScore(**data)
+
+    # ========================================================================
+    # Auto-paginating iterators
+    # ========================================================================
+
+    async def iter_pages(
+        self,
+        method: str,
+        start_page: int = 1,
+        max_pages: int | None = None,
+        prefetch: int = DEFAULT_PREFETCH,
+        **kwargs: Any,
+    ) -> AsyncIterator[tuple[int, Any]]:
+        """Walk the pages of a list endpoint, prefetching ahead of the consumer.
+
+        See :func:`paginate` for how pages are requested.
+
+        Args:
+            method: One of ``list_traces``, ``list_sessions``,
+                   ``list_observations`` or ``list_scores``.
+            start_page: First page to read (1-indexed).
+            max_pages: Read at most this many pages.
+            prefetch: Pages requested ahead of the one being consumed.
+            **kwargs: Arguments for ``method`` other than ``page``, such as
+                     ``limit`` and filters.
+
+        Yields:
+            ``(page, response)`` pairs in page order.
+        """
+        if method not in _LIST_METHODS:
+            raise ValueError(f"Cannot paginate {method!r}")
+        async with aclosing(
+            paginate(getattr(self, method), start_page, max_pages, prefetch, **kwargs)
+        ) as pages:
+            async for item in pages:
+                yield item
+
+    async def _iter_items(self, method: str, **kwargs: Any) -> AsyncIterator[Any]:
+        # Closing this iterator closes the page iterator, cancelling prefetches.
+        async with aclosing(self.iter_pages(method, **kwargs)) as pages:
+            async for _, response in pages:
+                for item in response.data:
+                    yield item
+
+    def iter_traces(self, **kwargs: Any) -> AsyncIterator[LangfuseTrace]:
+        """Iterate over every trace matching the filters, across pages.
+
+        Takes the arguments of :meth:`list_traces` (without ``page``) and
+        of :meth:`iter_pages`.
+        """
+        return self._iter_items("list_traces", **kwargs)
+
+    def iter_sessions(self, **kwargs: Any) -> AsyncIterator[LangfuseSession]:
+        """Iterate over every session, across pages.
+
+        Takes the arguments of :meth:`list_sessions` (without ``page``) and
+        of :meth:`iter_pages`.
+        """
+        return self._iter_items("list_sessions", **kwargs)
+
+    def iter_observations(self, **kwargs: Any) -> AsyncIterator[LangfuseObservation]:
+        """Iterate over every observation matching the filters, across pages.
+
+        Takes the arguments of :meth:`list_observations` (without ``page``)
+        and of :meth:`iter_pages`.
+        """
+        return self._iter_items("list_observations", **kwargs)
+
+    def iter_scores(self, **kwargs: Any) -> AsyncIterator[LangfuseScore]:
+        """Iterate over every score matching the filters, across pages.
+
+        Takes the arguments of :meth:`list_scores` (without ``page``) and of
+        :meth:`iter_pages`.
+        """
+        return self._iter_items("list_scores", **kwargs)
+
+    async def aclose(self) -> None:
+        """Close the HTTP client."""
+        await self._client.aclose()
+
+    async def __aenter__(self) -> AsyncLangfuseClient:
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
+
+
+# ============================================================================
+# Pagination helpers
+# ============================================================================
+
+
+def has_more_pages(page: int, response: Any, limit: int) -> bool:
+    """Return whether a list endpoint has pages after ``page``.
+
+    Uses ``meta.totalPages`` when the response has it; otherwise a full page
+    means there may be more.
+    """
+    total = response.meta.get("totalPages")
+    if total is not None:
+        return page < int(total) and bool(response.data)
+    return len(response.data) >= limit
+
+
+async def paginate(
+    fetch: Callable[..., Awaitable[Any]],
+    start_page: int = 1,
+    max_pages: int | None = None,
+    prefetch: int = DEFAULT_PREFETCH,
+    **kwargs: Any,
+) -> AsyncIterator[tuple[int, Any]]:
+    """Walk the pages of a Langfuse list call, prefetching ahead of the consumer.
+
+    The first page's ``meta.totalPages`` tells how many pages there are; up
+    to ``prefetch`` of the following ones are then requested concurrently,
+    and pages are yielded in order as they arrive. Without ``totalPages``,
+    pages are read one by one until a short page.
+
+    Leaving the loop early stops requesting pages. Close the iterator (e.g.
+    with :func:`contextlib.aclosing`) to also stop waiting for the ones
+    already in flight.
+
+    Args:
+        fetch: Called with ``page=`` and ``kwargs`` for each page, such as a
+              client's ``list_traces``.
+        start_page: First page to read (1-indexed).
+        max_pages: Read at most this many pages.
+        prefetch: Pages requested ahead of the one being consumed.
+        **kwargs: Other arguments for ``fetch``, such as ``limit`` and filters.
+
+    Yields:
+        ``(page, response)`` pairs in page order.
+    """
+    if prefetch < 1:
+        raise ValueError("prefetch must be at least 1")
+    limit = kwargs.get("limit", 50)
+
+    first = await fetch(page=start_page, **kwargs)
+    yield start_page, first
+    if max_pages is not None and max_pages <= 1:
+        return
+
+    total = first.meta.get("totalPages")
+    if total is None:
+        # Unknown page count: no prefetch, stop at the first short page.
+        response, page = first, start_page
+        while has_more_pages(page, response, limit) and (
+            max_pages is None or page - start_page + 1 < max_pages
+        ):
+            page += 1
+            response = await fetch(page=page, **kwargs)
+            yield page, response
+        return
+
+    last = int(total)
+    if max_pages is not None:
+        last = min(last, start_page + max_pages - 1)
+    pending: deque[tuple[int, asyncio.Future[Any]]] = deque()
+    next_page = start_page + 1
+    try:
+        while pending or next_page <= last:
+            while next_page <= last and len(pending) < prefetch:
+                pending.append((next_page, asyncio.ensure_future(fetch(page=next_page, **kwargs))))
+                next_page += 1
+            page, future = pending.popleft()
+            response = await future
+            yield page, response
+            if not response.data:
+                # The list shrank since the first page was read.
+                return
+    finally:
+        for _, future in pending:
+            future.cancel()
+        await asyncio.gather(*(future for _, future in pending), return_exceptions=True)
+
+
+@dataclass(frozen=True)
+class TraceCursor:
+    """Where a paged trace scan stopped: the next trace to look at.
+
+    Attributes:
+        page: Page holding the next trace (1-indexed).
+        offset: Position of the next trace in that page.
+        limit: Page size the scan used; offsets only hold for that size.
+    """
+
+    page: int
+    offset: int
+    limit: int
+
+    def encode(self) -> str:
+        """Return the cursor as an opaque string for tool results."""
+        fields = {"page": self.page, "offset": self.offset, "limit": self.limit}
+        return base64.urlsafe_b64encode(json.dumps(fields).encode()).decode()
+
+    @classmethod
+    def decode(cls, cursor: str) -> TraceCursor:
+        """Parse a string made by :meth:`encode`.
+
+        Raises:
+            ValueError: If ``cursor`` is not a valid trace cursor.
+        """
+        try:
+            fields = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            page, offset, limit = fields["page"], fields["offset"], fields["limit"]
+        except (binascii.Error, ValueError, TypeError, KeyError) as e:
+            raise ValueError(f"Invalid cursor: {cursor!r}") from e
+        if not all(isinstance(v, int) for v in (page, offset, limit)):
+            raise ValueError(f"Invalid cursor: {cursor!r}")
+        if page < 1 or offset < 0 or limit < 1:
+            raise ValueError(f"Invalid cursor: {cursor!r}")
+        return cls(page, offset, limit)
@@ -0,0 +1,138 @@
+"""Local mirror of the AIOBS session list, kept up to date incrementally.
+
+``POST /v1/sessions`` returns every session and event ever recorded, so the
+payload grows without bound. :class:`SessionMirror` keeps the last snapshot
+and a time watermark; later syncs send ``since`` and only merge what changed.
+A backend that ignores ``since`` simply returns the full list, which merges
+to the same result.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from collections.abc import Callable, Iterable
+from typing import Any, TypeVar
+
+from shepherd_mcp.models.aiobs import SessionsResponse
+
+T = TypeVar("T")
+
+
+def _merge(old: list[T], new: list[T], key: Callable[[T], Any]) -> list[T]:
+    """Merge ``new`` into ``old`` by key, keeping order and replacing updated items."""
+    if not new:
+        return old
+    positions = {key(item): i for i, item in enumerate(old)}
+    merged = list(old)
+    for item in new:
+        i = positions.get(key(item))
+        if i is None:
+            positions[key(item)] = len(merged)
+            merged.append(item)
+        else:
+            merged[i] = item
+    return merged
+
+
+def _latest_start(response: SessionsResponse) -> float:
+    groups: Iterable[Iterable[Any]] = (
+        response.sessions,
+        response.events,
+        response.function_events,
+    )
+    return max((item.started_at for group in groups for item in group), default=0.0)
+
+
+class SessionMirror:
+    """Incrementally synced copy of the AIOBS session list.
+
+    Every sync after the first asks only for data newer than the watermark
+    minus ``lookback``. The overlap re-fetches recent records so that events
+    still being written when the last snapshot was taken are not missed;
+    duplicates are merged away by ID. A full fetch every
+    ``full_sync_interval`` seconds drops sessions deleted on the server;
+    until then, a deleted session is still listed.
+
+    Each sync returns a new :class:`SessionsResponse`; snapshots handed out
+    earlier are never modified.
+    """
+
+    def __init__(
+        self,
+        lookback: float = 300.0,
+        full_sync_interval: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize an empty mirror.
+
+        Args:
+            lookback: Seconds subtracted from the watermark on each delta sync.
+            full_sync_interval: Seconds after which the next sync is a full fetch.
+            clock: Monotonic clock, injectable for tests.
+        """
+        self.lookback = lookback
+        self.full_sync_interval = full_sync_interval
+        self._clock = clock
+        self.current: SessionsResponse | None = None
+        self.watermark: float | None = None
+        self._last_full_sync = float("-inf")
+        self.full_syncs = 0
+        self.delta_syncs = 0
+
+    @classmethod
+    def from_env(cls) -> SessionMirror | None:
+        """Build a mirror if SHEPHERD_AIOBS_INCREMENTAL is ``1``, else return None."""
+        if os.environ.get("SHEPHERD_AIOBS_INCREMENTAL", "0") != "1":
+            return None
+        return cls()
+
+    def since(self) -> float | None:
+        """Return the ``since`` timestamp for the next sync, or None for a full fetch."""
+        if self.current is None or self.watermark is None:
+            return None
+        if self._clock() - self._last_full_sync >= self.full_sync_interval:
+            return None
+        return self.watermark - self.lookback
+
+    def apply(self, delta: SessionsResponse, full: bool) -> SessionsResponse:
+        """Merge a sync result into the mirror and return the new snapshot.
+
+        Args:
+            delta: Response to the sync request.
+            full: True if ``delta`` is a complete listing that replaces the mirror.
+        """
+        if full or self.current is None:
+            snapshot = delta
+            self._last_full_sync = self._clock()
+            self.full_syncs += 1
+        else:
+            old = self.current
+            snapshot = SessionsResponse.model_construct(
+                sessions=_merge(old.sessions, delta.sessions, lambda s: s.id),
+                events=_merge(old.events, delta.events, lambda e: (e.session_id, e.span_id)),
+                function_events=_merge(
+                    old.function_events, delta.function_events, lambda e: (e.session_id, e.span_id)
+                ),
+                trace_tree=_merge(old.trace_tree, delta.trace_tree, lambda n: n.span_id),
+                enh_prompt_traces=delta.enh_prompt_traces or old.enh_prompt_traces,
+                generated_at=delta.generated_at or old.generated_at,
+                version=delta.version,
+            )
+            self.delta_syncs += 1
+
+        watermark = delta.generated_at or _latest_start(delta)
+        if not full:
+            watermark = max(self.watermark or 0.0, watermark)
+        self.watermark = watermark or None
+        self.current = snapshot
+        return snapshot
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return mirror counters as a JSON-serializable dictionary."""
+        return {
+            "sessions": len(self.current.sessions) if self.current else 0,
+            "watermark": self.watermark,
+            "full_syncs": self.full_syncs,
+            "delta_syncs": self.delta_syncs,
+        }
@@ -0,0 +1,138 @@
+"""Cost-based ordering of session filter predicates.
+
+:func:`~shepherd_mcp.providers.aiobs.filter_sessions` describes each active
+filter as a :class:`Predicate` with an estimated selectivity and two ways to
+run it: check sessions one at a time (``row_cost`` per session) or, where a
+posting list exists, look up the whole matching set at once
+(``lookup_cost``). :func:`run_plan` greedily picks the next predicate with
+the lowest cost per session it is expected to remove, runs it with the
+cheaper method for the current number of candidates, and stops as soon as
+no candidates are left.
+
+Costs are in abstract units of "one cheap Python operation"; only their
+ratios matter.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from collections.abc import Set as AbstractSet
+from dataclasses import dataclass, field
+from typing import Any
+
+from shepherd_mcp.models.aiobs import Session
+
+# Keeps a predicate that removes nothing orderable instead of dividing by 0.
+_MIN_REJECTION = 1e-3
+
+
+@dataclass
+class Predicate:
+    """One filter as seen by the planner.
+
+    Attributes:
+        name: Filter name reported in the plan, e.g. ``"provider"``.
+        selectivity: Estimated fraction of sessions that pass (0..1).
+        row_cost: Estimated cost of :attr:`check` for one session.
+        check: Returns True if a session passes.
+        lookup_cost: Estimated cost of :attr:`lookup`, if one exists.
+        lookup: Returns the IDs of all passing sessions at once.
+    """
+
+    name: str
+    selectivity: float
+    row_cost: float
+    check: Callable[[Session], bool]
+    lookup_cost: float | None = None
+    lookup: Callable[[], AbstractSet[str]] | None = None
+
+    def step_cost(self, rows: int) -> tuple[float, str]:
+        """Return the cheaper of scanning ``rows`` sessions and a lookup."""
+        scan = rows * self.row_cost
+        if self.lookup is not None and self.lookup_cost is not None:
+            # A lookup still needs one membership test per candidate.
+            lookup = self.lookup_cost + rows
+            if lookup < scan:
+                return lookup, "lookup"
+        return scan, "scan"
+
+
+@dataclass
+class PlanStep:
+    """A predicate as it was executed."""
+
+    name: str
+    method: str
+    estimated_cost: float
+    estimated_selectivity: float
+    rows_in: int
+    rows_out: int
+
+
+@dataclass
+class FilterPlan:
+    """The order and method chosen for each predicate, with actual row counts."""
+
+    steps: list[PlanStep] = field(default_factory=list)
+    skipped: list[str] = field(default_factory=list)
+
+    @property
+    def estimated_cost(self) -> float:
+        return sum(step.estimated_cost for step in self.steps)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the plan as a JSON-serializable dictionary."""
+        return {
+            "steps": [
+                {
+                    "filter": step.name,
+                    "method": step.method,
+                    "estimated_cost": round(step.estimated_cost, 1),
+                    "estimated_selectivity": round(step.estimated_selectivity, 4),
+                    "rows_in": step.rows_in,
+                    "rows_out": step.rows_out,
+                }
+                for step in self.steps
+            ],
+            "skipped": self.skipped,
+            "estimated_cost": round(self.estimated_cost, 1),
+        }
+
+
+def run_plan(
+    sessions: list[Session], predicates: list[Predicate]
+) -> tuple[list[Session], FilterPlan]:
+    """Apply ``predicates`` to ``sessions`` in cost order.
+
+    Args:
+        sessions: Sessions to filter. Their order is preserved.
+        predicates: Active filters; all of them must pass.
+
+    Returns:
+        The passing sessions and the executed plan.
+    """
+    plan = FilterPlan()
+    candidates = sessions
+    remaining = list(predicates)
+    while remaining:
+        if not candidates:
+            plan.skipped = [p.name for p in remaining]
+            break
+        rows = len(candidates)
+
+        def rank(predicate: Predicate, rows: int = rows) -> float:
+            cost, _ = predicate.step_cost(rows)
+            return cost / max(1.0 - predicate.selectivity, _MIN_REJECTION)
+
+        predicate = min(remaining, key=rank)
+        remaining.remove(predicate)
+        cost, method = predicate.step_cost(rows)
+        if method == "lookup" and predicate.lookup is not None:
+            matching = predicate.lookup()
+            candidates = [s for s in candidates if s.id in matching]
+        else:
+            candidates = [s for s in candidates if predicate.check(s)]
+        plan.steps.append(
+            PlanStep(predicate.name, method, cost, predicate.selectivity, rows, len(candidates))
+        )
+    return candidates, plan
@@ -0,0 +1,149 @@
+"""Client-side adaptive rate limiting for provider calls.
+
+A token bucket paces outgoing requests. Its refill rate adapts with
+additive increase / multiplicative decrease (AIMD): every successful call
+nudges the rate up, every 429 cuts it down. One limiter per provider is
+shared by all tool handlers in the process (see
+:class:`~shepherd_mcp.providers.registry.ProviderRegistry`), so total
+throughput settles just under the provider's limit.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+import httpx
+
+from shepherd_mcp.providers.base import parse_retry_after
+
+
+class AdaptiveRateLimiter:
+    """AIMD token bucket.
+
+    Tokens are reserved up front, so waiting callers are served in arrival
+    order. A 429 halves the rate (by default) and, if the response carries
+    ``Retry-After``, holds every caller until that time has passed.
+    """
+
+    def __init__(
+        self,
+        rate: float = 10.0,
+        min_rate: float = 0.5,
+        max_rate: float = 50.0,
+        increase: float = 0.1,
+        decrease: float = 0.5,
+        burst: float | None = None,
+        cooldown: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the limiter.
+
+        Args:
+            rate: Initial refill rate in requests per second.
+            min_rate: Lower bound for the rate after repeated throttling.
+            max_rate: Upper bound the rate creeps back up to.
+            increase: Requests/second added after each successful call.
+            decrease: Factor the rate is multiplied by on a 429.
+            burst: Bucket capacity. Defaults to one second's worth at ``rate``.
+            cooldown: Seconds after a decrease during which further 429s
+                (from requests already in flight) do not cut the rate again.
+            clock: Monotonic clock, injectable for tests.
+        """
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.burst = burst
+        self.cooldown = cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = self._capacity
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self._last_decrease = float("-inf")
+        self.throttled = 0
+
+    @classmethod
+    def from_env(cls) -> AdaptiveRateLimiter | None:
+        """Build a limiter from SHEPHERD_RATE_LIMIT and SHEPHERD_RATE_LIMIT_MAX.
+
+        Returns None when SHEPHERD_RATE_LIMIT is ``0``, disabling limiting.
+        """
+        defaults = cls()
+        rate = float(os.environ.get("SHEPHERD_RATE_LIMIT", defaults.rate))
+        if rate <= 0:
+            return None
+        max_rate = float(os.environ.get("SHEPHERD_RATE_LIMIT_MAX", max(rate, defaults.max_rate)))
+        return cls(rate=rate, max_rate=max_rate)
+
+    @property
+    def _capacity(self) -> float:
+        return max(1.0, self.burst if self.burst is not None else self.rate)
+
+    def _reserve(self) -> float:
+        """Take a token and return how long the caller must wait for it."""
+        with self._lock:
+            now = self._clock()
+            elapsed = now - self._updated
+            self._tokens = min(self._capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._blocked_until - now)
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent."""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self) -> None:
+        """Blocking variant of :meth:`acquire` for the sync clients."""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def on_success(self) -> None:
+        """Additive increase after a successful call."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after: float | None = None) -> None:
+        """Multiplicative decrease after a 429.
+
+        Args:
+            retry_after: Seconds the provider asked us to wait, if given.
+        """
+        with self._lock:
+            now = self._clock()
+            self.throttled += 1
+            if retry_after is not None:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = min(self._tokens, 0.0)
+
+    def observe(self, response: httpx.Response) -> None:
+        """Adapt the rate to a provider response."""
+        if response.status_code == 429:
+            self.on_throttle(parse_retry_after(response.headers.get("Retry-After")))
+        elif response.status_code < 500:
+            self.on_success()
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return the limiter state as a JSON-serializable dictionary."""
+        with self._lock:
+            return {
+                "rate": round(self.rate, 3),
+                "min_rate": self.min_rate,
+                "max_rate": self.max_rate,
+                "throttled": self.throttled,
+            }
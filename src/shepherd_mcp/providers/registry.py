@@ -0,0 +1,213 @@
+"""Process-lifetime registry of pooled provider clients.
+
+The MCP server creates one :class:`ProviderRegistry` at startup and asks it
+for clients on every tool call. Each provider/credential combination gets a
+single keep-alive ``httpx.AsyncClient``, so repeated tool calls reuse open
+TCP/TLS connections instead of paying for a new handshake every time.
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+
+from shepherd_mcp.cache import ResponseCache
+from shepherd_mcp.models.caps import FieldCaps
+from shepherd_mcp.models.decode import FastDecoder
+from shepherd_mcp.providers.aiobs import AsyncAIOBSClient
+from shepherd_mcp.providers.base import RetryPolicy
+from shepherd_mcp.providers.langfuse import AsyncLangfuseClient
+from shepherd_mcp.providers.mirror import SessionMirror
+from shepherd_mcp.providers.ratelimit import AdaptiveRateLimiter
+from shepherd_mcp.providers.singleflight import SingleFlight
+from shepherd_mcp.store import RecordStore
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    """Connection pool settings applied to every registry client.
+
+    Attributes:
+        max_connections: Maximum number of concurrent connections per client.
+        max_keepalive_connections: Maximum number of idle connections kept open.
+        keepalive_expiry: Seconds an idle connection is kept before closing.
+        timeout: Request timeout in seconds.
+    """
+
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 60.0
+    timeout: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> PoolConfig:
+        """Build a config from ``SHEPHERD_*`` environment variables.
+
+        Reads SHEPHERD_MAX_CONNECTIONS, SHEPHERD_MAX_KEEPALIVE_CONNECTIONS,
+        SHEPHERD_KEEPALIVE_EXPIRY and SHEPHERD_HTTP_TIMEOUT, falling back to
+        the defaults for any that are unset.
+        """
+        defaults = cls()
+        return cls(
+            max_connections=int(
+                os.environ.get("SHEPHERD_MAX_CONNECTIONS", defaults.max_connections)
+            ),
+            max_keepalive_connections=int(
+                os.environ.get(
+                    "SHEPHERD_MAX_KEEPALIVE_CONNECTIONS", defaults.max_keepalive_connections
+                )
+            ),
+            keepalive_expiry=float(
+                os.environ.get("SHEPHERD_KEEPALIVE_EXPIRY", defaults.keepalive_expiry)
+            ),
+            timeout=float(os.environ.get("SHEPHERD_HTTP_TIMEOUT", defaults.timeout)),
+        )
+
+    @property
+    def limits(self) -> httpx.Limits:
+        """Return the pool settings as ``httpx.Limits``."""
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+
+class ProviderRegistry:
+    """Owns one pooled async client per provider and credential set.
+
+    Each client gets its own adaptive rate limiter, so every tool handler
+    calling the same provider account is paced by the same bucket, and
+    one shared :class:`SingleFlight` coalesces identical concurrent requests
+    across all clients. The registry also owns the :class:`ResponseCache`
+    and the optional :class:`RecordStore` the tool handlers read through.
+    Clients are created lazily on first use and live until :meth:`aclose` is
+    called. Use the registry as an async context manager to tie its lifetime
+    to the server's.
+    """
+
+    def __init__(
+        self,
+        pool: PoolConfig | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+        retry_policy: RetryPolicy | None = None,
+        rate_limiter_factory: Callable[[], AdaptiveRateLimiter | None] | None = None,
+        cache: ResponseCache | None = None,
+        store: RecordStore | None = None,
+    ) -> None:
+        """Initialize the registry.
+
+        Args:
+            pool: Connection pool settings. Defaults to :meth:`PoolConfig.from_env`.
+            transport: Optional transport shared by all clients (used in tests).
+            retry_policy: Retry policy for all clients. Defaults to
+                         :meth:`RetryPolicy.from_env`.
+            rate_limiter_factory: Creates the limiter shared by all calls to one
+                                 provider and credential set. Defaults to
+                                 :meth:`AdaptiveRateLimiter.from_env`; return
+                                 None to disable limiting.
+            cache: Response cache used by the tool handlers. Defaults to
+                  :meth:`ResponseCache.from_env`.
+            store: On-disk store of immutable records. Defaults to
+                  :meth:`RecordStore.from_env`, which is None unless
+                  SHEPHERD_CACHE_DIR is set.
+        """
+        self.pool = pool or PoolConfig.from_env()
+        self.retry_policy = retry_policy or RetryPolicy.from_env()
+        self._rate_limiter_factory = rate_limiter_factory or AdaptiveRateLimiter.from_env
+        self.single_flight = SingleFlight()
+        self.cache = cache if cache is not None else ResponseCache.from_env()
+        self.store = store if store is not None else RecordStore.from_env()
+        self._transport = transport
+        self._clients: dict[tuple[str, ...], Any] = {}
+        self._closed = False
+
+    def _client_kwargs(self) -> dict[str, Any]:
+        if self._closed:
+            raise RuntimeError("ProviderRegistry is closed")
+        return {
+            "timeout": self.pool.timeout,
+            "limits": self.pool.limits,
+            "transport": self._transport,
+            "retry_policy": self.retry_policy,
+            "rate_limiter": self._rate_limiter_factory(),
+            "single_flight": self.single_flight,
+            "caps": FieldCaps.from_env(),
+        }
+
+    def aiobs(self, api_key: str | None = None, endpoint: str | None = None) -> AsyncAIOBSClient:
+        """Return the shared AIOBS client for these credentials.
+
+        Args:
+            api_key: AIOBS API key. Defaults to AIOBS_API_KEY.
+            endpoint: AIOBS endpoint. Defaults to AIOBS_ENDPOINT or the default.
+        """
+        api_key, endpoint = AsyncAIOBSClient.resolve_config(api_key, endpoint)
+        key = ("aiobs", api_key, endpoint)
+        client = self._clients.get(key)
+        if client is None:
+            client = AsyncAIOBSClient(
+                api_key,
+                endpoint,
+                mirror=SessionMirror.from_env(),
+                decoder=FastDecoder.from_env(),
+                streaming=os.environ.get("SHEPHERD_AIOBS_STREAMING", "1") != "0",
+                **self._client_kwargs(),
+            )
+            self._clients[key] = client
+        return client
+
+    def langfuse(
+        self,
+        public_key: str | None = None,
+        secret_key: str | None = None,
+        host: str | None = None,
+    ) -> AsyncLangfuseClient:
+        """Return the shared Langfuse client for these credentials.
+
+        Args:
+            public_key: Langfuse public key. Defaults to LANGFUSE_PUBLIC_KEY.
+            secret_key: Langfuse secret key. Defaults to LANGFUSE_SECRET_KEY.
+            host: Langfuse host. Defaults to LANGFUSE_HOST or cloud.langfuse.com.
+        """
+        public_key, secret_key, host = AsyncLangfuseClient.resolve_config(
+            public_key, secret_key, host
+        )
+        key = ("langfuse", public_key, secret_key, host)
+        client = self._clients.get(key)
+        if client is None:
+            client = AsyncLangfuseClient(public_key, secret_key, host, **self._client_kwargs())
+            self._clients[key] = client
+        return client
+
+    def rate_limits(self) -> dict[str, Any]:
+        """Return the state of every client's rate limiter, keyed by provider."""
+        states: dict[str, Any] = {}
+        for client in self._clients.values():
+            if client.rate_limiter is not None:
+                states.setdefault(client.name, []).append(client.rate_limiter.snapshot())
+        return states
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    async def aclose(self) -> None:
+        """Close every client and release pooled connections."""
+        self._closed = True
+        clients = list(self._clients.values())
+        self._clients.clear()
+        await self.cache.aclose()
+        for client in clients:
+            await client.aclose()
+        if self.store is not None:
+            self.store.close()
+
+    async def __aenter__(self) -> ProviderRegistry:
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.aclose()
@@ -0,0 +1,87 @@
+"""Request coalescing for concurrent identical provider calls.
+
+When several tool calls ask for the same thing at the same time (e.g. an
+agent firing ``aiobs_list_sessions`` and ``aiobs_search_sessions`` in
+parallel), only the first one hits the network. The others wait for that
+call and receive the same parsed result.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+def credential_fingerprint(*parts: str) -> str:
+    """Hash credentials (and endpoint) into a key that never holds secrets."""
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+def request_key(
+    provider: str,
+    endpoint: str,
+    params: dict[str, Any] | None,
+    credentials: tuple[str, ...],
+) -> tuple[str, str, str, str]:
+    """Build a coalescing key for a provider request.
+
+    Args:
+        provider: Provider name.
+        endpoint: Request path or URL.
+        params: Query parameters or request body; order does not matter.
+        credentials: Credentials the request is made with. They are hashed so
+            that keys never hold secrets in clear text.
+    """
+    frozen_params = json.dumps(params or {}, sort_keys=True, default=str)
+    return (provider, endpoint, frozen_params, credential_fingerprint(*credentials))
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers with the same key.
+
+    The call runs in its own task, so cancelling the caller that started it
+    does not cancel it for the others. Results are not cached: once the call
+    finishes, the next caller with the same key starts a new one.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[Hashable, asyncio.Task[Any]] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run ``fn`` unless a call with ``key`` is already in flight.
+
+        Args:
+            key: Identity of the request, e.g. from :func:`request_key`.
+            fn: Zero-argument coroutine function performing the request.
+
+        Returns:
+            The result of the (possibly shared) call.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+
+            def forget(done: asyncio.Task[Any]) -> None:
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+
+            task.add_done_callback(forget)
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def snapshot(self) -> dict[str, int]:
+        """Return call counters as a dictionary."""
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self)}
@@ -7,26 +7,36 @@ Supports multiple observability providers:
 
 from __future__ import annotations
 
+import asyncio
 import json
+import time
+from contextlib import aclosing
 from datetime import datetime
+from functools import partial
 from typing import Any
 
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import TextContent, Tool
 
+from shepherd_mcp.cache import CacheEntry
 from shepherd_mcp.models.aiobs import (
     Event,
     FunctionEvent,
     SessionsResponse,
     TraceNode,
 )
+from shepherd_mcp.models.columns import EventColumns
+from shepherd_mcp.models.compact import SessionRecords, TraceNodeRecord
+from shepherd_mcp.models.dedup import content_hash
+from shepherd_mcp.models.index import SessionIndex
 from shepherd_mcp.models.langfuse import (
     LangfuseObservation,
     LangfuseTrace,
 )
+from shepherd_mcp.models.trace import FlatTrace
 from shepherd_mcp.providers.aiobs import (
-    AIOBSClient,
+    SessionPage,
     filter_sessions,
     parse_date,
 )
@@ -35,12 +45,108 @@ from shepherd_mcp.providers.base import (
     NotFoundError,
     ProviderError,
     RateLimitError,
+    retry_stats,
 )
-from shepherd_mcp.providers.langfuse import LangfuseClient
+from shepherd_mcp.providers.langfuse import TraceCursor, has_more_pages, paginate
+from shepherd_mcp.providers.registry import ProviderRegistry
+from shepherd_mcp.store import STORED_ENDPOINTS
 
 # Create the MCP server
 server = Server("shepherd-mcp")
 
+# Provider clients shared by all tool calls; created by main() at startup
+_registry: ProviderRegistry | None = None
+
+
+def get_registry() -> ProviderRegistry:
+    """Return the process-wide provider registry.
+
+    The registry is normally created by :func:`main`; it is created lazily
+    here when handlers are invoked outside of the server (e.g. in tests).
+    """
+    global _registry
+    if _registry is None:
+        _registry = ProviderRegistry()
+    return _registry
+
+
+async def cached_entry(
+    client: Any, method: str, *args: Any, refresh: bool = False, **kwargs: Any
+) -> CacheEntry:
+    """Call ``client.<method>(*args, **kwargs)`` through the response cache.
+
+    Responses are cached per provider method (which selects the TTL), account
+    and arguments. Cached values are shared between calls and must not be
+    mutated. Single-record lookups of immutable data (ended sessions,
+    finished traces, ...) are also served from the on-disk store when one is
+    configured.
+
+    Args:
+        client: Provider client from the registry.
+        method: Name of the client method to call.
+        refresh: Bypass cached data and fetch from the provider.
+
+    Returns:
+        The cache entry holding the response, so callers can report its age.
+    """
+    registry = get_registry()
+    endpoint = f"{client.name}.{method}"
+    key = (client.fingerprint, json.dumps([args, kwargs], sort_keys=True, default=str))
+
+    def call() -> Any:
+        return getattr(client, method)(*args, **kwargs)
+
+    async def load() -> Any:
+        if (
+            registry.store is not None
+            and endpoint in STORED_ENDPOINTS
+            and len(args) == 1
+            and not kwargs
+        ):
+            caps = getattr(client, "caps", None)
+            variant = caps.fingerprint if caps is not None else ""
+            return await registry.store.get_or_load(
+                endpoint, client.fingerprint, args[0], call, variant=variant
+            )
+        return await call()
+
+    return await registry.cache.get_or_load_entry(endpoint, key, load, refresh=refresh)
+
+
+async def cached_call(client: Any, method: str, *args: Any, **kwargs: Any) -> Any:
+    """Like :func:`cached_entry`, but return the response itself."""
+    entry = await cached_entry(client, method, *args, **kwargs)
+    return entry.value
+
+
+def full_content(arguments: dict[str, Any]) -> dict[str, Any]:
+    """Return the client keyword asking for uncapped fields, if the tool call did.
+
+    Capped calls pass no keyword, so they keep their cache keys and are
+    the only ones served from the on-disk store.
+    """
+    return {"full": True} if arguments.get("full_content") else {}
+
+
+def session_page(**fields: Any) -> dict[str, Any]:
+    """Return the ``list_sessions`` page arguments that are set.
+
+    Unset ones are left out so an unpaged listing keeps its cache key.
+    """
+    return {key: value for key, value in fields.items() if value}
+
+
+def freshness(entry: CacheEntry) -> dict[str, Any]:
+    """Describe how old a cached AIOBS response is, with the process's provider retries."""
+    cache = get_registry().cache
+    generated_at = entry.value.generated_at
+    return {
+        "generated_at": format_timestamp(generated_at) if generated_at else None,
+        "cache_age_seconds": round(cache.age(entry), 1),
+        "stale": cache.is_stale(entry),
+        "retries": retry_stats.snapshot(),
+    }
+
 
 # ============================================================================
 # Helper functions - AIOBS
@@ -63,12 +169,24 @@ def format_duration(ms: float) -> str:
 
 
 def session_to_dict(
-    session: Any, events: list[Event], function_events: list[FunctionEvent]
+    session: Any,
+    events: list[Event],
+    function_events: list[FunctionEvent],
+    index: SessionIndex | None = None,
 ) -> dict:
-    """Convert a session to a dictionary with computed fields."""
+    """Convert a session to a dictionary with computed fields.
+
+    Pass the payload's ``SessionsResponse.index`` to take the event counts
+    from it instead of scanning ``events`` and ``function_events``.
+    """
     # Count events for this session
-    event_count = sum(1 for e in events if e.session_id == session.id)
-    fn_event_count = sum(1 for e in function_events if e.session_id == session.id)
+    if index is not None:
+        entry = index.entry(session.id)
+        event_count = entry.event_count
+        fn_event_count = entry.function_event_count
+    else:
+        event_count = sum(1 for e in events if e.session_id == session.id)
+        fn_event_count = sum(1 for e in function_events if e.session_id == session.id)
 
     # Calculate duration
     duration_ms = None
@@ -90,8 +208,14 @@ def session_to_dict(
     }
 
 
-def calc_total_tokens(events: list[Event]) -> dict[str, int]:
-    """Calculate total tokens from events."""
+def calc_total_tokens(events: list[Event], columns: EventColumns | None = None) -> dict[str, int]:
+    """Calculate total tokens from events.
+
+    Pass the payload's ``SessionsResponse.columns`` to sum the token columns
+    instead of walking each event's usage.
+    """
+    if columns is not None:
+        return columns.token_totals()
     total = {"input": 0, "output": 0, "total": 0}
     for event in events:
         if event.response and "usage" in event.response:
@@ -102,30 +226,44 @@ def calc_total_tokens(events: list[Event]) -> dict[str, int]:
     return total
 
 
-def calc_avg_latency(events: list[Event]) -> float:
+def calc_avg_latency(events: list[Event], columns: EventColumns | None = None) -> float:
     """Calculate average latency from events."""
+    if columns is not None:
+        return columns.avg_latency()
     if not events:
         return 0.0
     return sum(e.duration_ms for e in events) / len(events)
 
 
-def count_errors(events: list[Event], function_events: list[FunctionEvent]) -> int:
+def count_errors(
+    events: list[Event],
+    function_events: list[FunctionEvent],
+    columns: EventColumns | None = None,
+) -> int:
     """Count errors in events."""
-    count = sum(1 for e in events if e.error)
+    count = columns.error_count() if columns is not None else sum(1 for e in events if e.error)
     count += sum(1 for e in function_events if e.error)
     return count
 
 
-def get_provider_distribution(events: list[Event]) -> dict[str, int]:
+def get_provider_distribution(
+    events: list[Event], columns: EventColumns | None = None
+) -> dict[str, int]:
     """Get provider distribution from events."""
+    if columns is not None:
+        return columns.provider_distribution()
     dist: dict[str, int] = {}
     for event in events:
         dist[event.provider] = dist.get(event.provider, 0) + 1
     return dist
 
 
-def get_model_distribution(events: list[Event]) -> dict[str, int]:
+def get_model_distribution(
+    events: list[Event], columns: EventColumns | None = None
+) -> dict[str, int]:
     """Get model distribution from events."""
+    if columns is not None:
+        return columns.model_distribution()
     dist: dict[str, int] = {}
     for event in events:
         if event.request:
@@ -134,8 +272,8 @@ def get_model_distribution(events: list[Event]) -> dict[str, int]:
     return dist
 
 
-def trace_node_to_dict(node: TraceNode) -> dict:
-    """Convert a trace node to a simplified dictionary."""
+def trace_node_fields(node: TraceNode | TraceNodeRecord) -> dict:
+    """Convert a trace node, without its children, to a simplified dictionary."""
     result = {
         "type": node.event_type or ("function" if node.name else "provider"),
         "provider": node.provider,
@@ -166,16 +304,26 @@ def trace_node_to_dict(node: TraceNode) -> dict:
             for e in node.evaluations
         ]
 
-    if node.children:
-        result["children"] = [trace_node_to_dict(child) for child in node.children]
-
     return result
 
 
+def trace_node_to_dict(node: TraceNode | TraceNodeRecord) -> dict:
+    """Convert a trace node and its subtree to simplified dictionaries."""
+    return FlatTrace([node]).to_dicts(trace_node_fields)[0]
+
+
 # ============================================================================
 # Helper functions - Langfuse
 # ============================================================================
 
+# Page size langfuse_search_traces scans in when client-side filters are set
+SEARCH_PAGE_SIZE = 100
+
+# Default scan budget of langfuse_search_traces
+SEARCH_MAX_PAGES = 20
+SEARCH_MAX_SCANNED = 2000
+SEARCH_MAX_SECONDS = 10.0
+
 
 def format_langfuse_duration(latency: float | None) -> str | None:
     """Format latency in seconds to human-readable string."""
@@ -286,17 +434,11 @@ def count_evaluations(events: list[Event], function_events: list[FunctionEvent])
     return result
 
 
-def get_trace_depth(nodes: list[TraceNode]) -> int:
-    """Get maximum trace depth."""
-    if not nodes:
-        return 0
-
-    def _depth(node: TraceNode) -> int:
-        if not node.children:
-            return 1
-        return 1 + max(_depth(c) for c in node.children)
-
-    return max(_depth(n) for n in nodes)
+def get_trace_depth(
+    nodes: list[TraceNode] | list[TraceNodeRecord], flat: FlatTrace | None = None
+) -> int:
+    """Get maximum trace depth, from ``flat`` when the tree is already flattened."""
+    return (flat or FlatTrace(nodes)).max_depth()
 
 
 def get_errors_list(events: list[Event], function_events: list[FunctionEvent]) -> list[str]:
@@ -320,6 +462,19 @@ def get_function_counts(function_events: list[FunctionEvent]) -> dict[str, int]:
     return counts
 
 
+def system_prompt_text(content: Any) -> str:
+    """Return a system prompt as text.
+
+    Content blocks (e.g., Anthropic format) are joined by their text; other
+    non-string values are serialized as sorted JSON so they hash stably.
+    """
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(block.get("text", "") for block in content if isinstance(block, dict))
+    return json.dumps(content, sort_keys=True, default=str)
+
+
 def extract_system_prompts(events: list[Event]) -> list[dict]:
     """Extract system prompts from events."""
     prompts = []
@@ -332,18 +487,13 @@ def extract_system_prompts(events: list[Event]) -> list[dict]:
         # Check for system message in messages array
         for msg in messages:
             if isinstance(msg, dict) and msg.get("role") == "system":
-                content = msg.get("content", "")
-                if isinstance(content, list):
-                    # Handle content blocks (e.g., Anthropic format)
-                    content = " ".join(
-                        block.get("text", "") for block in content if isinstance(block, dict)
-                    )
-                system_content = content
+                system_content = system_prompt_text(msg.get("content", ""))
                 break
 
         # Check for top-level system parameter (Anthropic style)
         if not system_content:
-            system_content = event.request.get("system", "")
+            system = event.request.get("system")
+            system_content = system_prompt_text(system) if system else ""
 
         if system_content:
             prompts.append(
@@ -355,24 +505,33 @@ def extract_system_prompts(events: list[Event]) -> list[dict]:
                     if len(system_content) > 500
                     else system_content,
                     "full_length": len(system_content),
+                    "hash": content_hash(system_content),
                 }
             )
     return prompts
 
 
 def compare_system_prompts(prompts1: list[dict], prompts2: list[dict]) -> dict:
-    """Compare system prompts between sessions."""
-    # Get unique prompts by content
-    set1 = {p["content"] for p in prompts1}
-    set2 = {p["content"] for p in prompts2}
+    """Compare system prompts between sessions.
+
+    Prompts are compared by the hash of their full text, so two prompts that
+    only differ past the 500 characters shown still count as different.
+    """
+
+    # Unique prompts by content hash, each shown with its (truncated) content
+    def prompt_hash(prompt: dict) -> str:
+        return prompt.get("hash") or content_hash(system_prompt_text(prompt["content"]))
+
+    by_hash1 = {prompt_hash(p): p["content"] for p in prompts1}
+    by_hash2 = {prompt_hash(p): p["content"] for p in prompts2}
 
     return {
         "session1": prompts1,
         "session2": prompts2,
-        "unique_to_session1": list(set1 - set2),
-        "unique_to_session2": list(set2 - set1),
-        "common": list(set1 & set2),
-        "changed": len(set1) != len(set2) or set1 != set2,
+        "unique_to_session1": [by_hash1[h] for h in by_hash1.keys() - by_hash2.keys()],
+        "unique_to_session2": [by_hash2[h] for h in by_hash2.keys() - by_hash1.keys()],
+        "common": [by_hash1[h] for h in by_hash1.keys() & by_hash2.keys()],
+        "changed": by_hash1.keys() != by_hash2.keys(),
     }
 
 
@@ -632,7 +791,9 @@ def compare_responses(responses1: list[dict], responses2: list[dict]) -> dict:
     }
 
 
-def compute_session_diff(session1: SessionsResponse, session2: SessionsResponse) -> dict:
+def compute_session_diff(
+    session1: SessionsResponse | SessionRecords, session2: SessionsResponse | SessionRecords
+) -> dict:
     """Compute the diff between two sessions."""
     s1 = session1.sessions[0] if session1.sessions else None
     s2 = session2.sessions[0] if session2.sessions else None
@@ -651,22 +812,22 @@ def compute_session_diff(session1: SessionsResponse, session2: SessionsResponse)
     labels_removed = dict(s1_labels - s2_labels)
 
     # Token calculations
-    tokens1 = calc_total_tokens(session1.events)
-    tokens2 = calc_total_tokens(session2.events)
+    tokens1 = calc_total_tokens(session1.events, session1.columns)
+    tokens2 = calc_total_tokens(session2.events, session2.columns)
 
     # Latency
-    avg_latency1 = calc_avg_latency(session1.events)
-    avg_latency2 = calc_avg_latency(session2.events)
+    avg_latency1 = calc_avg_latency(session1.events, session1.columns)
+    avg_latency2 = calc_avg_latency(session2.events, session2.columns)
 
     # Errors
-    errors1 = count_errors(session1.events, session1.function_events)
-    errors2 = count_errors(session2.events, session2.function_events)
+    errors1 = count_errors(session1.events, session1.function_events, session1.columns)
+    errors2 = count_errors(session2.events, session2.function_events, session2.columns)
 
     # Provider/model distribution
-    providers1 = get_provider_distribution(session1.events)
-    providers2 = get_provider_distribution(session2.events)
-    models1 = get_model_distribution(session1.events)
-    models2 = get_model_distribution(session2.events)
+    providers1 = get_provider_distribution(session1.events, session1.columns)
+    providers2 = get_provider_distribution(session2.events, session2.columns)
+    models1 = get_model_distribution(session1.events, session1.columns)
+    models2 = get_model_distribution(session2.events, session2.columns)
 
     # Function events
     fn_counts1 = get_function_counts(session1.function_events)
@@ -679,8 +840,8 @@ def compute_session_diff(session1: SessionsResponse, session2: SessionsResponse)
     evals2 = count_evaluations(session2.events, session2.function_events)
 
     # Trace depth
-    trace_depth1 = get_trace_depth(session1.trace_tree)
-    trace_depth2 = get_trace_depth(session2.trace_tree)
+    trace_depth1 = get_trace_depth(session1.trace_tree, session1.flat_trace)
+    trace_depth2 = get_trace_depth(session2.trace_tree, session2.flat_trace)
 
     # Errors list
     errors_list1 = get_errors_list(session1.events, session1.function_events)
@@ -806,6 +967,27 @@ async def list_tools() -> list[Tool]:
                         "type": "integer",
                         "description": "Maximum number of sessions to return",
                     },
+                    "cursor": {
+                        "type": "string",
+                        "description": "next_cursor from a previous call, to fetch the following page",
+                    },
+                    "after": {
+                        "type": "string",
+                        "description": "Sessions started after this date (YYYY-MM-DD or ISO format)",
+                    },
+                    "before": {
+                        "type": "string",
+                        "description": "Sessions started before this date (YYYY-MM-DD or ISO format)",
+                    },
+                    "sort": {
+                        "type": "string",
+                        "enum": ["started_at", "-started_at"],
+                        "description": "Order by start time, oldest first or newest first with '-' (default: server order)",
+                    },
+                    "refresh": {
+                        "type": "boolean",
+                        "description": "Fetch the session list from the server instead of returning cached data (check cache_age_seconds/stale in the result)",
+                    },
                 },
             },
         ),
@@ -819,6 +1001,10 @@ async def list_tools() -> list[Tool]:
                         "type": "string",
                         "description": "The UUID of the session to retrieve",
                     },
+                    "full_content": {
+                        "type": "boolean",
+                        "description": "Return oversized fields whole instead of truncated to SHEPHERD_MAX_FIELD_KB (default: false)",
+                    },
                 },
                 "required": ["session_id"],
             },
@@ -870,6 +1056,14 @@ async def list_tools() -> list[Tool]:
                         "type": "integer",
                         "description": "Maximum number of sessions to return",
                     },
+                    "refresh": {
+                        "type": "boolean",
+                        "description": "Fetch the session list from the server instead of returning cached data (check cache_age_seconds/stale in the result)",
+                    },
+                    "explain": {
+                        "type": "boolean",
+                        "description": "Include the filter plan (order, method and row counts of each filter) in the result for debugging",
+                    },
                 },
             },
         ),
@@ -946,6 +1140,10 @@ async def list_tools() -> list[Tool]:
                         "type": "string",
                         "description": "The trace ID to fetch",
                     },
+                    "full_content": {
+                        "type": "boolean",
+                        "description": "Return oversized fields whole instead of truncated to SHEPHERD_MAX_FIELD_KB (default: false)",
+                    },
                 },
                 "required": ["trace_id"],
             },
@@ -1041,6 +1239,10 @@ async def list_tools() -> list[Tool]:
                         "type": "string",
                         "description": "The observation ID to fetch",
                     },
+                    "full_content": {
+                        "type": "boolean",
+                        "description": "Return oversized fields whole instead of truncated to SHEPHERD_MAX_FIELD_KB (default: false)",
+                    },
                 },
                 "required": ["observation_id"],
             },
@@ -1098,7 +1300,7 @@ async def list_tools() -> list[Tool]:
         ),
         Tool(
             name="langfuse_search_traces",
-            description="[Langfuse] Search and filter traces with extended criteria including text search, release, cost range, and latency range. Combines API-level and client-side filtering.",
+            description="[Langfuse] Search and filter traces with extended criteria including text search, release, cost range, and latency range. Combines API-level and client-side filtering, scanning pages until enough traces match or the scan budget runs out.",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -1157,7 +1359,23 @@ async def list_tools() -> list[Tool]:
                     },
                     "page": {
                         "type": "integer",
-                        "description": "Page number (1-indexed, default: 1)",
+                        "description": "Page of 'limit' traces to start scanning from (1-indexed, default: 1)",
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "next_cursor from a previous call, to resume the scan where it stopped",
+                    },
+                    "max_pages": {
+                        "type": "integer",
+                        "description": f"Stop after scanning this many pages (default: {SEARCH_MAX_PAGES})",
+                    },
+                    "max_scanned": {
+                        "type": "integer",
+                        "description": f"Stop after scanning this many traces (default: {SEARCH_MAX_SCANNED})",
+                    },
+                    "max_seconds": {
+                        "type": "number",
+                        "description": f"Stop scanning after this many seconds, including time spent waiting for pages (default: {SEARCH_MAX_SECONDS:g})",
                     },
                 },
             },
@@ -1224,6 +1442,10 @@ async def list_tools() -> list[Tool]:
                         "type": "integer",
                         "description": "Maximum number of sessions to return",
                     },
+                    "refresh": {
+                        "type": "boolean",
+                        "description": "Fetch the session list from the server instead of returning cached data (check cache_age_seconds/stale in the result)",
+                    },
                 },
             },
         ),
@@ -1237,6 +1459,10 @@ async def list_tools() -> list[Tool]:
                         "type": "string",
                         "description": "The UUID of the session to retrieve",
                     },
+                    "full_content": {
+                        "type": "boolean",
+                        "description": "Return oversized fields whole instead of truncated to SHEPHERD_MAX_FIELD_KB (default: false)",
+                    },
                 },
                 "required": ["session_id"],
             },
@@ -1257,6 +1483,7 @@ async def list_tools() -> list[Tool]:
                     "has_errors": {"type": "boolean"},
                     "evals_failed": {"type": "boolean"},
                     "limit": {"type": "integer"},
+                    "refresh": {"type": "boolean"},
                 },
             },
         ),
@@ -1335,22 +1562,37 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
 
 async def handle_aiobs_list_sessions(arguments: dict[str, Any]) -> list[TextContent]:
     """Handle aiobs_list_sessions tool call."""
-    limit = arguments.get("limit")
-
-    with AIOBSClient() as client:
-        response = client.list_sessions()
+    after_str = arguments.get("after")
+    before_str = arguments.get("before")
+    page = session_page(
+        limit=arguments.get("limit"),
+        cursor=arguments.get("cursor"),
+        after=parse_date(after_str) if after_str else None,
+        before=parse_date(before_str) if before_str else None,
+        sort=arguments.get("sort"),
+    )
 
-    sessions = response.sessions
-    if limit:
-        sessions = sessions[:limit]
+    client = get_registry().aiobs()
+    refresh = arguments.get("refresh", False)
+    if client.mirror is None:
+        entry = await cached_entry(client, "list_session_records", refresh=refresh, **page)
+        response = entry.value
+    else:
+        # The mirror already holds every session; page the cached snapshot
+        # rather than syncing once per distinct page.
+        entry = await cached_entry(client, "list_session_records", refresh=refresh)
+        response = SessionPage(**page).apply(entry.value) if page else entry.value
 
     result = {
         "provider": "aiobs",
         "sessions": [
-            session_to_dict(s, response.events, response.function_events) for s in sessions
+            session_to_dict(s, response.events, response.function_events, response.index)
+            for s in response.sessions
         ],
-        "total": len(response.sessions),
-        "returned": len(sessions),
+        "total": response.total if response.total is not None else len(response.sessions),
+        "returned": len(response.sessions),
+        "next_cursor": response.next_cursor,
+        **freshness(entry),
     }
 
     return [TextContent(type="text", text=json.dumps(result, indent=2))]
@@ -1362,8 +1604,9 @@ async def handle_aiobs_get_session(arguments: dict[str, Any]) -> list[TextConten
     if not session_id:
         return [TextContent(type="text", text="Error: session_id is required")]
 
-    with AIOBSClient() as client:
-        response = client.get_session(session_id)
+    response = await cached_call(
+        get_registry().aiobs(), "get_session_records", session_id, **full_content(arguments)
+    )
 
     if not response.sessions:
         return [TextContent(type="text", text=f"Session not found: {session_id}")]
@@ -1371,20 +1614,22 @@ async def handle_aiobs_get_session(arguments: dict[str, Any]) -> list[TextConten
     session = response.sessions[0]
 
     # Build summary
-    tokens = calc_total_tokens(response.events)
-    providers = get_provider_distribution(response.events)
-    models = get_model_distribution(response.events)
+    tokens = calc_total_tokens(response.events, response.columns)
+    providers = get_provider_distribution(response.events, response.columns)
+    models = get_model_distribution(response.events, response.columns)
     evals = count_evaluations(response.events, response.function_events)
-    errors = count_errors(response.events, response.function_events)
+    errors = count_errors(response.events, response.function_events, response.columns)
 
     result = {
         "provider": "aiobs",
-        "session": session_to_dict(session, response.events, response.function_events),
+        "session": session_to_dict(
+            session, response.events, response.function_events, response.index
+        ),
         "summary": {
             "total_llm_calls": len(response.events),
             "total_function_calls": len(response.function_events),
             "total_tokens": tokens,
-            "avg_latency_ms": round(calc_avg_latency(response.events), 2),
+            "avg_latency_ms": round(calc_avg_latency(response.events, response.columns), 2),
             "providers_used": list(providers.keys()),
             "models_used": list(models.keys()),
             "provider_distribution": providers,
@@ -1392,7 +1637,7 @@ async def handle_aiobs_get_session(arguments: dict[str, Any]) -> list[TextConten
             "evaluations": evals,
             "errors": errors,
         },
-        "trace_tree": [trace_node_to_dict(node) for node in response.trace_tree],
+        "trace_tree": response.flat_trace.to_dicts(trace_node_fields),
         "llm_calls": [
             {
                 "provider": e.provider,
@@ -1451,11 +1696,41 @@ async def handle_aiobs_search_sessions(arguments: dict[str, Any]) -> list[TextCo
     after = parse_date(after_str) if after_str else None
     before = parse_date(before_str) if before_str else None
 
-    with AIOBSClient() as client:
-        response = client.list_sessions()
+    client = get_registry().aiobs()
+    refresh = arguments.get("refresh", False)
+    only_window = not (
+        query or labels or provider or model or function or has_errors or evals_failed
+    )
+    # The listing counts every match when it applies the limit itself, if
+    # the backend reports a total.
+    limit_pushed = False
+    if client.mirror is not None:
+        # The mirror holds every session already; filter_sessions answers
+        # the window with a binary search.
+        entry = await cached_entry(client, "list_session_records", refresh=refresh)
+    elif client.streaming and not (limit and only_window):
+        # Drop sessions failing the query, labels and date range while the
+        # response streams in; the remaining filters run on what is left.
+        entry = await cached_entry(
+            client,
+            "scan_session_records",
+            query=query,
+            labels=labels,
+            after=after,
+            before=before,
+            refresh=refresh,
+        )
+    else:
+        # Push the start-time window down to the listing, and the limit too
+        # when the window is the only filter; a limited page is smaller than
+        # anything a scan would keep.
+        limit_pushed = bool(limit) and only_window
+        page = session_page(after=after, before=before, limit=limit if limit_pushed else None)
+        entry = await cached_entry(client, "list_session_records", refresh=refresh, **page)
+    response = entry.value
 
     # Apply filters
-    filtered = filter_sessions(
+    filtered, plan = filter_sessions(
         response,
         query=query,
         labels=labels,
@@ -1466,6 +1741,7 @@ async def handle_aiobs_search_sessions(arguments: dict[str, Any]) -> list[TextCo
         before=before,
         has_errors=has_errors,
         evals_failed=evals_failed,
+        explain=True,
     )
 
     sessions = filtered.sessions
@@ -1496,12 +1772,20 @@ async def handle_aiobs_search_sessions(arguments: dict[str, Any]) -> list[TextCo
     result = {
         "provider": "aiobs",
         "sessions": [
-            session_to_dict(s, filtered.events, filtered.function_events) for s in sessions
+            session_to_dict(s, filtered.events, filtered.function_events, filtered.index)
+            for s in sessions
         ],
-        "total_matches": len(filtered.sessions),
+        "total_matches": (
+            response.total
+            if limit_pushed and response.total is not None
+            else len(filtered.sessions)
+        ),
         "returned": len(sessions),
         "filters_applied": filters_applied,
+        **freshness(entry),
     }
+    if arguments.get("explain"):
+        result["plan"] = plan.to_dict()
 
     return [TextContent(type="text", text=json.dumps(result, indent=2))]
 
@@ -1514,9 +1798,11 @@ async def handle_aiobs_diff_sessions(arguments: dict[str, Any]) -> list[TextCont
     if not session_id_1 or not session_id_2:
         return [TextContent(type="text", text="Error: session_id_1 and session_id_2 are required")]
 
-    with AIOBSClient() as client:
-        session1 = client.get_session(session_id_1)
-        session2 = client.get_session(session_id_2)
+    client = get_registry().aiobs()
+    session1, session2 = await asyncio.gather(
+        cached_call(client, "get_session_records", session_id_1),
+        cached_call(client, "get_session_records", session_id_2),
+    )
 
     if not session1.sessions:
         return [TextContent(type="text", text=f"Session not found: {session_id_1}")]
@@ -1536,17 +1822,19 @@ async def handle_aiobs_diff_sessions(arguments: dict[str, Any]) -> list[TextCont
 
 async def handle_langfuse_list_traces(arguments: dict[str, Any]) -> list[TextContent]:
     """Handle langfuse_list_traces tool call."""
-    with LangfuseClient() as client:
-        response = client.list_traces(
-            limit=arguments.get("limit", 50),
-            page=arguments.get("page", 1),
-            user_id=arguments.get("user_id"),
-            name=arguments.get("name"),
-            session_id=arguments.get("session_id"),
-            tags=arguments.get("tags"),
-            from_timestamp=arguments.get("from_timestamp"),
-            to_timestamp=arguments.get("to_timestamp"),
-        )
+    client = get_registry().langfuse()
+    response = await cached_call(
+        client,
+        "list_traces",
+        limit=arguments.get("limit", 50),
+        page=arguments.get("page", 1),
+        user_id=arguments.get("user_id"),
+        name=arguments.get("name"),
+        session_id=arguments.get("session_id"),
+        tags=arguments.get("tags"),
+        from_timestamp=arguments.get("from_timestamp"),
+        to_timestamp=arguments.get("to_timestamp"),
+    )
 
     result = {
         "provider": "langfuse",
@@ -1563,8 +1851,8 @@ async def handle_langfuse_get_trace(arguments: dict[str, Any]) -> list[TextConte
     if not trace_id:
         return [TextContent(type="text", text="Error: trace_id is required")]
 
-    with LangfuseClient() as client:
-        trace = client.get_trace(trace_id)
+    client = get_registry().langfuse()
+    trace = await cached_call(client, "get_trace", trace_id, **full_content(arguments))
 
     # Process observations
     observations = []
@@ -1588,13 +1876,15 @@ async def handle_langfuse_get_trace(arguments: dict[str, Any]) -> list[TextConte
 
 async def handle_langfuse_list_sessions(arguments: dict[str, Any]) -> list[TextContent]:
     """Handle langfuse_list_sessions tool call."""
-    with LangfuseClient() as client:
-        response = client.list_sessions(
-            limit=arguments.get("limit", 50),
-            page=arguments.get("page", 1),
-            from_timestamp=arguments.get("from_timestamp"),
-            to_timestamp=arguments.get("to_timestamp"),
-        )
+    client = get_registry().langfuse()
+    response = await cached_call(
+        client,
+        "list_sessions",
+        limit=arguments.get("limit", 50),
+        page=arguments.get("page", 1),
+        from_timestamp=arguments.get("from_timestamp"),
+        to_timestamp=arguments.get("to_timestamp"),
+    )
 
     result = {
         "provider": "langfuse",
@@ -1611,8 +1901,8 @@ async def handle_langfuse_get_session(arguments: dict[str, Any]) -> list[TextCon
     if not session_id:
         return [TextContent(type="text", text="Error: session_id is required")]
 
-    with LangfuseClient() as client:
-        session = client.get_session(session_id)
+    client = get_registry().langfuse()
+    session = await cached_call(client, "get_session", session_id)
 
     result = {
         "provider": "langfuse",
@@ -1625,17 +1915,19 @@ async def handle_langfuse_get_session(arguments: dict[str, Any]) -> list[TextCon
 
 async def handle_langfuse_list_observations(arguments: dict[str, Any]) -> list[TextContent]:
     """Handle langfuse_list_observations tool call."""
-    with LangfuseClient() as client:
-        response = client.list_observations(
-            limit=arguments.get("limit", 50),
-            page=arguments.get("page", 1),
-            name=arguments.get("name"),
-            user_id=arguments.get("user_id"),
-            trace_id=arguments.get("trace_id"),
-            obs_type=arguments.get("type"),
-            from_timestamp=arguments.get("from_timestamp"),
-            to_timestamp=arguments.get("to_timestamp"),
-        )
+    client = get_registry().langfuse()
+    response = await cached_call(
+        client,
+        "list_observations",
+        limit=arguments.get("limit", 50),
+        page=arguments.get("page", 1),
+        name=arguments.get("name"),
+        user_id=arguments.get("user_id"),
+        trace_id=arguments.get("trace_id"),
+        obs_type=arguments.get("type"),
+        from_timestamp=arguments.get("from_timestamp"),
+        to_timestamp=arguments.get("to_timestamp"),
+    )
 
     result = {
         "provider": "langfuse",
@@ -1652,8 +1944,8 @@ async def handle_langfuse_get_observation(arguments: dict[str, Any]) -> list[Tex
     if not observation_id:
         return [TextContent(type="text", text="Error: observation_id is required")]
 
-    with LangfuseClient() as client:
-        obs = client.get_observation(observation_id)
+    client = get_registry().langfuse()
+    obs = await cached_call(client, "get_observation", observation_id, **full_content(arguments))
 
     result = {
         "provider": "langfuse",
@@ -1669,16 +1961,18 @@ async def handle_langfuse_get_observation(arguments: dict[str, Any]) -> list[Tex
 
 async def handle_langfuse_list_scores(arguments: dict[str, Any]) -> list[TextContent]:
     """Handle langfuse_list_scores tool call."""
-    with LangfuseClient() as client:
-        response = client.list_scores(
-            limit=arguments.get("limit", 50),
-            page=arguments.get("page", 1),
-            name=arguments.get("name"),
-            user_id=arguments.get("user_id"),
-            trace_id=arguments.get("trace_id"),
-            from_timestamp=arguments.get("from_timestamp"),
-            to_timestamp=arguments.get("to_timestamp"),
-        )
+    client = get_registry().langfuse()
+    response = await cached_call(
+        client,
+        "list_scores",
+        limit=arguments.get("limit", 50),
+        page=arguments.get("page", 1),
+        name=arguments.get("name"),
+        user_id=arguments.get("user_id"),
+        trace_id=arguments.get("trace_id"),
+        from_timestamp=arguments.get("from_timestamp"),
+        to_timestamp=arguments.get("to_timestamp"),
+    )
 
     result = {
         "provider": "langfuse",
@@ -1709,8 +2003,8 @@ async def handle_langfuse_get_score(arguments: dict[str, Any]) -> list[TextConte
     if not score_id:
         return [TextContent(type="text", text="Error: score_id is required")]
 
-    with LangfuseClient() as client:
-        score = client.get_score(score_id)
+    client = get_registry().langfuse()
+    score = await cached_call(client, "get_score", score_id)
 
     result = {
         "provider": "langfuse",
@@ -1787,53 +2081,98 @@ async def handle_langfuse_search_traces(arguments: dict[str, Any]) -> list[TextC
     to_timestamp = arguments.get("to_timestamp")
     limit = arguments.get("limit", 50)
     page = arguments.get("page", 1)
+    cursor = arguments.get("cursor")
+    max_pages = arguments.get("max_pages", SEARCH_MAX_PAGES)
+    max_scanned = arguments.get("max_scanned", SEARCH_MAX_SCANNED)
+    max_seconds = arguments.get("max_seconds", SEARCH_MAX_SECONDS)
+
+    release_lower = release.lower() if release else None
+
+    def matches(trace: Any) -> bool:
+        # Client-side filters
+        if query and not _trace_matches_query(trace, query):
+            return False
+        if release_lower and not (trace.release and release_lower in trace.release.lower()):
+            return False
+        cost = trace.total_cost
+        if min_cost is not None and (cost is None or cost < min_cost):
+            return False
+        if max_cost is not None and (cost is None or cost > max_cost):
+            return False
+        latency = trace.latency
+        if min_latency is not None and (latency is None or latency < min_latency):
+            return False
+        return max_latency is None or (latency is not None and latency <= max_latency)
+
+    client_side = bool(query or release) or any(
+        value is not None for value in (min_cost, max_cost, min_latency, max_latency)
+    )
+    # Without client-side filters every trace matches, so one page of
+    # `limit` traces answers the search; otherwise scan in larger pages.
+    if cursor:
+        position = TraceCursor.decode(cursor)
+    else:
+        # `page` counts pages of `limit` traces whatever size is scanned in.
+        page_size = SEARCH_PAGE_SIZE if client_side else limit
+        start = (page - 1) * limit
+        position = TraceCursor(start // page_size + 1, start % page_size, page_size)
+    page_size = position.limit
+    # Pages the item budget can reach, so no page past it is prefetched.
+    reachable = -(-(position.offset + max_scanned) // page_size)
+
+    client = get_registry().langfuse()
+    # Use API-level filters where supported, and the response cache per page
+    pages = paginate(
+        partial(cached_call, client, "list_traces"),
+        start_page=position.page,
+        max_pages=max(1, min(max_pages, reachable)),
+        limit=page_size,
+        name=name,
+        user_id=user_id,
+        session_id=session_id,
+        tags=tags,
+        from_timestamp=from_timestamp,
+        to_timestamp=to_timestamp,
+    )
 
-    with LangfuseClient() as client:
-        # Use API-level filters where supported
-        response = client.list_traces(
-            limit=limit,
-            page=page,
-            name=name,
-            user_id=user_id,
-            session_id=session_id,
-            tags=tags,
-            from_timestamp=from_timestamp,
-            to_timestamp=to_timestamp,
-        )
-
-    # Apply additional client-side filters
-    filtered_traces = response.data
-
-    # Text query filter
-    if query:
-        filtered_traces = [t for t in filtered_traces if _trace_matches_query(t, query)]
-
-    # Release filter (client-side)
-    if release:
-        release_lower = release.lower()
-        filtered_traces = [
-            t for t in filtered_traces if t.release and release_lower in t.release.lower()
-        ]
-
-    # Cost filters (client-side)
-    if min_cost is not None:
-        filtered_traces = [
-            t for t in filtered_traces if t.total_cost is not None and t.total_cost >= min_cost
-        ]
-    if max_cost is not None:
-        filtered_traces = [
-            t for t in filtered_traces if t.total_cost is not None and t.total_cost <= max_cost
-        ]
-
-    # Latency filters (client-side)
-    if min_latency is not None:
-        filtered_traces = [
-            t for t in filtered_traces if t.latency is not None and t.latency >= min_latency
-        ]
-    if max_latency is not None:
-        filtered_traces = [
-            t for t in filtered_traces if t.latency is not None and t.latency <= max_latency
-        ]
+    filtered_traces: list[Any] = []
+    scanned = 0
+    pages_scanned = 0
+    meta: dict[str, Any] = {}
+    # Where to resume if the time budget runs out before the first page.
+    next_position: TraceCursor | None = position
+    stopped = "exhausted"
+    deadline = time.monotonic() + max_seconds
+    async with aclosing(pages):
+        while True:
+            try:
+                current, response = await asyncio.wait_for(
+                    anext(pages), deadline - time.monotonic()
+                )
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError:
+                stopped = "max_seconds"
+                break
+            pages_scanned += 1
+            meta = response.meta
+            traces = response.data
+            more = has_more_pages(current, response, page_size)
+            next_position = TraceCursor(current + 1, 0, page_size) if more else None
+            # Stays "max_pages" if the page budget ends the scan
+            stopped = "max_pages" if more else "exhausted"
+            first = position.offset if current == position.page else 0
+            for index in range(first, len(traces)):
+                scanned += 1
+                if matches(traces[index]):
+                    filtered_traces.append(traces[index])
+                if len(filtered_traces) >= limit or scanned >= max_scanned:
+                    stopped = "limit" if len(filtered_traces) >= limit else "max_scanned"
+                    if index + 1 < len(traces):
+                        next_position = TraceCursor(current, index + 1, page_size)
+                    break
+            if stopped != "max_pages":
+                break
 
     # Build filters applied summary
     filters_applied: dict[str, Any] = {}
@@ -1867,7 +2206,11 @@ async def handle_langfuse_search_traces(arguments: dict[str, Any]) -> list[TextC
         "traces": [langfuse_trace_to_dict(t) for t in filtered_traces],
         "total_matches": len(filtered_traces),
         "filters_applied": filters_applied,
-        "meta": response.meta,
+        "scanned": scanned,
+        "pages_scanned": pages_scanned,
+        "stopped": stopped,
+        "next_cursor": next_position.encode() if next_position else None,
+        "meta": meta,
     }
 
     return [TextContent(type="text", text=json.dumps(result, indent=2))]
@@ -1887,13 +2230,15 @@ async def handle_langfuse_search_sessions(arguments: dict[str, Any]) -> list[Tex
     limit = arguments.get("limit", 50)
     page = arguments.get("page", 1)
 
-    with LangfuseClient() as client:
-        response = client.list_sessions(
-            limit=limit,
-            page=page,
-            from_timestamp=from_timestamp,
-            to_timestamp=to_timestamp,
-        )
+    client = get_registry().langfuse()
+    response = await cached_call(
+        client,
+        "list_sessions",
+        limit=limit,
+        page=page,
+        from_timestamp=from_timestamp,
+        to_timestamp=to_timestamp,
+    )
 
     # Apply client-side filters
     filtered_sessions = response.data
@@ -1956,19 +2301,25 @@ async def handle_langfuse_search_sessions(arguments: dict[str, Any]) -> list[Tex
 # ============================================================================
 
 
+async def serve():
+    """Serve over stdio with a provider registry that lives as long as the server."""
+    global _registry
+    async with ProviderRegistry() as registry:
+        _registry = registry
+        try:
+            async with stdio_server() as (read_stream, write_stream):
+                await server.run(
+                    read_stream,
+                    write_stream,
+                    server.create_initialization_options(),
+                )
+        finally:
+            _registry = None
+
+
 def main():
     """Run the Shepherd MCP server."""
-    import asyncio
-
-    async def run():
-        async with stdio_server() as (read_stream, write_stream):
-            await server.run(
-                read_stream,
-                write_stream,
-                server.create_initialization_options(),
-            )
-
-    asyncio.run(run())
+    asyncio.run(serve())
 
 
 if __name__ == "__main__":
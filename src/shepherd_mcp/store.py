@@ -0,0 +1,245 @@
+"""Optional on-disk store of immutable provider records.
+
+AIOBS sessions that have ended and finished Langfuse traces and
+observations never change, so there is no reason for a new server process
+to fetch them again. Langfuse scores are left out: they can be edited at
+any time, e.g. when an annotation is corrected. When ``SHEPHERD_CACHE_DIR`` is set, such records are kept
+in a SQLite database in that directory, as zlib-compressed JSON keyed by
+record ID, account and variant (the field caps the record was decoded
+with), so a record stored under one ``SHEPHERD_MAX_FIELD_KB`` is not served
+under another. The store is bounded by size: once it grows past its
+budget, the least recently read records are deleted.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, TypeVar
+
+from pydantic import BaseModel
+
+from shepherd_mcp.models.aiobs import SessionsResponse
+from shepherd_mcp.models.compact import SessionRecords
+from shepherd_mcp.models.langfuse import LangfuseObservation, LangfuseTrace
+
+M = TypeVar("M", bound=BaseModel)
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+# Finished Langfuse traces younger than this may still receive late
+# observations from asynchronous ingestion, so they are not stored yet.
+TRACE_SETTLE_SECONDS = 300.0
+
+# Bumped whenever the table layout changes; a store written with another
+# version is cleared on open, since every record can be fetched again.
+SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    kind TEXT NOT NULL,
+    account TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    id TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (kind, account, variant, id)
+);
+CREATE INDEX IF NOT EXISTS records_accessed_at ON records (accessed_at);
+"""
+
+
+def _session_is_complete(response: SessionsResponse | SessionRecords) -> bool:
+    return bool(response.sessions) and all(s.ended_at is not None for s in response.sessions)
+
+
+def _trace_is_complete(trace: LangfuseTrace) -> bool:
+    if trace.latency is None:
+        return False
+    if any(isinstance(o, LangfuseObservation) and o.end_time is None for o in trace.observations):
+        return False
+    try:
+        started = datetime.fromisoformat(trace.timestamp.replace("Z", "+00:00"))
+    except ValueError:
+        return False
+    if started.tzinfo is None:
+        started = started.replace(tzinfo=timezone.utc)
+    age = datetime.now(timezone.utc) - started
+    return age.total_seconds() >= TRACE_SETTLE_SECONDS
+
+
+def _observation_is_complete(observation: LangfuseObservation) -> bool:
+    return observation.end_time is not None
+
+
+# Endpoints whose responses can be stored, keyed like ResponseCache endpoints:
+# the model to decode stored payloads with, and when a record is final.
+# SessionRecords is not a pydantic model but provides model_validate_json
+# and model_dump_json.
+STORED_ENDPOINTS: dict[str, tuple[type[Any], Callable[[Any], bool]]] = {
+    "aiobs.get_session": (SessionsResponse, _session_is_complete),
+    "aiobs.get_session_records": (SessionRecords, _session_is_complete),
+    "langfuse.get_trace": (LangfuseTrace, _trace_is_complete),
+    "langfuse.get_observation": (LangfuseObservation, _observation_is_complete),
+}
+
+
+class RecordStore:
+    """SQLite store of immutable records, bounded by compressed size.
+
+    Reads and writes run in a worker thread through the async methods, so
+    the event loop is never blocked on disk I/O.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Open (or create) the store.
+
+        Args:
+            path: Database file. Parent directories are created if needed.
+            max_bytes: Budget for compressed payloads. Least recently read
+                      records are deleted once it is exceeded.
+            clock: Wall clock used for recency, injectable for tests.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self._conn.executescript("DROP TABLE IF EXISTS records;")
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.executescript(_SCHEMA)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> RecordStore | None:
+        """Open the store in SHEPHERD_CACHE_DIR, or return None if it is unset.
+
+        The size budget is read from SHEPHERD_CACHE_DIR_MAX_MB.
+        """
+        cache_dir = os.environ.get("SHEPHERD_CACHE_DIR")
+        if not cache_dir:
+            return None
+        max_mb = float(os.environ.get("SHEPHERD_CACHE_DIR_MAX_MB", DEFAULT_MAX_BYTES / 1024 / 1024))
+        return cls(Path(cache_dir).expanduser() / "records.sqlite3", int(max_mb * 1024 * 1024))
+
+    def get(
+        self, kind: str, account: str, record_id: str, model: type[M], variant: str = ""
+    ) -> M | None:
+        """Return a stored record decoded as ``model``, or None."""
+        key = (kind, account, variant, record_id)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM records"
+                " WHERE kind = ? AND account = ? AND variant = ? AND id = ?",
+                key,
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE records SET accessed_at = ?"
+                " WHERE kind = ? AND account = ? AND variant = ? AND id = ?",
+                (self._clock(), *key),
+            )
+            self._conn.commit()
+            self.hits += 1
+        return model.model_validate_json(zlib.decompress(row[0]))
+
+    def put(
+        self, kind: str, account: str, record_id: str, record: BaseModel, variant: str = ""
+    ) -> None:
+        """Store a record, evicting least recently read ones to fit the budget."""
+        payload = zlib.compress(record.model_dump_json(by_alias=True).encode())
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kind, account, variant, record_id, payload, len(payload), self._clock()),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM records").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT rowid, size FROM records ORDER BY accessed_at").fetchall()
+        doomed = []
+        for rowid, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((rowid,))
+            total -= size
+        self._conn.executemany("DELETE FROM records WHERE rowid = ?", doomed)
+        self.evictions += len(doomed)
+
+    async def get_or_load(
+        self,
+        kind: str,
+        account: str,
+        record_id: str,
+        loader: Callable[[], Awaitable[Any]],
+        variant: str = "",
+    ) -> Any:
+        """Return a stored record, or load it and store it if it is final.
+
+        Args:
+            kind: Endpoint name; must be one of :data:`STORED_ENDPOINTS`.
+            account: Account fingerprint, so accounts never share records.
+            record_id: Record ID.
+            loader: Coroutine function fetching the record from the provider.
+            variant: How the loader shapes records (e.g. the field caps it
+                    applies); records of other variants are not returned.
+        """
+        model, is_final = STORED_ENDPOINTS[kind]
+        record = await asyncio.to_thread(self.get, kind, account, record_id, model, variant)
+        if record is not None:
+            return record
+        record = await loader()
+        if is_final(record):
+            await asyncio.to_thread(self.put, kind, account, record_id, record, variant)
+        return record
+
+    def total_bytes(self) -> int:
+        """Return the compressed size of all stored records."""
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM records").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return store counters as a JSON-serializable dictionary."""
+        return {
+            "path": str(self.path),
+            "records": len(self),
+            "bytes": self.total_bytes(),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
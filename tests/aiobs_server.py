@@ -0,0 +1,181 @@
+"""In-process stand-in for the AIOBS backend used by the tests.
+
+The server keeps sessions and events in memory and answers the AIOBS read
+endpoints through ``httpx.MockTransport``. It records every request body and
+the size of every response, so tests can check how much data a sync moved.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import AsyncIterator, Iterator
+from typing import Any
+
+import httpx
+
+# Request body fields selecting a page of the session list.
+_PAGE_FIELDS = {"limit", "cursor", "after", "before", "sort"}
+
+
+class ChunkedBody(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """Response body delivered in fixed-size chunks, like a slow network."""
+
+    def __init__(self, content: bytes, chunk_size: int) -> None:
+        self.content = content
+        self.chunk_size = chunk_size
+
+    def __iter__(self) -> Iterator[bytes]:
+        for start in range(0, len(self.content), self.chunk_size):
+            yield self.content[start : start + self.chunk_size]
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        for chunk in self:
+            yield chunk
+
+
+class FakeAIOBSServer:
+    """Serves ``/v1/sessions`` from in-memory data."""
+
+    def __init__(
+        self,
+        supports_since: bool = True,
+        now: float = 1_700_000_000.0,
+        chunk_size: int | None = None,
+        supports_paging: bool = True,
+    ) -> None:
+        """Create an empty server.
+
+        Args:
+            supports_since: Honor the ``since`` body field. When False the
+                           server always returns everything, like a backend
+                           without incremental support.
+            now: Initial server clock, reported as ``generated_at``.
+            chunk_size: Send response bodies in chunks of this many bytes.
+                       Defaults to one chunk.
+            supports_paging: Honor the ``limit``, ``cursor``, ``after``,
+                            ``before`` and ``sort`` body fields. When False
+                            they are ignored and no ``next_cursor`` is sent.
+        """
+        self.supports_since = supports_since
+        self.supports_paging = supports_paging
+        self.now = now
+        self.chunk_size = chunk_size
+        self.sessions: list[dict[str, Any]] = []
+        self.events: list[dict[str, Any]] = []
+        self.function_events: list[dict[str, Any]] = []
+        self.requests: list[dict[str, Any]] = []
+        self.response_sizes: list[int] = []
+
+    def add_session(
+        self,
+        session_id: str,
+        started_at: float,
+        ended_at: float | None = None,
+        events: int = 3,
+    ) -> dict[str, Any]:
+        """Add a session with ``events`` LLM calls and one function event."""
+        session = {
+            "id": session_id,
+            "name": f"run {session_id}",
+            "started_at": started_at,
+            "ended_at": ended_at,
+            "meta": {},
+            "labels": {"env": "test"},
+        }
+        self.sessions.append(session)
+        for i in range(events):
+            self.add_event(session_id, f"{session_id}-llm-{i}", started_at + i)
+        self.function_events.append(
+            {
+                "provider": "function",
+                "api": "call",
+                "name": "step",
+                "started_at": started_at,
+                "ended_at": started_at + 1,
+                "duration_ms": 1000.0,
+                "span_id": f"{session_id}-fn",
+                "session_id": session_id,
+            }
+        )
+        return session
+
+    def add_event(self, session_id: str, span_id: str, started_at: float) -> None:
+        """Add an LLM call to a session."""
+        self.events.append(
+            {
+                "provider": "openai",
+                "api": "chat.completions.create",
+                "request": {
+                    "model": "gpt-4o-mini",
+                    "messages": [{"role": "user", "content": "hi"}],
+                },
+                "response": {"model": "gpt-4o-mini", "usage": {"total_tokens": 10}},
+                "started_at": started_at,
+                "ended_at": started_at + 0.5,
+                "duration_ms": 500.0,
+                "span_id": span_id,
+                "session_id": session_id,
+            }
+        )
+
+    def _sessions_payload(self, since: float | None) -> dict[str, Any]:
+        def is_new(item: dict[str, Any]) -> bool:
+            return since is None or item["started_at"] >= since
+
+        def session_changed(session: dict[str, Any]) -> bool:
+            ended_at = session["ended_at"]
+            return is_new(session) or ended_at is None or ended_at >= since
+
+        return {
+            "sessions": [s for s in self.sessions if since is None or session_changed(s)],
+            "events": [e for e in self.events if is_new(e)],
+            "function_events": [e for e in self.function_events if is_new(e)],
+            "generated_at": self.now,
+        }
+
+    def _page(self, payload: dict[str, Any], body: dict[str, Any]) -> dict[str, Any]:
+        # Cursors are plain offsets here, unlike the client's encoded ones.
+        sessions = [
+            s
+            for s in payload["sessions"]
+            if (body.get("after") is None or s["started_at"] >= body["after"])
+            and (body.get("before") is None or s["started_at"] <= body["before"])
+        ]
+        if body.get("sort"):
+            sessions.sort(key=lambda s: s["started_at"], reverse=body["sort"].startswith("-"))
+        start = int(body.get("cursor") or 0)
+        end = start + body["limit"] if body.get("limit") else len(sessions)
+        ids = {s["id"] for s in sessions[start:end]}
+        return {
+            **payload,
+            "sessions": sessions[start:end],
+            "events": [e for e in payload["events"] if e["session_id"] in ids],
+            "function_events": [e for e in payload["function_events"] if e["session_id"] in ids],
+            "next_cursor": str(end) if end < len(sessions) else None,
+            "total": len(sessions),
+        }
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        """Handle one request; pass to ``httpx.MockTransport``."""
+        body = json.loads(request.content) if request.content else {}
+        self.requests.append(body)
+        if request.url.path != "/v1/sessions":
+            return httpx.Response(404, json={"detail": "Not found"})
+
+        since = body.get("since") if self.supports_since else None
+        payload = self._sessions_payload(since)
+        if self.supports_paging and _PAGE_FIELDS & body.keys():
+            payload = self._page(payload, body)
+        content = json.dumps(payload).encode()
+        self.response_sizes.append(len(content))
+        headers = {"Content-Type": "application/json"}
+        if self.chunk_size is not None:
+            return httpx.Response(
+                200, stream=ChunkedBody(content, self.chunk_size), headers=headers
+            )
+        return httpx.Response(200, content=content, headers=headers)
+
+    @property
+    def transport(self) -> httpx.MockTransport:
+        """Transport routing client requests to this server."""
+        return httpx.MockTransport(self.handler)
@@ -0,0 +1,282 @@
+"""Tests for the response cache."""
+
+import asyncio
+import itertools
+import json
+import sys
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+
+from shepherd_mcp.cache import ResponseCache, estimate_size
+from shepherd_mcp.providers.registry import PoolConfig, ProviderRegistry
+from shepherd_mcp.server import cached_call, handle_aiobs_list_sessions
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestEstimateSize:
+    """Tests for estimate_size."""
+
+    def test_counts_nested_items(self):
+        payload = {"a": ["x" * 1000]}
+        assert estimate_size(payload) >= sys.getsizeof("x" * 1000)
+
+    def test_samples_large_containers(self):
+        items = ["y" * 100 + str(i) for i in range(10_000)]
+        exact = sys.getsizeof(items) + sum(sys.getsizeof(item) for item in items)
+        estimate = estimate_size(items)
+        assert 0.9 * exact <= estimate <= 1.1 * exact
+
+    def test_shared_objects_counted_once(self):
+        shared = "z" * 10_000
+        assert estimate_size([shared, shared]) < 2 * sys.getsizeof(shared)
+
+
+class TestResponseCache:
+    """Tests for ResponseCache."""
+
+    def test_hit_and_miss(self):
+        cache = ResponseCache()
+        assert cache.get("aiobs.list_sessions", "k") is None
+        cache.put("aiobs.list_sessions", "k", {"sessions": []})
+        assert cache.get("aiobs.list_sessions", "k") == {"sessions": []}
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    def test_entries_expire_after_endpoint_ttl(self):
+        clock = FakeClock()
+        cache = ResponseCache(ttls={"fast": 5.0, "slow": 50.0}, clock=clock)
+        cache.put("fast", "k", 1)
+        cache.put("slow", "k", 2)
+
+        clock.now = 10.0
+
+        assert cache.get("fast", "k") is None
+        assert cache.get("slow", "k") == 2
+        assert cache.expirations == 1
+        assert len(cache) == 1
+
+    def test_evicts_least_recently_used_over_budget(self):
+        cache = ResponseCache(max_bytes=300)
+        cache.put("e", "a", "a", size=100)
+        cache.put("e", "b", "b", size=100)
+        cache.put("e", "c", "c", size=100)
+        cache.get("e", "a")
+
+        cache.put("e", "d", "d", size=100)
+
+        assert cache.get("e", "b") is None
+        assert cache.get("e", "a") == "a"
+        assert cache.evictions == 1
+        assert cache.total_bytes == 300
+
+    def test_oversized_values_are_not_cached(self):
+        cache = ResponseCache(max_bytes=100)
+        cache.put("e", "big", "x", size=1000)
+        assert len(cache) == 0
+        assert cache.total_bytes == 0
+
+    def test_replacing_entry_updates_size(self):
+        cache = ResponseCache()
+        cache.put("e", "k", "old", size=100)
+        cache.put("e", "k", "new", size=40)
+        assert cache.total_bytes == 40
+        assert cache.get("e", "k") == "new"
+
+    def test_invalidate(self):
+        cache = ResponseCache()
+        cache.put("a", 1, "x")
+        cache.put("a", 2, "y")
+        cache.put("b", 1, "z")
+
+        assert cache.invalidate("a", 1) == 1
+        assert cache.invalidate("a", 1) == 0
+        assert cache.invalidate("a") == 1
+        assert cache.invalidate() == 1
+        assert cache.total_bytes == 0
+
+    def test_zero_budget_disables_cache(self):
+        with patch.dict("os.environ", {"SHEPHERD_CACHE_MAX_MB": "0"}):
+            cache = ResponseCache.from_env()
+        cache.put("e", "k", "v")
+        assert cache.get("e", "k") is None
+
+    @pytest.mark.asyncio
+    async def test_get_or_load_calls_loader_once(self):
+        cache = ResponseCache()
+        loader = AsyncMock(return_value="value")
+
+        assert await cache.get_or_load("e", "k", loader) == "value"
+        assert await cache.get_or_load("e", "k", loader) == "value"
+
+        loader.assert_awaited_once()
+        assert cache.snapshot()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_load(self):
+        cache = ResponseCache()
+        release = asyncio.Event()
+
+        async def load():
+            await release.wait()
+            return "value"
+
+        loader = AsyncMock(side_effect=load)
+        pending = [asyncio.create_task(cache.get_or_load("e", "k", loader)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await asyncio.gather(*pending) == ["value"] * 3
+        loader.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_uncached_value_is_fresh(self):
+        with patch.dict("os.environ", {"SHEPHERD_CACHE_MAX_MB": "0"}):
+            cache = ResponseCache.from_env()
+
+        entry = await cache.get_or_load_entry("e", "k", AsyncMock(return_value="v"))
+
+        assert entry.value == "v"
+        assert not cache.is_stale(entry)
+        assert cache.age(entry) < 1
+
+
+class TestStaleWhileRevalidate:
+    """Tests for serving stale entries while refreshing in the background."""
+
+    @pytest.mark.asyncio
+    async def test_stale_entry_served_and_refreshed(self):
+        clock = FakeClock()
+        cache = ResponseCache(ttls={"e": 10.0}, max_stale={"e": 100.0}, clock=clock)
+        loader = AsyncMock(side_effect=["v1", "v2"])
+        await cache.get_or_load("e", "k", loader)
+
+        clock.now = 20.0
+        entry = await cache.get_or_load_entry("e", "k", loader)
+
+        assert entry.value == "v1"
+        assert cache.is_stale(entry)
+        assert cache.age(entry) == 20.0
+        await asyncio.sleep(0)
+        assert cache.get("e", "k") == "v2"
+        assert cache.stale_hits == 1
+        assert cache.refreshes == 1
+
+    @pytest.mark.asyncio
+    async def test_entry_past_staleness_bound_is_reloaded(self):
+        clock = FakeClock()
+        cache = ResponseCache(ttls={"e": 10.0}, max_stale={"e": 100.0}, clock=clock)
+        loader = AsyncMock(side_effect=["v1", "v2"])
+        await cache.get_or_load("e", "k", loader)
+
+        clock.now = 200.0
+
+        assert await cache.get_or_load("e", "k", loader) == "v2"
+        assert cache.stale_hits == 0
+
+    @pytest.mark.asyncio
+    async def test_refresh_bypasses_fresh_entry(self):
+        cache = ResponseCache()
+        loader = AsyncMock(side_effect=["v1", "v2"])
+        await cache.get_or_load("e", "k", loader)
+
+        entry = await cache.get_or_load_entry("e", "k", loader, refresh=True)
+
+        assert entry.value == "v2"
+        assert cache.get("e", "k") == "v2"
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_keeps_stale_entry(self):
+        clock = FakeClock()
+        cache = ResponseCache(ttls={"e": 10.0}, max_stale={"e": 100.0}, clock=clock)
+        await cache.get_or_load("e", "k", AsyncMock(return_value="v1"))
+
+        clock.now = 20.0
+        failing = AsyncMock(side_effect=RuntimeError("boom"))
+        await cache.get_or_load_entry("e", "k", failing)
+        await asyncio.sleep(0)
+
+        assert (await cache.get_or_load_entry("e", "k", failing)).value == "v1"
+        await cache.aclose()
+
+    @pytest.mark.asyncio
+    async def test_miss_joins_running_refresh(self):
+        clock = FakeClock()
+        cache = ResponseCache(ttls={"e": 10.0}, max_stale={"e": 100.0}, clock=clock)
+        loader = AsyncMock(side_effect=["v1", "v2", "v3"])
+        await cache.get_or_load("e", "k", loader)
+
+        clock.now = 20.0
+        await cache.get_or_load_entry("e", "k", loader)
+        entry = await cache.get_or_load_entry("e", "k", loader, refresh=True)
+
+        assert entry.value == "v2"
+        assert loader.await_count == 2
+        assert cache.refreshes == 1
+
+    @pytest.mark.asyncio
+    async def test_list_sessions_reports_staleness(self):
+        clock = FakeClock()
+        generated = itertools.count(1_700_000_000.0, 100.0)
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json={"sessions": [], "generated_at": next(generated)})
+
+        registry = ProviderRegistry(
+            PoolConfig(),
+            transport=httpx.MockTransport(handler),
+            cache=ResponseCache(clock=clock),
+        )
+        env = {"AIOBS_API_KEY": "key"}
+        async with registry:
+            with (
+                patch("shepherd_mcp.server.get_registry", return_value=registry),
+                patch.dict("os.environ", env),
+            ):
+                await handle_aiobs_list_sessions({})
+                clock.now = 45.0
+                stale = json.loads((await handle_aiobs_list_sessions({}))[0].text)
+                forced = json.loads((await handle_aiobs_list_sessions({"refresh": True}))[0].text)
+
+        assert stale["stale"] is True
+        assert stale["cache_age_seconds"] == 45.0
+        assert forced["stale"] is False
+        assert forced["cache_age_seconds"] == 0.0
+        assert forced["generated_at"] != stale["generated_at"]
+
+
+class TestCachedCall:
+    """Tests for the server's cached_call helper."""
+
+    @pytest.mark.asyncio
+    async def test_caches_per_arguments_and_credentials(self):
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append((request.url.path, json.loads(request.content)["api_key"]))
+            return httpx.Response(200, json={"sessions": []})
+
+        registry = ProviderRegistry(PoolConfig(), transport=httpx.MockTransport(handler))
+        async with registry:
+            with patch("shepherd_mcp.server.get_registry", return_value=registry):
+                await cached_call(registry.aiobs(api_key="k1"), "get_session", "s1")
+                await cached_call(registry.aiobs(api_key="k1"), "get_session", "s1")
+                await cached_call(registry.aiobs(api_key="k1"), "get_session", "s2")
+                await cached_call(registry.aiobs(api_key="k2"), "get_session", "s1")
+
+        assert calls == [
+            ("/v1/sessions/s1/tree", "k1"),
+            ("/v1/sessions/s2/tree", "k1"),
+            ("/v1/sessions/s1/tree", "k2"),
+        ]
+        assert registry.cache.hits == 1
@@ -0,0 +1,260 @@
+"""Tests for decode-time field size caps."""
+
+import copy
+import json
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from shepherd_mcp.models.caps import FieldCaps, elision
+from shepherd_mcp.models.decode import FastDecoder
+from shepherd_mcp.models.dedup import content_hash
+from shepherd_mcp.models.lazy import LazyDict
+from shepherd_mcp.providers.aiobs import AsyncAIOBSClient, SessionScan
+from shepherd_mcp.providers.langfuse import AsyncLangfuseClient
+from shepherd_mcp.providers.registry import PoolConfig, ProviderRegistry
+from shepherd_mcp.server import handle_aiobs_get_session, handle_langfuse_get_trace
+
+IMAGE = "iVBORw0KGgo" * 100_000  # about 1 MB of base64
+
+
+def make_payload() -> dict:
+    event = {
+        "provider": "openai",
+        "api": "chat.completions.create",
+        "request": {
+            "model": "gpt-4o",
+            "messages": [
+                {"role": "system", "content": "Be brief."},
+                {"role": "user", "content": [{"type": "image", "data": IMAGE}]},
+            ],
+        },
+        "response": {"model": "gpt-4o", "usage": {"total_tokens": 3}},
+        "started_at": 1.0,
+        "ended_at": 2.0,
+        "duration_ms": 1000.0,
+        "span_id": "e1",
+        "session_id": "s1",
+    }
+    node = {**copy.deepcopy(event), "event_type": "provider", "children": []}
+    return {
+        "sessions": [{"id": "s1", "name": "run", "started_at": 1.0, "ended_at": 2.0}],
+        "events": [event],
+        "function_events": [],
+        "trace_tree": [node],
+    }
+
+
+class TestFieldCaps:
+    """Tests for FieldCaps."""
+
+    def test_small_values_are_unchanged(self):
+        value = {"messages": [{"role": "user", "content": "hi"}], "n": 1}
+
+        assert FieldCaps(1024).cap(value) is value
+
+    def test_long_string_keeps_prefix_and_marker(self):
+        caps = FieldCaps(1024)
+
+        capped = caps.cap(IMAGE)
+
+        assert len(capped) <= 1024
+        assert capped.startswith(IMAGE[:900])
+        assert elision(capped) == {"bytes": len(IMAGE), "hash": content_hash(IMAGE)}
+        assert caps.elided == 1
+
+    def test_string_length_is_counted_in_utf8_bytes(self):
+        text = "é" * 1000
+
+        capped = FieldCaps(1024).cap(text)
+
+        assert elision(capped)["bytes"] == 2000
+        assert len(capped.encode()) <= 1024
+
+    def test_long_array_keeps_leading_items(self):
+        items = [{"index": i} for i in range(500)]
+
+        capped = FieldCaps(1024).cap(items)
+
+        info = elision(capped)
+        kept = len(capped) - 1
+        assert capped[:kept] == items[:kept]
+        assert info["items"] == 500 - kept
+        assert info["of"] == 500
+        assert len(json.dumps(capped, separators=(",", ":"))) <= 1024
+
+    def test_nested_values_are_capped_without_mutating_input(self):
+        payload = make_payload()
+        request = payload["events"][0]["request"]
+        original = copy.deepcopy(request)
+
+        capped = FieldCaps(4096).cap(request)
+
+        assert request == original
+        assert capped["model"] == "gpt-4o"
+        assert capped["messages"][0] is request["messages"][0]
+        data = capped["messages"][1]["content"][0]["data"]
+        assert elision(data)["bytes"] == len(IMAGE)
+
+    def test_elision_of_plain_values(self):
+        assert elision("text") is None
+        assert elision(["a", "b"]) is None
+        assert elision([]) is None
+
+    def test_from_env(self, monkeypatch):
+        monkeypatch.delenv("SHEPHERD_MAX_FIELD_KB", raising=False)
+        assert FieldCaps.from_env() is None
+
+        monkeypatch.setenv("SHEPHERD_MAX_FIELD_KB", "64")
+        assert FieldCaps.from_env().max_bytes == 64 * 1024
+
+    def test_lazy_values_stay_unparsed_unless_oversized(self):
+        payload = make_payload()
+        payload["events"].append(
+            {**payload["events"][0], "request": {"messages": [{"a": "x" * 2048}]}}
+        )
+        decoder = FastDecoder(lazy_payloads=True)
+        loaded = decoder.loads(json.dumps(payload).encode())
+        small, large = loaded["events"][1]["request"], loaded["events"][0]["request"]
+
+        FieldCaps(4096).sessions_payload(loaded)
+
+        assert loaded["events"][1]["request"] is small and not small.decoded
+        capped = loaded["events"][0]["request"]
+        assert type(capped) is dict
+        assert elision(capped["messages"][1]["content"][0]["data"])["bytes"] == len(IMAGE)
+        assert type(large) is LazyDict
+
+    def test_cap_must_fit_marker(self):
+        with pytest.raises(ValueError):
+            FieldCaps(10)
+
+
+class TestAIOBSCaps:
+    """Tests for caps in the AIOBS client."""
+
+    @pytest.mark.asyncio
+    async def test_get_session_caps_unless_full(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json=make_payload())
+
+        client = AsyncAIOBSClient(
+            api_key="key", transport=httpx.MockTransport(handler), caps=FieldCaps(4096)
+        )
+        async with client:
+            capped = await client.get_session("s1")
+            full = await client.get_session("s1", full=True)
+
+        def image(response):
+            return response.events[0].request["messages"][1]["content"][0]["data"]
+
+        assert elision(image(capped))["hash"] == content_hash(IMAGE)
+        node_image = capped.trace_tree[0].request["messages"][1]["content"][0]["data"]
+        assert elision(node_image) is not None
+        assert image(full) == IMAGE
+
+    def test_session_scan_caps_kept_events(self):
+        scan = SessionScan(caps=FieldCaps(4096))
+
+        scan.feed(json.dumps(make_payload()).encode())
+        response = scan.close()
+
+        data = response.events[0].request["messages"][1]["content"][0]["data"]
+        assert elision(data)["bytes"] == len(IMAGE)
+        node_data = response.trace_tree[0].request["messages"][1]["content"][0]["data"]
+        assert elision(node_data)["bytes"] == len(IMAGE)
+
+    @pytest.mark.asyncio
+    async def test_handler_full_content(self, monkeypatch):
+        monkeypatch.setenv("AIOBS_API_KEY", "key")
+        monkeypatch.setenv("SHEPHERD_MAX_FIELD_KB", "4")
+        payload = json.dumps(make_payload())
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url.path)
+            return httpx.Response(200, content=payload)
+
+        registry = ProviderRegistry(PoolConfig(), transport=httpx.MockTransport(handler))
+        async with registry:
+            with patch("shepherd_mcp.server.get_registry", return_value=registry):
+                for _ in range(2):
+                    await handle_aiobs_get_session({"session_id": "s1"})
+                    await handle_aiobs_get_session({"session_id": "s1", "full_content": True})
+                # Capped and full responses are cached separately.
+                assert len(calls) == 2
+                capped = await registry.aiobs().get_session_records("s1")
+
+        data = capped.events[0].request["messages"][1]["content"][0]["data"]
+        assert elision(data)["bytes"] == len(IMAGE)
+
+
+class TestLangfuseCaps:
+    """Tests for caps in the Langfuse client."""
+
+    def make_trace(self) -> dict:
+        return {
+            "id": "t1",
+            "timestamp": "2024-01-01T00:00:00Z",
+            "input": {"image": IMAGE},
+            "output": "ok",
+            "observations": [
+                {
+                    "id": "o1",
+                    "traceId": "t1",
+                    "type": "GENERATION",
+                    "startTime": "2024-01-01T00:00:00Z",
+                    "input": [{"role": "user", "content": IMAGE}],
+                }
+            ],
+        }
+
+    @pytest.mark.asyncio
+    async def test_get_trace_caps_input_and_observations(self):
+        trace = self.make_trace()
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json=trace)
+
+        client = AsyncLangfuseClient(
+            "pk", "sk", transport=httpx.MockTransport(handler), caps=FieldCaps(4096)
+        )
+        async with client:
+            capped = await client.get_trace("t1")
+            full = await client.get_trace("t1", full=True)
+
+        assert elision(capped.input["image"])["hash"] == content_hash(IMAGE)
+        assert capped.output == "ok"
+        assert elision(capped.observations[0].input[0]["content"]) is not None
+        assert full.input["image"] == IMAGE
+
+    def test_shared_response_is_not_mutated(self):
+        # Concurrent identical GETs share one parsed response dict.
+        trace = self.make_trace()
+
+        capped = FieldCaps(4096).langfuse(trace)
+
+        assert trace["input"]["image"] == IMAGE
+        assert trace["observations"][0]["input"][0]["content"] == IMAGE
+        assert elision(capped["input"]["image"]) is not None
+
+    @pytest.mark.asyncio
+    async def test_handler_full_content(self, monkeypatch):
+        monkeypatch.setenv("LANGFUSE_PUBLIC_KEY", "pk")
+        monkeypatch.setenv("LANGFUSE_SECRET_KEY", "sk")
+        monkeypatch.setenv("SHEPHERD_MAX_FIELD_KB", "4")
+        trace = self.make_trace()
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json=trace)
+
+        registry = ProviderRegistry(PoolConfig(), transport=httpx.MockTransport(handler))
+        async with registry:
+            with patch("shepherd_mcp.server.get_registry", return_value=registry):
+                capped = json.loads((await handle_langfuse_get_trace({"trace_id": "t1"}))[0].text)
+                arguments = {"trace_id": "t1", "full_content": True}
+                full = json.loads((await handle_langfuse_get_trace(arguments))[0].text)
+
+        assert elision(capped["input"]["image"]) is not None
+        assert full["input"]["image"] == IMAGE
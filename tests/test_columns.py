@@ -0,0 +1,99 @@
+"""Tests for the columnar event view."""
+
+import random
+
+import pytest
+
+from shepherd_mcp.models import columns as columns_module
+from shepherd_mcp.models.aiobs import Event, SessionsResponse
+from shepherd_mcp.models.columns import NO_MODEL, EventColumns
+from shepherd_mcp.server import (
+    calc_avg_latency,
+    calc_total_tokens,
+    count_errors,
+    get_model_distribution,
+    get_provider_distribution,
+)
+
+
+def make_events(count: int, seed: int = 11) -> list[Event]:
+    rng = random.Random(seed)
+    events = []
+    for i in range(count):
+        usage = rng.choice(
+            [
+                {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+                {"input_tokens": 7, "output_tokens": 3},
+                {},
+            ]
+        )
+        events.append(
+            Event(
+                provider=rng.choice(["openai", "anthropic", "gemini"]),
+                api="chat.completions.create",
+                request=rng.choice([{"model": "gpt-4o"}, {"model": "claude-3"}, {"x": 1}, {}]),
+                response=rng.choice([{"usage": usage}, None, {}]),
+                error=rng.choice([None, None, "boom"]),
+                started_at=float(i),
+                ended_at=float(i) + 1,
+                duration_ms=rng.uniform(10, 2000),
+                span_id=f"span-{i}",
+                session_id=f"s{i % 7}",
+            )
+        )
+    return events
+
+
+@pytest.fixture(params=["numpy", "array"])
+def backend(request, monkeypatch):
+    """Run a test with NumPy and with the array fallback."""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        if columns_module.np is None:
+            pytest.skip("numpy imported after shepherd_mcp.models.columns")
+    else:
+        monkeypatch.setattr(columns_module, "np", None)
+    return request.param
+
+
+class TestEventColumns:
+    """Tests for EventColumns."""
+
+    def test_aggregates_match_event_loops(self, backend):
+        events = make_events(500)
+        columns = EventColumns(events)
+
+        assert calc_total_tokens(events, columns) == calc_total_tokens(events)
+        assert calc_avg_latency(events, columns) == pytest.approx(calc_avg_latency(events))
+        assert count_errors(events, [], columns) == count_errors(events, [])
+        assert get_provider_distribution(events, columns) == get_provider_distribution(events)
+        assert get_model_distribution(events, columns) == get_model_distribution(events)
+        assert list(get_model_distribution(events, columns)) == list(get_model_distribution(events))
+
+    def test_empty(self, backend):
+        columns = EventColumns([])
+
+        assert len(columns) == 0
+        assert columns.token_totals() == {"input": 0, "output": 0, "total": 0}
+        assert columns.avg_latency() == 0.0
+        assert columns.provider_distribution() == {}
+        assert columns.model_distribution() == {}
+
+    def test_dictionary_encoding(self):
+        events = make_events(50)
+        columns = EventColumns(events)
+
+        for i, event in enumerate(events):
+            assert columns.providers[columns.provider_codes[i]] == event.provider
+            assert columns.session_ids[columns.session_codes[i]] == event.session_id
+            if event.request:
+                assert columns.models[columns.model_codes[i]] == event.request.get(
+                    "model", "unknown"
+                )
+            else:
+                assert columns.model_codes[i] == NO_MODEL
+
+    def test_built_once_per_response(self):
+        response = SessionsResponse(events=make_events(10))
+        assert response.columns is response.columns
+        assert len(response.columns) == 10
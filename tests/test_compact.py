@@ -0,0 +1,228 @@
+"""Tests for compact AIOBS session records."""
+
+import json
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from shepherd_mcp.cache import estimate_size
+from shepherd_mcp.models.aiobs import SessionsResponse
+from shepherd_mcp.models.compact import EventRecord, SessionRecords, TraceNodeRecord
+from shepherd_mcp.providers.aiobs import SessionPage, filter_sessions
+from shepherd_mcp.providers.registry import PoolConfig, ProviderRegistry
+from shepherd_mcp.server import (
+    compute_session_diff,
+    get_trace_depth,
+    handle_aiobs_get_session,
+    handle_aiobs_list_sessions,
+    handle_aiobs_search_sessions,
+    trace_node_to_dict,
+)
+from shepherd_mcp.store import RecordStore
+
+
+def make_event(span_id: str, parent: str | None = None, **kwargs) -> dict:
+    return {
+        "provider": "openai",
+        "api": "chat.completions.create",
+        "request": {
+            "model": "gpt-4o",
+            "messages": [{"role": "system", "content": "You are terse. " * 20}],
+        },
+        "response": {"model": "gpt-4o", "usage": {"total_tokens": 30}},
+        "started_at": 10.0,
+        "ended_at": 11.0,
+        "duration_ms": 1000.0,
+        "span_id": span_id,
+        "parent_span_id": parent,
+        "session_id": "s1",
+        "evaluations": [{"eval_type": "tone", "passed": True}],
+        **kwargs,
+    }
+
+
+def make_function_event(span_id: str) -> dict:
+    return {
+        "provider": "function",
+        "api": "call",
+        "name": "plan",
+        "module": "agent",
+        "args": [1],
+        "kwargs": {"deep": True},
+        "result": {"steps": [1, 2]},
+        "started_at": 9.0,
+        "ended_at": 12.0,
+        "duration_ms": 3000.0,
+        "span_id": span_id,
+        "session_id": "s1",
+    }
+
+
+def as_node(item: dict, children: list | None = None, **kwargs) -> dict:
+    node = {k: v for k, v in item.items() if k != "callsite"}
+    return {**node, "event_type": kwargs.pop("event_type", None), "children": children or []}
+
+
+def make_payload(llm_calls: int = 5) -> dict:
+    root = make_function_event("root")
+    events = [make_event(f"llm-{i}", parent="root") for i in range(llm_calls)]
+    # A tree-only node with no matching event keeps its own data.
+    orphan = make_event("orphan", parent="root")
+    return {
+        "sessions": [{"id": "s1", "name": "run", "started_at": 9.0, "ended_at": 12.0}],
+        "events": events,
+        "function_events": [root],
+        "trace_tree": [
+            as_node(
+                root,
+                [as_node(e, event_type="provider") for e in events] + [as_node(orphan)],
+                event_type="function",
+            )
+        ],
+        "generated_at": 20.0,
+    }
+
+
+@pytest.fixture
+def response() -> SessionsResponse:
+    # Decoded from JSON so equal strings are distinct objects, as in production.
+    return SessionsResponse.model_validate_json(json.dumps(make_payload()))
+
+
+class TestSessionRecords:
+    """Tests for SessionRecords."""
+
+    def test_round_trip(self, response):
+        records = SessionRecords.from_response(response)
+
+        assert records.to_response().model_dump() == response.model_dump()
+
+    def test_trace_nodes_refer_to_events(self, response):
+        records = SessionRecords.from_response(response)
+        root = records.trace_tree[0]
+
+        assert root.record is records.function_events[0]
+        assert all(
+            child.record is event
+            for child, event in zip(root.children[:-1], records.events, strict=True)
+        )
+        assert not isinstance(root.children[-1].record, EventRecord)
+        assert root.children[-1].span_id == "orphan"
+        # Fields the referenced event does not have read as None.
+        assert root.children[0].name is None
+        assert root.name == "plan"
+
+    def test_node_differing_from_its_event_keeps_own_data(self):
+        payload = make_payload(1)
+        payload["trace_tree"][0]["children"][0]["duration_ms"] = 5.0
+        response = SessionsResponse(**payload)
+
+        records = SessionRecords.from_response(response)
+
+        node = records.trace_tree[0].children[0]
+        assert node.record is not records.events[0]
+        assert node.duration_ms == 5.0
+
+    def test_strings_are_interned(self, response):
+        records = SessionRecords.from_response(response)
+
+        first, second = records.events[:2]
+        assert first.provider is second.provider
+        assert first.session_id is second.session_id
+
+    def test_helpers_give_the_same_results(self, response):
+        records = SessionRecords.from_response(response)
+        other = SessionsResponse(**make_payload(2))
+
+        assert compute_session_diff(records, other) == compute_session_diff(response, other)
+        assert [trace_node_to_dict(n) for n in records.trace_tree] == [
+            trace_node_to_dict(n) for n in response.trace_tree
+        ]
+        assert get_trace_depth(records.trace_tree) == get_trace_depth(response.trace_tree) == 2
+        assert records.index.entry("s1").event_count == 5
+
+    def test_uses_less_memory(self):
+        # Small enough for estimate_size to count every item instead of sampling.
+        response = SessionsResponse.model_validate_json(json.dumps(make_payload(20)))
+        records = SessionRecords.from_response(response)
+
+        assert estimate_size(records) < estimate_size(response) * 0.7
+
+    def test_record_store_round_trip(self, tmp_path, response):
+        store = RecordStore(tmp_path / "records.sqlite3")
+        records = SessionRecords.from_response(response)
+
+        store.put("aiobs.get_session_records", "acct", "s1", records)
+        loaded = store.get("aiobs.get_session_records", "acct", "s1", SessionRecords)
+
+        assert isinstance(loaded, SessionRecords)
+        assert isinstance(loaded.trace_tree[0], TraceNodeRecord)
+        assert loaded.events == records.events
+
+    def test_filter_and_page_keep_records(self, response):
+        records = SessionRecords.from_response(response)
+
+        filtered = filter_sessions(records, provider="openai")
+        paged = SessionPage(limit=1).apply(records)
+
+        assert isinstance(filtered, SessionRecords)
+        assert filtered.events == records.events
+        assert isinstance(paged, SessionRecords)
+        assert [s.id for s in paged.sessions] == ["s1"]
+        assert paged.total == 1
+
+
+class TestGetSessionHandler:
+    """Tests for aiobs_get_session running on records."""
+
+    @pytest.mark.asyncio
+    async def test_handler_runs_on_records(self, monkeypatch):
+        monkeypatch.setenv("AIOBS_API_KEY", "key")
+        payload = make_payload()
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            assert request.url.path == "/v1/sessions/s1/tree"
+            return httpx.Response(200, json=payload)
+
+        registry = ProviderRegistry(PoolConfig(), transport=httpx.MockTransport(handler))
+        async with registry:
+            with patch("shepherd_mcp.server.get_registry", return_value=registry):
+                result = json.loads((await handle_aiobs_get_session({"session_id": "s1"}))[0].text)
+                records = await registry.aiobs().get_session_records("s1")
+
+        assert result["summary"]["total_llm_calls"] == 5
+        assert result["trace_tree"] == [trace_node_to_dict(n) for n in records.trace_tree]
+        assert result["trace_tree"][0]["children"][0]["model"] == "gpt-4o"
+
+
+class TestSessionListHandlers:
+    """Tests for aiobs_list_sessions and aiobs_search_sessions caching records."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        ("handle", "arguments"),
+        [
+            (handle_aiobs_list_sessions, {}),
+            (handle_aiobs_search_sessions, {"provider": "openai"}),
+            (handle_aiobs_search_sessions, {"limit": 1}),
+        ],
+    )
+    async def test_handlers_cache_records(self, monkeypatch, handle, arguments):
+        monkeypatch.setenv("AIOBS_API_KEY", "key")
+        payload = make_payload()
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json=payload)
+
+        registry = ProviderRegistry(PoolConfig(), transport=httpx.MockTransport(handler))
+        async with registry:
+            with (
+                patch("shepherd_mcp.server.get_registry", return_value=registry),
+                patch.object(registry.cache, "put", wraps=registry.cache.put) as put,
+            ):
+                result = json.loads((await handle(arguments))[0].text)
+
+        assert [s["id"] for s in result["sessions"]] == ["s1"]
+        put.assert_called_once()
+        assert isinstance(put.call_args.args[2], SessionRecords)
@@ -0,0 +1,252 @@
+"""Tests for fast and lazy decoding of AIOBS sessions payloads."""
+
+import copy
+import gc
+import json
+import random
+
+import pytest
+from pydantic import ValidationError
+
+from shepherd_mcp.cache import estimate_size
+from shepherd_mcp.models.aiobs import SessionsResponse
+from shepherd_mcp.models.decode import FastDecoder, decode_sessions
+from shepherd_mcp.models.lazy import MAX_DEPTH, LazyDict, LazyList, loads_lazy
+from shepherd_mcp.providers.aiobs import AsyncAIOBSClient
+from shepherd_mcp.server import calc_total_tokens, extract_responses, get_model_distribution
+from tests.aiobs_server import FakeAIOBSServer
+
+
+def make_node(span_id: str, children: list | None = None) -> dict:
+    return {
+        "provider": "function",
+        "api": "call",
+        "name": span_id,
+        "started_at": 1.0,
+        "ended_at": 2.0,
+        "duration_ms": 1000.0,
+        "span_id": span_id,
+        "session_id": "s1",
+        "children": children or [],
+    }
+
+
+def make_payload() -> dict:
+    server = FakeAIOBSServer()
+    for i in range(20):
+        server.add_session(f"s{i}", 1_700_000_000.0 + i, ended_at=1_700_000_100.0 + i)
+    payload = server._sessions_payload(None)
+    payload["events"][0]["callsite"] = {"file": "agent.py", "line": 3, "function": "run"}
+    payload["events"][1]["error"] = "boom"
+    payload["events"][2]["new_backend_field"] = True
+    payload["trace_tree"] = [make_node("root", [make_node("a", [make_node("b")]), make_node("c")])]
+    return payload
+
+
+class TestFastDecoder:
+    """Tests for FastDecoder."""
+
+    def test_matches_validated_decode(self):
+        payload = make_payload()
+        validated = SessionsResponse(**copy.deepcopy(payload))
+        decoder = FastDecoder(rng=random.Random(0))
+
+        decoded = decoder.decode(payload)
+
+        assert decoded.model_dump() == validated.model_dump()
+        assert decoded.events[0].callsite.function == "run"
+        assert decoded.trace_tree[0].children[0].children[0].span_id == "b"
+        for fast, slow in zip(decoded.events, validated.events, strict=True):
+            assert fast.model_fields_set == slow.model_fields_set
+        assert decoder.snapshot() == {"fast_decodes": 1, "fallbacks": 0}
+
+    def test_missing_required_field_falls_back(self):
+        payload = make_payload()
+        del payload["events"][5]["span_id"]
+        decoder = FastDecoder()
+
+        with pytest.raises(ValidationError):
+            decoder.decode(payload)
+        assert decoder.fallbacks == 1
+
+    def test_drift_in_sample_falls_back_to_full_validation(self):
+        payload = make_payload()
+        for session in payload["sessions"]:
+            session["started_at"] = str(session["started_at"])
+        decoder = FastDecoder(sample_size=1)
+
+        decoded = decoder.decode(payload)
+
+        assert decoder.fallbacks == 1
+        assert all(isinstance(s.started_at, float) for s in decoded.sessions)
+
+    def test_restores_garbage_collector(self):
+        assert gc.isenabled()
+        FastDecoder().decode(make_payload())
+        assert gc.isenabled()
+
+    def test_from_env(self, monkeypatch):
+        monkeypatch.delenv("SHEPHERD_AIOBS_FAST_DECODE", raising=False)
+        assert FastDecoder.from_env() is None
+
+        monkeypatch.setenv("SHEPHERD_AIOBS_FAST_DECODE", "1")
+        monkeypatch.setenv("SHEPHERD_AIOBS_DECODE_SAMPLE", "4")
+        assert FastDecoder.from_env().sample_size == 4
+
+    def test_decode_sessions_without_decoder_validates(self):
+        with pytest.raises(ValidationError):
+            decode_sessions({"sessions": [{"id": "s1"}]})
+
+
+class TestClientDecoder:
+    """Tests for AsyncAIOBSClient with a decoder."""
+
+    @pytest.mark.asyncio
+    async def test_client_uses_decoder(self):
+        server = FakeAIOBSServer()
+        server.add_session("s1", server.now - 10, ended_at=server.now)
+        decoder = FastDecoder()
+        client = AsyncAIOBSClient(api_key="key", transport=server.transport, decoder=decoder)
+        async with client:
+            response = await client.list_sessions()
+
+        assert [s.id for s in response.sessions] == ["s1"]
+        assert decoder.fast_decodes == 1
+
+
+def make_big_event(i: int) -> dict:
+    return {
+        "provider": "openai",
+        "api": "chat.completions.create",
+        "request": {
+            "model": "gpt-4o",
+            "messages": [
+                {"role": "system", "content": "You are a careful agent. " * 60},
+                {"role": "user", "content": f"question {i}"},
+            ],
+            "temperature": 0.1,
+        },
+        "response": {
+            "model": "gpt-4o-2024",
+            "usage": {"prompt_tokens": 200, "completion_tokens": 20, "total_tokens": 220},
+            "choices": [{"message": {"content": "answer " * 200}, "finish_reason": "stop"}],
+        },
+        "started_at": float(i),
+        "ended_at": i + 1.0,
+        "duration_ms": 1000.0,
+        "span_id": f"span-{i}",
+        "session_id": "s1",
+    }
+
+
+class TestLazyPayloads:
+    """Tests for lazily decoded payload fields."""
+
+    FIELDS = {"events": ("request", "response"), "trace_tree": ("request", "result")}
+
+    def load(self, document) -> dict:
+        return loads_lazy(json.dumps(document).encode(), self.FIELDS, {"trace_tree": "children"})
+
+    def test_lazy_dict_reads_hot_keys_without_decoding(self):
+        value = make_big_event(0)["response"]
+        wrapped = self.load({"events": [{"response": value}]})["events"][0]["response"]
+
+        assert isinstance(wrapped, LazyDict)
+        assert wrapped["usage"]["total_tokens"] == 220
+        assert wrapped.get("model") == "gpt-4o-2024"
+        assert "choices" in wrapped and "content" not in wrapped
+        assert list(wrapped) == list(value) and len(wrapped) == len(value)
+        assert wrapped.finish_reason == "stop"
+        assert wrapped.get("missing", 1) == 1
+        assert not wrapped.decoded
+
+        assert wrapped["choices"] == value["choices"]
+        assert wrapped.decoded
+        assert wrapped == value
+
+    def test_raw_bytes_are_slices_of_the_document(self):
+        value = {"model": "m", "messages": [{"role": "user", "content": 'a "quoted" \\ }' * 100}]}
+        content = json.dumps({"events": [{"request": value, "span_id": "x"}]}).encode()
+
+        event = loads_lazy(content, self.FIELDS)["events"][0]
+
+        assert event["request"]._raw in content
+        assert event["request"].decode() == value
+        assert event["span_id"] == "x"
+
+    def test_only_selected_fields_are_wrapped(self):
+        document = {
+            "sessions": [{"id": "s1", "meta": {"request": {"nested": ["x" * 2048]}}}],
+            "events": [{"request": {"model": "gpt-4o"}, "response": None, "meta": {"a": [1]}}],
+        }
+
+        loaded = self.load(document)
+
+        assert loaded == document
+        assert type(loaded["sessions"][0]["meta"]["request"]) is dict
+        # Flat values are cheap to keep and gain nothing from wrapping.
+        assert type(loaded["events"][0]["request"]) is dict
+
+    def test_lazy_list_and_trace_children(self):
+        docs = [{"doc": "x" * 100, "rank": i} for i in range(10)]
+        child = {"span_id": "b", "result": docs, "children": []}
+        document = {"trace_tree": [{"span_id": "a", "result": [], "children": [child]}]}
+
+        root = self.load(document)["trace_tree"][0]
+
+        wrapped = root["children"][0]["result"]
+        assert isinstance(wrapped, LazyList)
+        assert len(wrapped) == 10 and not wrapped.decoded
+        assert wrapped[3]["rank"] == 3
+        assert wrapped == docs
+        assert root["result"] == []
+
+    def test_values_nested_past_max_depth(self):
+        deep: dict = {"leaf": "x" * 2048}
+        for _ in range(MAX_DEPTH + 2):
+            deep = {"model": "m", "next": [deep]}
+
+        wrapped = self.load({"events": [{"request": deep}]})["events"][0]["request"]
+
+        assert isinstance(wrapped, LazyDict)
+        assert wrapped["model"] == "m" and list(wrapped) == ["model", "next"]
+        assert wrapped == deep
+
+    def test_invalid_json_raises(self):
+        with pytest.raises(ValueError):
+            loads_lazy(b'{"events": [{"request": {"a": [1}', self.FIELDS)
+
+    @pytest.mark.parametrize("depth", [1, MAX_DEPTH + 2])
+    def test_mismatched_bracket_in_large_value_raises(self, depth):
+        value = b'{"a": ["' + b"x" * 2048 + b'"}]' + b"}" * depth
+        content = b'{"events": [{"request": ' + b'{"b": ' * (depth - 1) + value + b"]}"
+
+        with pytest.raises(ValueError):
+            loads_lazy(content, self.FIELDS)
+
+    def test_decode_with_lazy_payloads(self):
+        payload = {"events": [make_big_event(i) for i in range(50)]}
+        validated = SessionsResponse(**copy.deepcopy(payload))
+        decoder = FastDecoder(lazy_payloads=True)
+
+        decoded = decoder.decode(decoder.loads(json.dumps(payload).encode()))
+
+        assert decoder.fast_decodes == 1
+        assert isinstance(decoded.events[0].request, LazyDict)
+        assert calc_total_tokens(decoded.events) == calc_total_tokens(validated.events)
+        assert get_model_distribution(decoded.events) == get_model_distribution(validated.events)
+        assert not any(e.request.decoded or e.response.decoded for e in decoded.events)
+        assert extract_responses(decoded.events) == extract_responses(validated.events)
+        assert decoded.model_dump() == validated.model_dump()
+        assert estimate_size(decoded) < estimate_size(validated)
+
+    def test_drift_with_lazy_payloads_falls_back(self):
+        payload = {"events": [make_big_event(i) for i in range(5)]}
+        payload["events"][0]["started_at"] = "0"
+        decoder = FastDecoder(sample_size=5, lazy_payloads=True)
+
+        decoded = decoder.decode(decoder.loads(json.dumps(payload).encode()))
+
+        assert decoder.fallbacks == 1
+        assert type(decoded.events[0].request) is dict
+        assert decoded.events[0].started_at == 0.0
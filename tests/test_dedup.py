@@ -0,0 +1,109 @@
+"""Tests for sharing repeated values in AIOBS sessions payloads."""
+
+import copy
+import json
+
+from shepherd_mcp.cache import estimate_size
+from shepherd_mcp.models.aiobs import SessionsResponse
+from shepherd_mcp.models.decode import FastDecoder, decode_sessions
+from shepherd_mcp.models.dedup import PayloadPool, content_hash, dedup_payload
+
+SYSTEM_PROMPT = "You are a careful research agent. Cite your sources. " * 20
+TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": f"tool_{i}",
+            "description": "Look something up. " * 5,
+            "parameters": {"type": "object", "properties": {"q": {"type": "string"}}},
+        },
+    }
+    for i in range(4)
+]
+
+
+def make_payload(events: int = 30) -> dict:
+    payload = {
+        "sessions": [{"id": "s1", "name": "run", "started_at": 0.0}],
+        "events": [
+            {
+                "provider": "openai",
+                "api": "chat.completions.create",
+                "request": {
+                    "model": "gpt-4o",
+                    "messages": [
+                        {"role": "system", "content": SYSTEM_PROMPT},
+                        {"role": "user", "content": f"question {i}"},
+                    ],
+                    "tools": TOOLS,
+                },
+                "response": {"model": "gpt-4o", "finish_reason": "stop"},
+                "started_at": float(i),
+                "ended_at": i + 1.0,
+                "duration_ms": 1000.0,
+                "span_id": f"llm-{i}",
+                "session_id": "s1",
+            }
+            for i in range(events)
+        ],
+        "function_events": [],
+    }
+    # Parsed from JSON, like a response body, so no values start out shared.
+    return json.loads(json.dumps(payload))
+
+
+class TestDedupPayload:
+    """Tests for dedup_payload."""
+
+    def test_shares_repeated_prompts_and_tools(self):
+        payload = make_payload()
+        original = copy.deepcopy(payload)
+
+        pool = dedup_payload(payload)
+
+        assert payload == original
+        first, second = (e["request"] for e in payload["events"][:2])
+        assert first["messages"][0] is second["messages"][0]
+        assert first["tools"] is second["tools"]
+        assert first["messages"][1] is not second["messages"][1]
+        assert payload["events"][0]["provider"] is payload["events"][1]["provider"]
+        assert first["messages"][1]["role"] is second["messages"][1]["role"]
+        assert pool.shared >= 2 * 29
+
+    def test_shares_values_that_are_not_consecutive(self):
+        payload = make_payload(3)
+        payload["events"][1]["request"]["tools"] = TOOLS[:1]
+
+        dedup_payload(payload)
+
+        tools = [e["request"]["tools"] for e in payload["events"]]
+        assert tools[0] is tools[2]
+        assert tools[0] is not tools[1]
+
+    def test_small_objects_are_not_pooled(self):
+        pool = PayloadPool()
+        a = {"role": "user", "content": "hi"}
+        b = {"role": "user", "content": "hi"}
+
+        assert pool.pooled(a, 0) is a
+        assert pool.pooled(b, 0) is b
+        assert a["role"] is b["role"]
+
+
+class TestDecodeWithDedup:
+    """Tests for dedup as part of decoding."""
+
+    def test_decoded_events_share_payloads(self):
+        plain = SessionsResponse(**make_payload())
+
+        for decoder in (None, FastDecoder()):
+            response = decode_sessions(make_payload(), decoder)
+
+            first, second = (e.request for e in response.events[:2])
+            assert first["tools"] is second["tools"]
+            assert response.model_dump() == plain.model_dump()
+            assert estimate_size(response) < estimate_size(plain) / 2
+
+    def test_content_hash(self):
+        assert content_hash(SYSTEM_PROMPT) == content_hash(SYSTEM_PROMPT + "")
+        assert content_hash("a") != content_hash("b")
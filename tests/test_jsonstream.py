@@ -0,0 +1,97 @@
+"""Tests for incremental JSON parsing of sessions payloads."""
+
+import json
+
+import pytest
+
+from shepherd_mcp.providers.jsonstream import JSONItemStream
+
+DOCUMENT = {
+    "generated_at": 1_700_000_000.125,
+    "sessions": [
+        {"id": f"s{i}", "name": "café " * i, "meta": {"n": [1, -2.5e3, None]}} for i in range(20)
+    ],
+    "events": [],
+    "function_events": [{"args": ['quote " and \\ backslash'], "ok": True}],
+    "trace_tree": [{"children": [{"children": []}]}],
+    "version": 12345,
+}
+STREAMED = ("sessions", "events", "function_events")
+
+
+def parse(raw: bytes, chunk_size: int) -> tuple[JSONItemStream, list]:
+    stream = JSONItemStream(STREAMED)
+    values = []
+    for start in range(0, len(raw), chunk_size):
+        values.extend(stream.feed(raw[start : start + chunk_size]))
+    values.extend(stream.close())
+    return stream, values
+
+
+def rebuild(values: list) -> dict:
+    document = {key: [] for key in STREAMED}
+    for key, value in values:
+        if key in STREAMED:
+            document[key].append(value)
+        else:
+            document[key] = value
+    return document
+
+
+class TestJSONItemStream:
+    """Tests for JSONItemStream."""
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 100_000])
+    def test_matches_json_loads_at_any_chunk_size(self, chunk_size):
+        raw = json.dumps(DOCUMENT, ensure_ascii=False, indent=1).encode()
+
+        stream, values = parse(raw, chunk_size)
+
+        assert rebuild(values) == DOCUMENT
+        assert stream.completed == set(DOCUMENT)
+
+    def test_completed_tracks_values_as_they_are_yielded(self):
+        stream = JSONItemStream(STREAMED)
+        seen = [
+            (key, "sessions" in stream.completed)
+            for key, _ in stream.feed(b'{"events": [1], "sessions": [2], "function_events": [3]}')
+        ]
+
+        assert seen == [("events", False), ("sessions", False), ("function_events", True)]
+
+    def test_yields_items_before_the_body_ends(self):
+        raw = json.dumps(DOCUMENT).encode()
+        stream = JSONItemStream(STREAMED)
+
+        values = list(stream.feed(raw[: raw.index(b'"s3"')]))
+
+        assert [value["id"] for key, value in values if key == "sessions"] == ["s0", "s1", "s2"]
+        assert "sessions" not in stream.completed
+
+    def test_number_split_across_chunks(self):
+        stream = JSONItemStream(STREAMED)
+
+        values = list(stream.feed(b'{"sessions": [12'))
+        assert values == []
+        values += stream.feed(b".5, 7")
+        values += stream.feed(b"]}")
+        values += stream.close()
+
+        assert values == [("sessions", 12.5), ("sessions", 7)]
+
+    def test_streamed_key_with_non_array_value(self):
+        stream = JSONItemStream(STREAMED)
+
+        values = list(stream.feed(b'{"events": null, "version": 2}'))
+
+        assert values == [("events", None), ("version", 2)]
+
+    @pytest.mark.parametrize(
+        "body",
+        [b'{"sessions": [{"id": "s1"}', b'{"version": 1', b"[1, 2]", b'{"a": 1} trailing'],
+    )
+    def test_malformed_body_raises(self, body):
+        stream = JSONItemStream(STREAMED)
+        with pytest.raises(ValueError):
+            list(stream.feed(body))
+            stream.close()
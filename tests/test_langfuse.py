@@ -1,9 +1,14 @@
 """Tests for Langfuse provider and models."""
 
-from unittest.mock import Mock, patch
+import asyncio
+import json
+from contextlib import aclosing
+from unittest.mock import AsyncMock, Mock, patch
 
+import httpx
 import pytest
 
+from shepherd_mcp.cache import ResponseCache
 from shepherd_mcp.models.langfuse import (
     LangfuseObservation,
     LangfuseObservationsResponse,
@@ -19,8 +24,9 @@ from shepherd_mcp.providers.base import (
     NotFoundError,
     ProviderError,
     RateLimitError,
+    RetryPolicy,
 )
-from shepherd_mcp.providers.langfuse import LangfuseClient
+from shepherd_mcp.providers.langfuse import AsyncLangfuseClient, LangfuseClient, TraceCursor
 from shepherd_mcp.server import (
     _session_matches_query,
     _trace_matches_query,
@@ -809,6 +815,171 @@ class TestLangfuseClientScoresAPI:
         assert result.comment == "Good response"
 
 
+class TestAsyncLangfuseClient:
+    """Tests for AsyncLangfuseClient."""
+
+    def setup_method(self):
+        self.client = AsyncLangfuseClient(
+            public_key="pk-test",
+            secret_key="sk-test",
+        )
+
+    def test_shares_sync_configuration(self):
+        sync_client = LangfuseClient(public_key="pk-test", secret_key="sk-test")
+        assert self.client.name == "langfuse"
+        assert self.client.host == sync_client.host
+        assert self.client._auth_header == sync_client._auth_header
+        sync_client.close()
+
+    @pytest.mark.asyncio
+    async def test_list_traces_builds_same_params(self):
+        with patch.object(AsyncLangfuseClient, "_get", new_callable=AsyncMock) as mock_get:
+            mock_get.return_value = {
+                "data": [{"id": "t1", "timestamp": "2025-01-01T00:00:00Z"}],
+                "meta": {"page": 1},
+            }
+
+            result = await self.client.list_traces(
+                limit=10, user_id="user-123", from_timestamp="2025-01-01"
+            )
+
+        assert result.data[0].id == "t1"
+        path, params = mock_get.call_args[0]
+        assert path == "/api/public/traces"
+        assert params == {
+            "limit": 10,
+            "page": 1,
+            "userId": "user-123",
+            "fromTimestamp": "2025-01-01T00:00:00Z",
+        }
+        await self.client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_get_observation_over_http(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            assert request.headers["Authorization"] == self.client._auth_header
+            assert request.url.path == "/api/public/observations/obs-1"
+            return httpx.Response(
+                200,
+                json={
+                    "id": "obs-1",
+                    "traceId": "t1",
+                    "type": "GENERATION",
+                    "startTime": "2025-01-01T00:00:00Z",
+                },
+            )
+
+        self.client._client = httpx.AsyncClient(
+            transport=httpx.MockTransport(handler), headers=self.client._headers
+        )
+        async with self.client as client:
+            obs = await client.get_observation("obs-1")
+
+        assert obs.id == "obs-1"
+        assert obs.trace_id == "t1"
+
+    @pytest.mark.asyncio
+    async def test_error_response_raises(self):
+        self.client.retry_policy = RetryPolicy(max_retries=0)
+        self.client._client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(429))
+        )
+        async with self.client as client:
+            with pytest.raises(RateLimitError):
+                await client.get_score("score-1")
+
+
+class TestLangfuseIterators:
+    """Tests for the auto-paginating iterators of AsyncLangfuseClient."""
+
+    def setup_method(self):
+        self.client = AsyncLangfuseClient(public_key="pk-test", secret_key="sk-test")
+        self.requested = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def patch_list(self, pages: int, per_page: int = 2, total_pages: int | None = -1):
+        async def list_traces(limit=50, page=1, **kwargs):
+            self.requested.append(page)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            # Later pages answer first, so ordering does not rely on arrival.
+            await asyncio.sleep(0.001 * (pages - page))
+            self.in_flight -= 1
+            count = per_page if page <= pages else 0
+            meta = {"page": page}
+            if total_pages is not None:
+                meta["totalPages"] = pages if total_pages == -1 else total_pages
+            return LangfuseTracesResponse(
+                data=[
+                    LangfuseTrace(id=f"t{page}-{i}", timestamp="2025-01-01T00:00:00Z")
+                    for i in range(count)
+                ],
+                meta=meta,
+            )
+
+        return patch.object(self.client, "list_traces", side_effect=list_traces)
+
+    @pytest.mark.asyncio
+    async def test_yields_every_item_in_page_order(self):
+        with self.patch_list(pages=10):
+            ids = [trace.id async for trace in self.client.iter_traces(limit=2, prefetch=3)]
+
+        assert ids == [f"t{page}-{i}" for page in range(1, 11) for i in range(2)]
+        assert sorted(self.requested) == list(range(1, 11))
+        assert self.max_in_flight == 3
+
+    @pytest.mark.asyncio
+    async def test_early_stop_skips_remaining_pages(self):
+        with self.patch_list(pages=50):
+            async with aclosing(self.client.iter_traces(limit=2, prefetch=2)) as traces:
+                ids = []
+                async for trace in traces:
+                    ids.append(trace.id)
+                    if len(ids) == 5:
+                        break
+
+        assert ids == ["t1-0", "t1-1", "t2-0", "t2-1", "t3-0"]
+        assert max(self.requested) <= 5
+
+    @pytest.mark.asyncio
+    async def test_max_pages_and_start_page(self):
+        with self.patch_list(pages=10):
+            pages = [
+                page
+                async for page, _ in self.client.iter_pages(
+                    "list_traces", start_page=3, max_pages=4, limit=2
+                )
+            ]
+
+        assert pages == [3, 4, 5, 6]
+        assert sorted(self.requested) == [3, 4, 5, 6]
+
+    @pytest.mark.asyncio
+    async def test_without_total_pages_reads_until_short_page(self):
+        with self.patch_list(pages=3, total_pages=None):
+            ids = [trace.id async for trace in self.client.iter_traces(limit=2)]
+
+        assert len(ids) == 6
+        assert self.requested == [1, 2, 3, 4]
+        assert self.max_in_flight == 1
+
+    @pytest.mark.asyncio
+    async def test_stops_at_empty_page_when_list_shrinks(self):
+        with self.patch_list(pages=3, total_pages=20):
+            ids = [trace.id async for trace in self.client.iter_traces(limit=2, prefetch=2)]
+
+        assert len(ids) == 6
+        assert max(self.requested) <= 6
+
+    @pytest.mark.asyncio
+    async def test_rejects_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            await anext(self.client.iter_pages("get_trace"))
+        with pytest.raises(ValueError):
+            await anext(self.client.iter_traces(prefetch=0))
+
+
 # ============================================================================
 # Search Helper Function Tests
 # ============================================================================
@@ -960,10 +1131,10 @@ class TestHandleLangfuseSearchTraces:
     @pytest.fixture
     def mock_langfuse_client(self):
         """Create a mock LangfuseClient that doesn't require API keys."""
-        with patch("shepherd_mcp.server.LangfuseClient") as mock_class:
-            mock_instance = Mock()
-            mock_class.return_value.__enter__ = Mock(return_value=mock_instance)
-            mock_class.return_value.__exit__ = Mock(return_value=False)
+        with patch("shepherd_mcp.server.get_registry") as mock_get_registry:
+            mock_instance = AsyncMock()
+            mock_get_registry.return_value.langfuse.return_value = mock_instance
+            mock_get_registry.return_value.cache = ResponseCache()
             yield mock_instance
 
     @pytest.mark.asyncio
@@ -1108,6 +1279,123 @@ class TestHandleLangfuseSearchTraces:
         )
 
 
+class TestHandleLangfuseSearchTracesScan:
+    """Tests for langfuse_search_traces scanning across pages."""
+
+    @pytest.fixture
+    def mock_langfuse_client(self):
+        with patch("shepherd_mcp.server.get_registry") as mock_get_registry:
+            mock_instance = AsyncMock()
+            mock_get_registry.return_value.langfuse.return_value = mock_instance
+            mock_get_registry.return_value.cache = ResponseCache()
+            yield mock_instance
+
+    def serve_pages(self, client, pages: int, expensive: set[str]):
+        """Serve `pages` pages of traces; traces in `expensive` cost $2."""
+
+        async def list_traces(limit=50, page=1, **kwargs):
+            traces = [
+                LangfuseTrace(
+                    id=f"t{(page - 1) * limit + i}",
+                    timestamp="2025-01-01T00:00:00Z",
+                    totalCost=2.0 if f"t{(page - 1) * limit + i}" in expensive else 0.01,
+                )
+                for i in range(limit if page <= pages else 0)
+            ]
+            return LangfuseTracesResponse(data=traces, meta={"page": page, "totalPages": pages})
+
+        client.list_traces.side_effect = list_traces
+
+    async def search(self, arguments: dict) -> dict:
+        return json.loads((await handle_langfuse_search_traces(arguments))[0].text)
+
+    @pytest.mark.asyncio
+    async def test_scans_past_first_page(self, mock_langfuse_client):
+        self.serve_pages(mock_langfuse_client, pages=10, expensive={"t350", "t351"})
+
+        data = await self.search({"min_cost": 1.0, "limit": 1})
+
+        assert [t["id"] for t in data["traces"]] == ["t350"]
+        assert data["scanned"] == 351
+        assert data["pages_scanned"] == 4
+        assert data["stopped"] == "limit"
+        requested = [c.kwargs["page"] for c in mock_langfuse_client.list_traces.call_args_list]
+        assert set(range(1, 5)) <= set(requested)
+        assert all(
+            c.kwargs["limit"] == 100 for c in mock_langfuse_client.list_traces.call_args_list
+        )
+
+        # Resuming from the cursor picks up right after the last match.
+        resumed = await self.search({"min_cost": 1.0, "limit": 5, "cursor": data["next_cursor"]})
+
+        assert [t["id"] for t in resumed["traces"]] == ["t351"]
+        assert resumed["scanned"] == 1000 - 351
+        assert resumed["stopped"] == "exhausted"
+        assert resumed["next_cursor"] is None
+
+    @pytest.mark.asyncio
+    async def test_stops_at_scan_budget(self, mock_langfuse_client):
+        self.serve_pages(mock_langfuse_client, pages=10, expensive={"t900"})
+
+        data = await self.search({"min_cost": 1.0, "max_scanned": 250})
+
+        assert data["total_matches"] == 0
+        assert data["scanned"] == 250
+        assert data["stopped"] == "max_scanned"
+        assert TraceCursor.decode(data["next_cursor"]) == TraceCursor(3, 50, 100)
+        requested = {c.kwargs["page"] for c in mock_langfuse_client.list_traces.call_args_list}
+        assert max(requested) == 3
+
+        data = await self.search({"min_cost": 1.0, "max_pages": 2})
+
+        assert data["scanned"] == 200
+        assert data["stopped"] == "max_pages"
+        assert TraceCursor.decode(data["next_cursor"]) == TraceCursor(3, 0, 100)
+
+    @pytest.mark.asyncio
+    async def test_without_client_side_filters_reads_one_page(self, mock_langfuse_client):
+        self.serve_pages(mock_langfuse_client, pages=10, expensive=set())
+
+        data = await self.search({"limit": 20, "page": 3})
+
+        assert data["traces"][0]["id"] == "t40"
+        assert data["scanned"] == 20
+        assert TraceCursor.decode(data["next_cursor"]) == TraceCursor(4, 0, 20)
+        mock_langfuse_client.list_traces.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_page_counts_limit_sized_pages(self, mock_langfuse_client):
+        self.serve_pages(mock_langfuse_client, pages=10, expensive={"t39", "t40"})
+
+        data = await self.search({"min_cost": 1.0, "limit": 20, "page": 3})
+
+        assert [t["id"] for t in data["traces"]] == ["t40"]
+        assert mock_langfuse_client.list_traces.call_args_list[0].kwargs["page"] == 1
+
+    @pytest.mark.asyncio
+    async def test_time_budget_bounds_page_waits(self, mock_langfuse_client):
+        self.serve_pages(mock_langfuse_client, pages=10, expensive=set())
+        serve = mock_langfuse_client.list_traces.side_effect
+
+        async def list_traces(limit=50, page=1, **kwargs):
+            if page > 1:
+                await asyncio.sleep(60)
+            return await serve(limit=limit, page=page, **kwargs)
+
+        mock_langfuse_client.list_traces.side_effect = list_traces
+
+        data = await asyncio.wait_for(self.search({"min_cost": 1.0, "max_seconds": 0.05}), 5)
+
+        assert data["stopped"] == "max_seconds"
+        assert data["scanned"] == 100
+        assert TraceCursor.decode(data["next_cursor"]) == TraceCursor(2, 0, 100)
+
+    @pytest.mark.asyncio
+    async def test_invalid_cursor(self, mock_langfuse_client):
+        with pytest.raises(ValueError):
+            await self.search({"cursor": "not-a-cursor"})
+
+
 class TestHandleLangfuseSearchSessions:
     """Tests for handle_langfuse_search_sessions handler."""
 
@@ -1144,10 +1432,10 @@ class TestHandleLangfuseSearchSessions:
     @pytest.fixture
     def mock_langfuse_client(self):
         """Create a mock LangfuseClient that doesn't require API keys."""
-        with patch("shepherd_mcp.server.LangfuseClient") as mock_class:
-            mock_instance = Mock()
-            mock_class.return_value.__enter__ = Mock(return_value=mock_instance)
-            mock_class.return_value.__exit__ = Mock(return_value=False)
+        with patch("shepherd_mcp.server.get_registry") as mock_get_registry:
+            mock_instance = AsyncMock()
+            mock_get_registry.return_value.langfuse.return_value = mock_instance
+            mock_get_registry.return_value.cache = ResponseCache()
             yield mock_instance
 
     @pytest.mark.asyncio
@@ -0,0 +1,137 @@
+"""Tests for incremental AIOBS session sync."""
+
+import pytest
+
+from shepherd_mcp.models.aiobs import Event, Session, SessionsResponse
+from shepherd_mcp.providers.aiobs import AsyncAIOBSClient
+from shepherd_mcp.providers.mirror import SessionMirror
+from tests.aiobs_server import FakeAIOBSServer
+
+
+def make_event(session_id: str, span_id: str, started_at: float) -> Event:
+    return Event(
+        provider="openai",
+        api="chat.completions.create",
+        started_at=started_at,
+        ended_at=started_at + 1,
+        duration_ms=1000.0,
+        span_id=span_id,
+        session_id=session_id,
+    )
+
+
+class TestSessionMirror:
+    """Tests for SessionMirror."""
+
+    def test_first_sync_is_full(self):
+        mirror = SessionMirror()
+        assert mirror.since() is None
+
+    def test_merges_delta_into_snapshot(self):
+        mirror = SessionMirror(lookback=10.0)
+        first = mirror.apply(
+            SessionsResponse(
+                sessions=[Session(id="a", name="a", started_at=100.0)],
+                events=[make_event("a", "a1", 100.0)],
+                generated_at=200.0,
+            ),
+            full=True,
+        )
+        assert mirror.since() == 190.0
+
+        second = mirror.apply(
+            SessionsResponse(
+                sessions=[
+                    Session(id="a", name="a", started_at=100.0, ended_at=195.0),
+                    Session(id="b", name="b", started_at=198.0),
+                ],
+                events=[make_event("a", "a1", 100.0), make_event("b", "b1", 198.0)],
+                generated_at=260.0,
+            ),
+            full=False,
+        )
+
+        assert [s.id for s in second.sessions] == ["a", "b"]
+        assert second.sessions[0].ended_at == 195.0
+        assert [e.span_id for e in second.events] == ["a1", "b1"]
+        assert second.generated_at == 260.0
+        assert first.sessions[0].ended_at is None
+        assert mirror.watermark == 260.0
+
+    def test_periodic_full_sync(self):
+        now = [0.0]
+        mirror = SessionMirror(full_sync_interval=60.0, clock=lambda: now[0])
+        mirror.apply(SessionsResponse(generated_at=100.0), full=True)
+        assert mirror.since() is not None
+
+        now[0] = 61.0
+
+        assert mirror.since() is None
+
+    def test_from_env_is_opt_in(self, monkeypatch):
+        monkeypatch.delenv("SHEPHERD_AIOBS_INCREMENTAL", raising=False)
+        assert SessionMirror.from_env() is None
+        monkeypatch.setenv("SHEPHERD_AIOBS_INCREMENTAL", "0")
+        assert SessionMirror.from_env() is None
+        monkeypatch.setenv("SHEPHERD_AIOBS_INCREMENTAL", "1")
+        assert isinstance(SessionMirror.from_env(), SessionMirror)
+
+
+class TestIncrementalListSessions:
+    """Tests for AsyncAIOBSClient.list_sessions against the stand-in server."""
+
+    @pytest.fixture
+    def server(self):
+        server = FakeAIOBSServer()
+        for i in range(200):
+            started = server.now - 86_400 + i * 60
+            server.add_session(f"s{i}", started, ended_at=started + 30)
+        server.add_session("live", server.now - 10)
+        return server
+
+    @pytest.mark.asyncio
+    async def test_delta_sync_transfers_only_new_data(self, server):
+        client = AsyncAIOBSClient(
+            api_key="key", transport=server.transport, mirror=SessionMirror(lookback=60.0)
+        )
+        async with client:
+            first = await client.list_sessions()
+
+            server.now += 120
+            server.sessions[-1]["ended_at"] = server.now - 5
+            server.add_session("new", server.now - 20, ended_at=server.now - 2)
+            second = await client.list_sessions()
+
+        full_size, delta_size = server.response_sizes
+        assert "since" not in server.requests[0]
+        assert server.requests[1]["since"] == first.generated_at - 60.0
+        assert delta_size < full_size / 20
+
+        assert len(second.sessions) == 202
+        assert len(second.events) == len(server.events)
+        assert len(second.function_events) == len(server.function_events)
+        live = next(s for s in second.sessions if s.id == "live")
+        assert live.ended_at is not None
+        assert len(first.sessions) == 201
+
+    @pytest.mark.asyncio
+    async def test_backend_without_since_support(self, server):
+        server.supports_since = False
+        client = AsyncAIOBSClient(api_key="key", transport=server.transport, mirror=SessionMirror())
+        async with client:
+            await client.list_sessions()
+            server.add_session("new", server.now)
+            second = await client.list_sessions()
+
+        assert len(second.sessions) == 202
+        assert len(second.events) == len(server.events)
+        assert len({(e.session_id, e.span_id) for e in second.events}) == len(second.events)
+
+    @pytest.mark.asyncio
+    async def test_without_mirror_always_fetches_everything(self, server):
+        client = AsyncAIOBSClient(api_key="key", transport=server.transport)
+        async with client:
+            await client.list_sessions()
+            await client.list_sessions()
+
+        assert server.requests == [{"api_key": "key"}, {"api_key": "key"}]
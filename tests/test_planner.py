@@ -0,0 +1,158 @@
+"""Tests for the session filter planner."""
+
+from shepherd_mcp.models.aiobs import Event, Session, SessionsResponse
+from shepherd_mcp.providers.aiobs import filter_sessions
+from shepherd_mcp.providers.planner import Predicate, run_plan
+
+
+def make_sessions(count: int) -> list[Session]:
+    return [Session(id=f"s{i}", name=f"run {i}", started_at=float(i)) for i in range(count)]
+
+
+class CountingCheck:
+    """Predicate check that records which sessions it saw."""
+
+    def __init__(self, passes):
+        self.passes = passes
+        self.seen = []
+
+    def __call__(self, session: Session) -> bool:
+        self.seen.append(session.id)
+        return self.passes(session)
+
+
+class TestRunPlan:
+    """Tests for run_plan."""
+
+    def test_cheap_selective_predicate_runs_first(self):
+        sessions = make_sessions(100)
+        expensive = CountingCheck(lambda s: True)
+        cheap = CountingCheck(lambda s: s.started_at < 5)
+        predicates = [
+            Predicate("expensive", 0.9, row_cost=50.0, check=expensive),
+            Predicate("cheap", 0.05, row_cost=1.0, check=cheap),
+        ]
+
+        result, plan = run_plan(sessions, predicates)
+
+        assert [s.id for s in result] == ["s0", "s1", "s2", "s3", "s4"]
+        assert [step.name for step in plan.steps] == ["cheap", "expensive"]
+        assert len(expensive.seen) == 5
+
+    def test_short_circuits_when_nothing_is_left(self):
+        never = CountingCheck(lambda s: False)
+        later = CountingCheck(lambda s: True)
+        predicates = [
+            Predicate("never", 0.0, row_cost=1.0, check=never),
+            Predicate("later", 0.5, row_cost=10.0, check=later),
+        ]
+
+        result, plan = run_plan(make_sessions(10), predicates)
+
+        assert result == []
+        assert later.seen == []
+        assert plan.skipped == ["later"]
+
+    def test_prefers_lookup_for_many_rows_and_scan_for_few(self):
+        lookups = []
+
+        def lookup():
+            lookups.append(1)
+            return {"s1", "s2"}
+
+        by_set = Predicate(
+            "by_set",
+            0.02,
+            row_cost=20.0,
+            check=lambda s: s.id in {"s1", "s2"},
+            lookup_cost=500.0,
+            lookup=lookup,
+        )
+        result, plan = run_plan(make_sessions(100), [by_set])
+        assert plan.steps[0].method == "lookup"
+        assert [s.id for s in result] == ["s1", "s2"]
+
+        result, plan = run_plan(make_sessions(3), [by_set])
+        assert plan.steps[0].method == "scan"
+        assert [s.id for s in result] == ["s1", "s2"]
+        assert len(lookups) == 1
+
+    def test_plan_to_dict(self):
+        predicates = [Predicate("p", 0.5, row_cost=1.0, check=lambda s: s.started_at < 2)]
+        _, plan = run_plan(make_sessions(4), predicates)
+        assert plan.to_dict() == {
+            "steps": [
+                {
+                    "filter": "p",
+                    "method": "scan",
+                    "estimated_cost": 4.0,
+                    "estimated_selectivity": 0.5,
+                    "rows_in": 4,
+                    "rows_out": 2,
+                }
+            ],
+            "skipped": [],
+            "estimated_cost": 4.0,
+        }
+
+
+class TestFilterSessionsPlan:
+    """Tests for the plans filter_sessions builds."""
+
+    def setup_method(self):
+        sessions = make_sessions(1000)
+        events = [
+            Event(
+                provider="openai" if i % 2 else "anthropic",
+                api="chat.completions.create",
+                request={"model": "gpt-4o"},
+                error="boom" if i % 100 == 0 else None,
+                started_at=float(i),
+                ended_at=float(i) + 1,
+                duration_ms=1000.0,
+                span_id=f"span-{j}",
+                session_id=f"s{i}",
+            )
+            for i in range(1000)
+            for j in range(5)
+        ]
+        self.response = SessionsResponse(sessions=sessions, events=events)
+
+    def test_explain_returns_plan(self):
+        result, plan = filter_sessions(
+            self.response, provider="openai", after=990.0, has_errors=True, explain=True
+        )
+
+        assert [s.id for s in result.sessions] == []
+        assert plan.steps[0].name == "started_at"
+        assert plan.steps[0].rows_out == 10
+        assert all(step.rows_in <= 10 for step in plan.steps[1:])
+
+    def test_narrow_window_scans_instead_of_building_postings(self):
+        _, plan = filter_sessions(self.response, provider="openai", after=995.0, explain=True)
+
+        assert [(step.name, step.method) for step in plan.steps] == [
+            ("started_at", "range"),
+            ("provider", "scan"),
+        ]
+        assert not self.response.index.attributes_built
+
+    def test_window_limits_rows_seen_by_other_filters(self):
+        _, plan = filter_sessions(
+            self.response, provider="openai", after=100.0, before=199.0, explain=True
+        )
+
+        assert plan.steps[0].rows_in == 1000
+        assert plan.steps[0].rows_out == 100
+        assert plan.steps[1].rows_in == 100
+
+    def test_results_do_not_depend_on_plan(self):
+        filters = {"provider": "openai", "model": "4o", "has_errors": False, "before": 500.0}
+        result = filter_sessions(self.response, **filters)
+        self.response.index.attributes  # noqa: B018 - build postings, changing the plan
+        _, plan = filter_sessions(self.response, explain=True, **filters)
+
+        assert [s.id for s in filter_sessions(self.response, **filters).sessions] == [
+            s.id for s in result.sessions
+        ]
+        assert any(step.method == "lookup" for step in plan.steps)
@@ -1,7 +1,11 @@
 """Tests for provider base classes and AIOBS provider."""
 
+import json
+import random
+from datetime import datetime
 from unittest.mock import Mock, patch
 
+import httpx
 import pytest
 
 from shepherd_mcp.models.aiobs import (
@@ -12,6 +16,9 @@ from shepherd_mcp.models.aiobs import (
 )
 from shepherd_mcp.providers.aiobs import (
     AIOBSClient,
+    AsyncAIOBSClient,
+    SessionPage,
+    SessionScan,
     eval_is_failed,
     filter_sessions,
     parse_date,
@@ -28,7 +35,15 @@ from shepherd_mcp.providers.base import (
     NotFoundError,
     ProviderError,
     RateLimitError,
+    RetryPolicy,
+    async_call_with_retry,
+    call_with_retry,
+    parse_retry_after,
+    retry_stats,
 )
+from shepherd_mcp.providers.registry import PoolConfig, ProviderRegistry
+from shepherd_mcp.server import handle_aiobs_list_sessions, handle_aiobs_search_sessions
+from tests.aiobs_server import FakeAIOBSServer
 
 # ============================================================================
 # Base Provider Tests
@@ -55,6 +70,121 @@ class TestExceptions:
             raise RateLimitError("rate limited")
 
 
+class TestParseRetryAfter:
+    """Tests for parse_retry_after."""
+
+    def test_seconds(self):
+        assert parse_retry_after("7") == 7.0
+
+    def test_http_date_in_past(self):
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+    def test_invalid_values(self):
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("soon") is None
+        assert parse_retry_after(Mock()) is None
+
+
+class TestRetryPolicy:
+    """Tests for RetryPolicy and the retry helpers."""
+
+    def setup_method(self):
+        retry_stats.reset()
+        self.policy = RetryPolicy(max_retries=2, base_delay=0.01, max_delay=5.0)
+
+    def _flaky(self, *errors):
+        """Return a call that raises each of ``errors`` in turn, then succeeds."""
+        remaining = list(errors)
+        calls = []
+
+        def call():
+            calls.append(1)
+            if remaining:
+                raise remaining.pop(0)
+            return "ok"
+
+        return call, calls
+
+    def test_retry_reason(self):
+        assert self.policy.retry_reason(RateLimitError("slow down")) == "429"
+        assert self.policy.retry_reason(ProviderError("boom", status_code=503)) == "503"
+        assert self.policy.retry_reason(ProviderError("bad", status_code=400)) is None
+        assert self.policy.retry_reason(NotFoundError("gone", status_code=404)) is None
+        assert self.policy.retry_reason(httpx.ConnectError("refused")) == "ConnectError"
+        assert self.policy.retry_reason(ValueError("no")) is None
+
+    def test_retries_transient_errors_then_succeeds(self):
+        call, calls = self._flaky(ProviderError("boom", status_code=502), RateLimitError("slow"))
+        with patch("shepherd_mcp.providers.base.time.sleep") as sleep:
+            assert call_with_retry(call, self.policy, "aiobs") == "ok"
+        assert len(calls) == 3
+        assert sleep.call_count == 2
+        assert retry_stats.snapshot()["retries"] == {"aiobs:429": 1, "aiobs:502": 1}
+
+    def test_honors_retry_after(self):
+        call, _ = self._flaky(RateLimitError("slow", status_code=429, retry_after=2.5))
+        with patch("shepherd_mcp.providers.base.time.sleep") as sleep:
+            call_with_retry(call, self.policy, "langfuse")
+        sleep.assert_called_once_with(2.5)
+
+    def test_budget_exhausted(self):
+        errors = [ProviderError("boom", status_code=500) for _ in range(3)]
+        call, calls = self._flaky(*errors)
+        with patch("shepherd_mcp.providers.base.time.sleep"), pytest.raises(ProviderError):
+            call_with_retry(call, self.policy, "aiobs")
+        assert len(calls) == 3
+        assert retry_stats.snapshot()["exhausted"] == {"aiobs:500": 1}
+
+    def test_deadline_stops_retries(self):
+        policy = RetryPolicy(max_retries=5, deadline=1.0)
+        call, calls = self._flaky(RateLimitError("slow", status_code=429, retry_after=5.0))
+        with (
+            patch("shepherd_mcp.providers.base.time.sleep") as sleep,
+            pytest.raises(RateLimitError),
+        ):
+            call_with_retry(call, policy, "langfuse")
+        assert len(calls) == 1
+        sleep.assert_not_called()
+
+    def test_non_idempotent_not_retried(self):
+        call, calls = self._flaky(ProviderError("boom", status_code=503))
+        with pytest.raises(ProviderError):
+            call_with_retry(call, self.policy, "langfuse", idempotent=False)
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_async_retries(self):
+        errors = [httpx.ReadTimeout("slow")]
+
+        async def call():
+            if errors:
+                raise errors.pop()
+            return "ok"
+
+        assert await async_call_with_retry(call, self.policy, "aiobs") == "ok"
+        assert retry_stats.snapshot()["total_retries"] == 1
+
+    @pytest.mark.asyncio
+    async def test_list_handler_reports_retries(self, monkeypatch):
+        monkeypatch.setenv("AIOBS_API_KEY", "key")
+        responses = [httpx.Response(503, json={"detail": "busy"})]
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return responses.pop() if responses else httpx.Response(200, json={"sessions": []})
+
+        registry = ProviderRegistry(PoolConfig(), transport=httpx.MockTransport(handler))
+        async with registry:
+            with (
+                patch("shepherd_mcp.server.get_registry", return_value=registry),
+                patch("shepherd_mcp.providers.base.asyncio.sleep"),
+            ):
+                result = await handle_aiobs_list_sessions({})
+
+        data = json.loads(result[0].text)
+        assert data["retries"]["retries"] == {"aiobs:503": 1}
+        assert data["retries"]["exhausted"] == {}
+
+
 # ============================================================================
 # AIOBS Provider Tests
 # ============================================================================
@@ -135,6 +265,71 @@ class TestAIOBSClientErrorHandling:
         with pytest.raises(ProviderError) as exc_info:
             self.client._handle_error_response(mock_response)
         assert "Internal error" in str(exc_info.value)
+        assert exc_info.value.status_code == 500
+
+    def test_429_raises_rate_limit_error(self):
+        response = httpx.Response(429, headers={"Retry-After": "3"})
+        with pytest.raises(RateLimitError) as exc_info:
+            self.client._handle_error_response(response)
+        assert exc_info.value.retry_after == 3.0
+
+
+class TestAsyncAIOBSClient:
+    """Tests for AsyncAIOBSClient."""
+
+    def _client(self, handler) -> AsyncAIOBSClient:
+        client = AsyncAIOBSClient(api_key="test-key", endpoint="https://aiobs.test")
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return client
+
+    def test_init_matches_sync_client(self):
+        with patch.dict("os.environ", {"AIOBS_API_KEY": "env-key"}):
+            client = AsyncAIOBSClient()
+        assert client.api_key == "env-key"
+        assert client.name == "aiobs"
+        assert "shepherd-api" in client.endpoint
+
+    def test_missing_api_key_raises_error(self):
+        with patch.dict("os.environ", {}, clear=True), pytest.raises(AuthenticationError):
+            AsyncAIOBSClient()
+
+    @pytest.mark.asyncio
+    async def test_list_sessions(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            assert request.url.path == "/v1/sessions"
+            assert json.loads(request.content) == {"api_key": "test-key"}
+            return httpx.Response(
+                200,
+                json={"sessions": [{"id": "s1", "name": "one", "started_at": 1.0}]},
+            )
+
+        async with self._client(handler) as client:
+            response = await client.list_sessions()
+
+        assert [s.id for s in response.sessions] == ["s1"]
+
+    @pytest.mark.asyncio
+    async def test_retries_server_errors(self):
+        responses = [
+            httpx.Response(503, headers={"Retry-After": "0"}),
+            httpx.Response(200, json={"sessions": []}),
+        ]
+
+        async with self._client(lambda request: responses.pop(0)) as client:
+            response = await client.list_sessions()
+
+        assert response.sessions == []
+        assert responses == []
+
+    @pytest.mark.asyncio
+    async def test_get_session_not_found(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            assert request.url.path == "/v1/sessions/missing/tree"
+            return httpx.Response(404, json={"detail": "Session not found"})
+
+        async with self._client(handler) as client:
+            with pytest.raises(NotFoundError):
+                await client.get_session("missing")
 
 
 # ============================================================================
@@ -459,3 +654,539 @@ class TestFilterSessions:
         # Events should only include those from matching sessions
         assert len(result.events) == 1
         assert result.events[0].session_id == "s1"
+
+
+class TestSessionIndex:
+    """Tests for the SessionsResponse.index used by the filtering helpers."""
+
+    def setup_method(self):
+        self.response = SessionsResponse(
+            sessions=[make_session(id="s1"), make_session(id="s2"), make_session(id="s3")],
+            events=[
+                make_event(session_id="s1"),
+                make_event(session_id="s2", provider="anthropic", error="boom"),
+                make_event(session_id="s1", model="gpt-4"),
+            ],
+            function_events=[
+                make_function_event(session_id="s2", name="fetch"),
+                make_function_event(session_id="s1", evaluations=[{"passed": False}], error="oops"),
+            ],
+        )
+
+    def test_built_once(self):
+        assert self.response.index is self.response.index
+
+    def test_groups_events_by_session(self):
+        index = self.response.index
+        assert index.entry("s1").events == [0, 2]
+        assert index.entry("s1").function_events == [1]
+        assert [e.provider for e in index.events("s2")] == ["anthropic"]
+        assert index.function_events("s2")[0].name == "fetch"
+
+    def test_counts(self):
+        entry = self.response.index.entry("s1")
+        assert entry.event_count == 2
+        assert entry.function_event_count == 1
+        assert entry.error_count == 1
+        assert self.response.index.entry("s3").event_count == 0
+
+    def test_predicates_agree_with_scans(self):
+        r = self.response
+        index = r.index
+        for session in r.sessions:
+            assert session_has_provider(
+                session, r.events, r.function_events, "anthropic", index
+            ) == session_has_provider(session, r.events, r.function_events, "anthropic")
+            assert session_has_model(session, r.events, "gpt-4", index) == session_has_model(
+                session, r.events, "gpt-4"
+            )
+            assert session_has_errors(
+                session, r.events, r.function_events, index
+            ) == session_has_errors(session, r.events, r.function_events)
+            assert session_has_function(
+                session, r.function_events, "fetch", index
+            ) == session_has_function(session, r.function_events, "fetch")
+            assert session_has_failed_evals(
+                session, r.events, r.function_events, index
+            ) == session_has_failed_evals(session, r.events, r.function_events)
+
+    def test_filter_keeps_event_order(self):
+        result = filter_sessions(self.response, provider="openai")
+        assert [s.id for s in result.sessions] == ["s1"]
+        assert [e.model_dump() for e in result.events] == [
+            self.response.events[0].model_dump(),
+            self.response.events[2].model_dump(),
+        ]
+        assert len(result.function_events) == 1
+
+
+class TestTextIndex:
+    """Tests for the trigram text index behind free-text session search."""
+
+    def setup_method(self):
+        self.sessions = [
+            make_session(id="abc-123", name="Checkout Flow", labels={"env": "Production"}),
+            make_session(id="def-456", name="Search", meta={"cwd": "/srv/checkout", "n": 42}),
+            make_session(id="ghi-789", name="Refunds", labels={"team": "payments"}),
+        ]
+        self.response = SessionsResponse(sessions=self.sessions)
+
+    def test_matches_agree_with_scan(self):
+        index = self.response.index
+        for query in ["checkout", "CHECK", "prod", "42", "-4", "x", "ay", "zzz", "srv/ch"]:
+            expected = {s.id for s in self.sessions if session_matches_query(s, query)}
+            assert index.text.search(query) == expected, query
+            assert {
+                s.id for s in self.sessions if session_matches_query(s, query, index)
+            } == expected
+
+    def test_trigrams_must_appear_in_one_field(self):
+        # "ion" and "pro" both occur, but "onpro" spans two fields
+        assert self.response.index.text.search("onpro") == frozenset()
+
+    def test_index_and_results_are_reused(self):
+        index = self.response.index
+        text = index.text
+        first = text.search("checkout")
+        assert index.text is text
+        assert text.search("Checkout") is first
+
+    def test_filter_sessions_uses_text_index(self):
+        result = filter_sessions(self.response, query="checkout")
+        assert [s.id for s in result.sessions] == ["abc-123", "def-456"]
+
+
+class TestAttributeIndex:
+    """Tests for the label/provider/model/function posting lists."""
+
+    def setup_method(self):
+        rng = random.Random(7)
+        self.sessions = [
+            make_session(
+                id=f"s{i}",
+                labels={"env": rng.choice(["prod", "dev"]), "team": rng.choice(["a", "b", "c"])},
+            )
+            for i in range(60)
+        ]
+        self.events = [
+            make_event(
+                session_id=f"s{rng.randrange(60)}",
+                provider=rng.choice(["openai", "OpenAI", "anthropic"]),
+                model=rng.choice(["gpt-4o", "gpt-4o-mini", "claude-3-haiku"]),
+                error=rng.choice([None, None, "boom"]),
+            )
+            for _ in range(200)
+        ]
+        self.function_events = [
+            make_function_event(
+                session_id=f"s{rng.randrange(60)}",
+                name=rng.choice(["fetch_docs", "rank", "summarize"]),
+                module=rng.choice(["agent.tools", "agent.llm"]),
+            )
+            for _ in range(100)
+        ]
+        self.response = SessionsResponse(
+            sessions=self.sessions, events=self.events, function_events=self.function_events
+        )
+
+    def scan(self, **filters):
+        """Reference result computed with the unindexed predicates."""
+        r = self.response
+        return [
+            s.id
+            for s in r.sessions
+            if (not filters.get("labels") or session_matches_labels(s, filters["labels"]))
+            and (
+                not filters.get("provider")
+                or session_has_provider(s, r.events, r.function_events, filters["provider"])
+            )
+            and (not filters.get("model") or session_has_model(s, r.events, filters["model"]))
+            and (
+                not filters.get("function")
+                or session_has_function(s, r.function_events, filters["function"])
+            )
+            and (
+                not filters.get("has_errors") or session_has_errors(s, r.events, r.function_events)
+            )
+        ]
+
+    @pytest.mark.parametrize(
+        "filters",
+        [
+            {"labels": {"env": "prod"}},
+            {"labels": {"env": "prod", "team": "b"}},
+            {"labels": {"env": "staging"}},
+            {"provider": "OPENAI"},
+            {"model": "4o"},
+            {"model": "mini", "provider": "openai"},
+            {"function": "agent.t"},
+            {"function": "rank", "labels": {"team": "a"}, "has_errors": True},
+            {
+                "labels": {"env": "dev"},
+                "provider": "anthropic",
+                "model": "haiku",
+                "function": "sum",
+            },
+        ],
+    )
+    def test_filter_sessions_matches_scan(self, filters):
+        result = filter_sessions(self.response, **filters)
+        assert [s.id for s in result.sessions] == self.scan(**filters)
+
+    def test_predicates_with_index_match_scan(self):
+        r = self.response
+        index = r.index
+        for session in r.sessions:
+            assert session_matches_labels(session, {"env": "prod"}, index) == (
+                session_matches_labels(session, {"env": "prod"})
+            )
+            assert session_matches_labels(session, {}, index)
+            assert session_has_provider(
+                session, r.events, r.function_events, "openai", index
+            ) == session_has_provider(session, r.events, r.function_events, "openai")
+            assert session_has_model(session, r.events, "claude", index) == session_has_model(
+                session, r.events, "claude"
+            )
+            assert session_has_function(
+                session, r.function_events, "llm", index
+            ) == session_has_function(session, r.function_events, "llm")
+
+    def test_postings_are_lowercased(self):
+        attributes = self.response.index.attributes
+        assert "openai" in attributes.providers
+        assert "OpenAI" not in attributes.providers
+        assert attributes.with_model("GPT") == attributes.with_model("gpt")
+
+
+class TestTimeIndex:
+    """Tests for the sorted start-time index."""
+
+    def setup_method(self):
+        rng = random.Random(3)
+        starts = [float(rng.randrange(50)) for _ in range(80)]
+        self.response = SessionsResponse(
+            sessions=[make_session(id=f"s{i}", started_at=t) for i, t in enumerate(starts)]
+        )
+
+    @pytest.mark.parametrize(
+        "after, before",
+        [(None, None), (10.0, None), (None, 10.0), (10.0, 20.0), (20.0, 20.0), (30.0, 5.0)],
+    )
+    def test_window_matches_scan(self, after, before):
+        expected = [
+            s.id
+            for s in self.response.sessions
+            if (after is None or s.started_at >= after)
+            and (before is None or s.started_at <= before)
+        ]
+        sessions = self.response.index.by_start.sessions_between(after, before)
+        assert [s.id for s in sessions] == expected
+
+    def test_starts_are_sorted(self):
+        starts = self.response.index.by_start.starts
+        assert starts == sorted(starts)
+
+    def test_filter_sessions_date_range(self):
+        result = filter_sessions(self.response, after=10.0, before=20.0)
+        assert [s.id for s in result.sessions] == [
+            s.id for s in self.response.sessions if 10.0 <= s.started_at <= 20.0
+        ]
+
+
+class TestScanSessions:
+    """Tests for streaming session scans against the stand-in server."""
+
+    @pytest.fixture
+    def server(self):
+        server = FakeAIOBSServer(chunk_size=97)
+        for i in range(40):
+            session = server.add_session(f"s{i}", server.now - 4_000 + i * 100)
+            session["labels"]["team"] = "search" if i % 4 == 0 else "ops"
+        return server
+
+    @pytest.mark.asyncio
+    async def test_matches_filter_sessions(self, server):
+        filters = {"query": "run", "labels": {"team": "search"}, "after": server.now - 3_000}
+        async with AsyncAIOBSClient(api_key="key", transport=server.transport) as client:
+            full = await client.list_sessions()
+            scanned = await client.scan_sessions(**filters)
+
+        expected = filter_sessions(full, **filters)
+        assert [s.id for s in scanned.sessions] == [s.id for s in expected.sessions]
+        assert [e.span_id for e in scanned.events] == [e.span_id for e in expected.events]
+        assert [e.span_id for e in scanned.function_events] == [
+            e.span_id for e in expected.function_events
+        ]
+        assert scanned.generated_at == server.now
+
+    def test_sync_client(self, server):
+        with AIOBSClient(api_key="key") as client:
+            client._client = httpx.Client(transport=server.transport)
+            scanned = client.scan_sessions(before=server.now - 3_500)
+
+        assert [s.id for s in scanned.sessions] == [f"s{i}" for i in range(6)]
+        assert {e.session_id for e in scanned.events} == {f"s{i}" for i in range(6)}
+
+    @pytest.mark.asyncio
+    async def test_error_response(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(401, json={"detail": "Invalid API key"})
+
+        client = AsyncAIOBSClient(api_key="key", transport=httpx.MockTransport(handler))
+        async with client:
+            with pytest.raises(AuthenticationError, match="Invalid API key"):
+                await client.scan_sessions(query="x")
+
+    def test_events_before_sessions_are_held_back(self):
+        body = {
+            "events": [
+                make_event(session_id="s1").model_dump(),
+                make_event(session_id="s2").model_dump(),
+            ],
+            "sessions": [make_session(id="s1").model_dump(), make_session(id="s2").model_dump()],
+            "function_events": [],
+        }
+        scan = SessionScan(query="s2")
+
+        scan.feed(json.dumps(body).encode())
+        result = scan.close()
+
+        assert [s.id for s in result.sessions] == ["s2"]
+        assert [e.session_id for e in result.events] == ["s2"]
+
+    def test_trace_nodes_of_dropped_sessions_are_dropped(self):
+        def node(session_id: str) -> dict:
+            child = {**make_event(session_id=session_id).model_dump(), "children": []}
+            return {**make_event(session_id=session_id).model_dump(), "children": [child]}
+
+        body = {
+            "sessions": [make_session(id="s1").model_dump(), make_session(id="s2").model_dump()],
+            "events": [],
+            "function_events": [],
+            "trace_tree": [node("s1"), node("s2"), node("s1")],
+        }
+        scan = SessionScan(query="s2")
+
+        scan.feed(json.dumps(body).encode())
+        result = scan.close()
+
+        assert [n.session_id for n in result.trace_tree] == ["s2"]
+        assert [c.session_id for c in result.trace_tree[0].children] == ["s2"]
+
+    @pytest.mark.asyncio
+    async def test_search_handler_streams_by_default(self, server, monkeypatch):
+        monkeypatch.setenv("AIOBS_API_KEY", "key")
+        monkeypatch.delenv("SHEPHERD_AIOBS_STREAMING", raising=False)
+        monkeypatch.delenv("SHEPHERD_AIOBS_INCREMENTAL", raising=False)
+        registry = ProviderRegistry(PoolConfig(), transport=server.transport)
+        scan = AsyncAIOBSClient.scan_sessions
+        list_sessions = AsyncAIOBSClient.list_sessions
+        async with registry:
+            with (
+                patch("shepherd_mcp.server.get_registry", return_value=registry),
+                patch.object(
+                    AsyncAIOBSClient, "scan_sessions", autospec=True, side_effect=scan
+                ) as scanned,
+                patch.object(
+                    AsyncAIOBSClient, "list_sessions", autospec=True, side_effect=list_sessions
+                ) as listed,
+            ):
+                after = datetime.fromtimestamp(server.now - 2_000).isoformat()
+                result = await handle_aiobs_search_sessions({"query": "s3", "after": after})
+
+        data = json.loads(result[0].text)
+        assert scanned.call_count == 1 and listed.call_count == 0
+        assert "after" in server.requests[-1]
+        assert {s["id"] for s in data["sessions"]} == {f"s3{i}" for i in range(10)}
+
+    @pytest.mark.asyncio
+    async def test_search_handler_streams_without_mirror(self, server, monkeypatch):
+        monkeypatch.setenv("AIOBS_API_KEY", "key")
+        monkeypatch.setenv("SHEPHERD_AIOBS_STREAMING", "1")
+        monkeypatch.setenv("SHEPHERD_AIOBS_INCREMENTAL", "0")
+        registry = ProviderRegistry(PoolConfig(), transport=server.transport)
+        async with registry:
+            with patch("shepherd_mcp.server.get_registry", return_value=registry):
+                result = await handle_aiobs_search_sessions(
+                    {"labels": {"team": "search"}, "model": "gpt-4o-mini", "explain": True}
+                )
+
+        data = json.loads(result[0].text)
+        assert data["total_matches"] == 10
+        assert data["plan"]["steps"][0]["rows_in"] == 10
+        assert all(s["labels"]["team"] == "search" for s in data["sessions"])
+
+
+class TestSessionPage:
+    """Tests for paged session listing, pushed down or applied by the client."""
+
+    @pytest.fixture
+    def server(self):
+        server = FakeAIOBSServer()
+        rng = random.Random(3)
+        for i in rng.sample(range(30), 30):
+            server.add_session(f"s{i}", server.now - 3_000 + i * 100)
+        return server
+
+    async def list_all(self, client, **kwargs) -> list[list[str]]:
+        pages = []
+        cursor = None
+        while True:
+            page = await client.list_sessions(cursor=cursor, **kwargs)
+            pages.append([s.id for s in page.sessions])
+            assert {e.session_id for e in page.events} <= set(pages[-1])
+            cursor = page.next_cursor
+            if cursor is None:
+                return pages
+
+    def test_select(self):
+        sessions = [make_session(id=f"s{i}", started_at=float(i)) for i in range(10)]
+        page = SessionPage(limit=3, after=2.0, before=8.0, sort="-started_at")
+
+        kept, cursor, total = page.select(sessions, lambda s: s.started_at)
+        rest, last, _ = SessionPage(
+            limit=3, cursor=cursor, after=2.0, before=8.0, sort="-started_at"
+        ).select(sessions, lambda s: s.started_at)
+
+        assert [s.id for s in kept] == ["s8", "s7", "s6"]
+        assert [s.id for s in rest] == ["s5", "s4", "s3"]
+        assert total == 7
+        assert last is not None
+
+    def test_rejects_bad_arguments(self):
+        with pytest.raises(ValueError, match="sort"):
+            SessionPage(sort="name")
+        with pytest.raises(ValueError, match="limit"):
+            SessionPage(limit=0)
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            SessionPage(cursor="not a cursor").select([], lambda s: 0)
+
+    def test_apply_payload_drops_events_of_cut_sessions(self, server):
+        payload = server._sessions_payload(None)
+
+        SessionPage(limit=2, sort="started_at").apply_payload(payload)
+
+        assert [s["id"] for s in payload["sessions"]] == ["s0", "s1"]
+        assert {e["session_id"] for e in payload["events"]} == {"s0", "s1"}
+        assert {e["session_id"] for e in payload["function_events"]} == {"s0", "s1"}
+        assert payload["total"] == 30
+
+    @pytest.mark.asyncio
+    async def test_pushed_down_to_server(self, server):
+        async with AsyncAIOBSClient(api_key="key", transport=server.transport) as client:
+            full = await client.list_sessions()
+            page = await client.list_sessions(limit=5, sort="-started_at")
+
+        assert server.requests[-1] == {"api_key": "key", "limit": 5, "sort": "-started_at"}
+        assert [s.id for s in page.sessions] == [f"s{i}" for i in range(29, 24, -1)]
+        assert page.next_cursor == "5"
+        assert page.total == 30
+        assert len(page.events) == 15
+        assert server.response_sizes[-1] * 4 < server.response_sizes[0]
+        assert len(full.sessions) == 30
+
+    @pytest.mark.asyncio
+    async def test_client_fallback_matches_server(self, server):
+        window = {"after": server.now - 2_500, "before": server.now - 500, "sort": "started_at"}
+        async with AsyncAIOBSClient(api_key="key", transport=server.transport) as client:
+            paged = await self.list_all(client, limit=4, **window)
+        server.supports_paging = False
+        async with AsyncAIOBSClient(api_key="key", transport=server.transport) as client:
+            fallback = await self.list_all(client, limit=4, **window)
+
+        assert fallback == paged
+        assert sum(paged, []) == [f"s{i}" for i in range(5, 26)]
+
+    def test_sync_client_fallback(self):
+        server = FakeAIOBSServer(supports_paging=False)
+        for i in range(6):
+            server.add_session(f"s{i}", server.now + i)
+        with AIOBSClient(api_key="key") as client:
+            client._client = httpx.Client(transport=server.transport)
+            page = client.list_sessions(limit=2, sort="-started_at")
+
+        assert [s.id for s in page.sessions] == ["s5", "s4"]
+        assert {e.session_id for e in page.events} == {"s5", "s4"}
+        assert page.total == 6
+        assert page.next_cursor is not None
+
+    @pytest.mark.asyncio
+    async def test_handlers_push_limit_down_by_default(self, server, monkeypatch):
+        monkeypatch.setenv("AIOBS_API_KEY", "key")
+        for name in ("SHEPHERD_AIOBS_INCREMENTAL", "SHEPHERD_AIOBS_STREAMING"):
+            monkeypatch.delenv(name, raising=False)
+        registry = ProviderRegistry(PoolConfig(), transport=server.transport)
+        async with registry:
+            with patch("shepherd_mcp.server.get_registry", return_value=registry):
+                listed = json.loads((await handle_aiobs_list_sessions({"limit": 5}))[0].text)
+                list_body = server.requests[-1]
+                searched = json.loads((await handle_aiobs_search_sessions({"limit": 4}))[0].text)
+                search_body = server.requests[-1]
+
+        assert list_body["limit"] == 5
+        assert search_body["limit"] == 4
+        assert len(server.requests) == 2
+        assert listed["returned"] == 5 and listed["total"] == 30
+        assert searched["returned"] == 4 and searched["total_matches"] == 30
+        full_size = len(json.dumps(server._sessions_payload(None)))
+        assert max(server.response_sizes) < full_size / 4
+
+    @pytest.mark.parametrize("incremental", ["0", "1"])
+    @pytest.mark.asyncio
+    async def test_list_handler(self, server, monkeypatch, incremental):
+        monkeypatch.setenv("AIOBS_API_KEY", "key")
+        monkeypatch.setenv("SHEPHERD_AIOBS_INCREMENTAL", incremental)
+        registry = ProviderRegistry(PoolConfig(), transport=server.transport)
+        async with registry:
+            with patch("shepherd_mcp.server.get_registry", return_value=registry):
+                first = json.loads(
+                    (await handle_aiobs_list_sessions({"limit": 3, "sort": "started_at"}))[0].text
+                )
+                arguments = {"limit": 3, "sort": "started_at", "cursor": first["next_cursor"]}
+                second = json.loads((await handle_aiobs_list_sessions(arguments))[0].text)
+
+        assert [s["id"] for s in first["sessions"]] == ["s0", "s1", "s2"]
+        assert [s["id"] for s in second["sessions"]] == ["s3", "s4", "s5"]
+        assert first["total"] == 30
+        assert first["returned"] == 3
+        if incremental == "1":
+            # Both pages come from the mirrored list.
+            assert len(server.requests) == 1
+        else:
+            assert [r.get("limit") for r in server.requests] == [3, 3]
+
+    @pytest.mark.asyncio
+    async def test_search_handler_pushes_window_and_limit(self, server, monkeypatch):
+        monkeypatch.setenv("AIOBS_API_KEY", "key")
+        monkeypatch.setenv("SHEPHERD_AIOBS_INCREMENTAL", "0")
+        registry = ProviderRegistry(PoolConfig(), transport=server.transport)
+        async with registry:
+            with patch("shepherd_mcp.server.get_registry", return_value=registry):
+                after = datetime.fromtimestamp(server.now - 1_500).isoformat()
+                result = await handle_aiobs_search_sessions({"after": after, "limit": 2})
+
+        data = json.loads(result[0].text)
+        assert server.requests[-1]["limit"] == 2
+        assert "after" in server.requests[-1]
+        assert data["returned"] == 2
+        assert (
+            data["total_matches"]
+            == server._page(
+                server._sessions_payload(None), {"after": server.requests[-1]["after"]}
+            )["total"]
+        )
+
+    @pytest.mark.asyncio
+    async def test_search_handler_without_backend_total(self, server, monkeypatch):
+        monkeypatch.setenv("AIOBS_API_KEY", "key")
+        monkeypatch.setenv("SHEPHERD_AIOBS_INCREMENTAL", "0")
+        page = server._page
+        monkeypatch.setattr(server, "_page", lambda *args: {**page(*args), "total": None})
+        registry = ProviderRegistry(PoolConfig(), transport=server.transport)
+        async with registry:
+            with patch("shepherd_mcp.server.get_registry", return_value=registry):
+                result = await handle_aiobs_search_sessions({"limit": 2})
+
+        data = json.loads(result[0].text)
+        assert server.requests[-1]["limit"] == 2
+        assert data["total_matches"] == data["returned"] == 2
@@ -0,0 +1,107 @@
+"""Tests for the adaptive rate limiter."""
+
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from shepherd_mcp.providers.langfuse import AsyncLangfuseClient
+from shepherd_mcp.providers.ratelimit import AdaptiveRateLimiter
+from shepherd_mcp.providers.registry import PoolConfig, ProviderRegistry
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestAdaptiveRateLimiter:
+    """Tests for AdaptiveRateLimiter."""
+
+    def setup_method(self):
+        self.clock = FakeClock()
+        self.limiter = AdaptiveRateLimiter(rate=2.0, min_rate=0.5, max_rate=4.0, clock=self.clock)
+
+    def test_burst_then_paced(self):
+        assert self.limiter._reserve() == 0
+        assert self.limiter._reserve() == 0
+        # Bucket (capacity 2) is empty; the next two callers queue behind it.
+        assert self.limiter._reserve() == pytest.approx(0.5)
+        assert self.limiter._reserve() == pytest.approx(1.0)
+
+    def test_refills_over_time(self):
+        for _ in range(2):
+            self.limiter._reserve()
+        self.clock.now += 1.0
+        assert self.limiter._reserve() == 0
+
+    def test_additive_increase_capped(self):
+        for _ in range(100):
+            self.limiter.on_success()
+        assert self.limiter.rate == 4.0
+
+    def test_multiplicative_decrease_with_cooldown(self):
+        self.limiter.on_throttle()
+        assert self.limiter.rate == 1.0
+        # In-flight requests failing in the same window do not cut again.
+        self.limiter.on_throttle()
+        assert self.limiter.rate == 1.0
+        self.clock.now += 2.0
+        self.limiter.on_throttle()
+        assert self.limiter.rate == 0.5
+        self.clock.now += 2.0
+        self.limiter.on_throttle()
+        assert self.limiter.rate == 0.5
+        assert self.limiter.throttled == 4
+
+    def test_retry_after_blocks_callers(self):
+        self.limiter.on_throttle(retry_after=3.0)
+        assert self.limiter._reserve() >= 3.0
+
+    def test_observe(self):
+        self.limiter.observe(httpx.Response(200))
+        assert self.limiter.rate == pytest.approx(2.1)
+        self.limiter.observe(httpx.Response(503))
+        assert self.limiter.rate == pytest.approx(2.1)
+        self.limiter.observe(httpx.Response(429, headers={"Retry-After": "1"}))
+        assert self.limiter.rate == pytest.approx(1.05)
+
+    def test_from_env(self):
+        with patch.dict("os.environ", {"SHEPHERD_RATE_LIMIT": "0"}):
+            assert AdaptiveRateLimiter.from_env() is None
+        with patch.dict("os.environ", {"SHEPHERD_RATE_LIMIT": "3"}, clear=True):
+            limiter = AdaptiveRateLimiter.from_env()
+        assert limiter.rate == 3.0
+        assert limiter.max_rate == 50.0
+
+    @pytest.mark.asyncio
+    async def test_client_feeds_limiter(self):
+        responses = [httpx.Response(429), httpx.Response(200, json={"data": [], "meta": {}})]
+        limiter = AdaptiveRateLimiter(rate=100.0)
+        client = AsyncLangfuseClient(
+            public_key="pk",
+            secret_key="sk",
+            transport=httpx.MockTransport(lambda request: responses.pop(0)),
+            rate_limiter=limiter,
+        )
+        with patch("shepherd_mcp.providers.base.asyncio.sleep"):
+            async with client:
+                await client.list_scores()
+
+        assert limiter.throttled == 1
+        assert limiter.rate == 50.0  # halved, then capped at max_rate
+
+    @pytest.mark.asyncio
+    async def test_registry_shares_limiter_per_account(self):
+        async with ProviderRegistry(PoolConfig()) as registry:
+            first = registry.langfuse(public_key="pk", secret_key="sk")
+            again = registry.langfuse(public_key="pk", secret_key="sk")
+            other = registry.langfuse(public_key="pk-2", secret_key="sk")
+            assert first.rate_limiter is again.rate_limiter
+            assert first.rate_limiter is not other.rate_limiter
+            assert len(registry.rate_limits()["langfuse"]) == 2
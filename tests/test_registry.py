@@ -0,0 +1,96 @@
+"""Tests for the provider registry."""
+
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from shepherd_mcp.providers.aiobs import AsyncAIOBSClient
+from shepherd_mcp.providers.base import AuthenticationError
+from shepherd_mcp.providers.langfuse import AsyncLangfuseClient
+from shepherd_mcp.providers.registry import PoolConfig, ProviderRegistry
+
+
+class TestPoolConfig:
+    """Tests for PoolConfig."""
+
+    def test_defaults(self):
+        with patch.dict("os.environ", {}, clear=True):
+            config = PoolConfig.from_env()
+        assert config == PoolConfig()
+
+    def test_from_env(self):
+        env = {
+            "SHEPHERD_MAX_CONNECTIONS": "5",
+            "SHEPHERD_MAX_KEEPALIVE_CONNECTIONS": "2",
+            "SHEPHERD_KEEPALIVE_EXPIRY": "12.5",
+            "SHEPHERD_HTTP_TIMEOUT": "3",
+        }
+        with patch.dict("os.environ", env, clear=True):
+            config = PoolConfig.from_env()
+        assert config.max_connections == 5
+        assert config.max_keepalive_connections == 2
+        assert config.keepalive_expiry == 12.5
+        assert config.timeout == 3.0
+
+    def test_limits(self):
+        limits = PoolConfig(max_connections=7, max_keepalive_connections=3).limits
+        assert limits.max_connections == 7
+        assert limits.max_keepalive_connections == 3
+
+
+class TestProviderRegistry:
+    """Tests for ProviderRegistry."""
+
+    @pytest.mark.asyncio
+    async def test_reuses_client_per_credentials(self):
+        async with ProviderRegistry(PoolConfig()) as registry:
+            first = registry.aiobs(api_key="key-1")
+            assert registry.aiobs(api_key="key-1") is first
+            assert registry.aiobs(api_key="key-2") is not first
+            assert isinstance(first, AsyncAIOBSClient)
+            assert len(registry) == 2
+
+    @pytest.mark.asyncio
+    async def test_env_and_explicit_credentials_share_client(self):
+        env = {"LANGFUSE_PUBLIC_KEY": "pk", "LANGFUSE_SECRET_KEY": "sk"}
+        async with ProviderRegistry(PoolConfig()) as registry:
+            with patch.dict("os.environ", env, clear=True):
+                from_env = registry.langfuse()
+            explicit = registry.langfuse(public_key="pk", secret_key="sk")
+            assert explicit is from_env
+            assert isinstance(explicit, AsyncLangfuseClient)
+
+    @pytest.mark.asyncio
+    async def test_missing_credentials_raise(self):
+        async with ProviderRegistry(PoolConfig()) as registry:
+            with patch.dict("os.environ", {}, clear=True), pytest.raises(AuthenticationError):
+                registry.aiobs()
+            assert len(registry) == 0
+
+    @pytest.mark.asyncio
+    async def test_clients_share_transport_across_calls(self):
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url.path)
+            return httpx.Response(200, json={"sessions": []})
+
+        registry = ProviderRegistry(PoolConfig(), transport=httpx.MockTransport(handler))
+        async with registry:
+            await registry.aiobs(api_key="key").list_sessions()
+            await registry.aiobs(api_key="key").list_sessions()
+
+        assert calls == ["/v1/sessions", "/v1/sessions"]
+
+    @pytest.mark.asyncio
+    async def test_aclose_closes_clients(self):
+        registry = ProviderRegistry(PoolConfig())
+        client = registry.aiobs(api_key="key")
+
+        await registry.aclose()
+
+        assert client._client.is_closed
+        assert len(registry) == 0
+        with pytest.raises(RuntimeError):
+            registry.aiobs(api_key="key")
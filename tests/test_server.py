@@ -1,6 +1,7 @@
 """Tests for the Shepherd MCP server."""
 
-from shepherd_mcp.models.aiobs import Event, Session
+from shepherd_mcp.models.aiobs import Event, Session, SessionsResponse
+from shepherd_mcp.models.dedup import content_hash
 from shepherd_mcp.server import (
     calc_avg_latency,
     calc_total_tokens,
@@ -66,6 +67,27 @@ class TestSessionToDict:
         assert result["duration"] == "1.0m"
         assert result["labels"]["env"] == "test"
 
+    def test_counts_from_index(self):
+        session = Session(id="s1", name="s1", started_at=1735689600.0)
+        events = [
+            Event(
+                provider="openai",
+                api="chat.completions.create",
+                started_at=1735689600.0,
+                ended_at=1735689601.0,
+                duration_ms=1000.0,
+                span_id=f"span-{i}",
+                session_id=session_id,
+            )
+            for i, session_id in enumerate(["s1", "s2", "s1"])
+        ]
+        response = SessionsResponse(sessions=[session], events=events)
+
+        result = session_to_dict(session, [], [], response.index)
+
+        assert result["llm_call_count"] == 2
+        assert result == session_to_dict(session, events, [])
+
 
 class TestCalcTotalTokens:
     """Tests for calc_total_tokens."""
@@ -213,6 +235,25 @@ class TestExtractSystemPrompts:
         assert len(result) == 1
         assert result[0]["content"] == "Part 1. Part 2."
 
+    def test_anthropic_system_content_blocks(self):
+        """Test top-level system param given as a list of content blocks."""
+        event = make_event(
+            provider="anthropic",
+            request={
+                "model": "claude-3-5-sonnet",
+                "system": [
+                    {"type": "text", "text": "You are Claude."},
+                    {"type": "text", "text": "Be brief.", "cache_control": {"type": "ephemeral"}},
+                ],
+                "messages": [{"role": "user", "content": "Hello"}],
+            },
+        )
+        result = extract_system_prompts([event])
+
+        assert len(result) == 1
+        assert result[0]["content"] == "You are Claude. Be brief."
+        assert result[0]["hash"] == content_hash("You are Claude. Be brief.")
+
     def test_long_content_truncated(self):
         """Test that long system prompts are truncated in content field."""
         long_prompt = "x" * 600
@@ -269,6 +310,33 @@ class TestCompareSystemPrompts:
         assert "Prompt A" in result["common"]
         assert "Prompt B" in result["unique_to_session2"]
 
+    def test_list_form_system_prompts(self):
+        system = [{"type": "text", "text": "You are Claude."}]
+        events = [make_event(provider="anthropic", request={"system": system, "messages": []})]
+
+        result = compare_system_prompts(
+            extract_system_prompts(events),
+            [{"content": system, "provider": "anthropic", "model": "claude-3"}],
+        )
+
+        assert result["changed"] is False
+        assert result["common"] == ["You are Claude."]
+
+    def test_compares_full_prompt_by_hash(self):
+        base = "You are helpful. " * 40
+        events1 = [make_event(request={"messages": [{"role": "system", "content": base + "A"}]})]
+        events2 = [make_event(request={"messages": [{"role": "system", "content": base + "B"}]})]
+        prompts1 = extract_system_prompts(events1)
+        prompts2 = extract_system_prompts(events2)
+
+        result = compare_system_prompts(prompts1, prompts2)
+
+        # The shown (truncated) content is identical; the hashes are not.
+        assert prompts1[0]["content"] == prompts2[0]["content"]
+        assert prompts1[0]["hash"] != prompts2[0]["hash"]
+        assert result["changed"] is True
+        assert result["common"] == []
+
 
 class TestExtractRequestParams:
     """Tests for extract_request_params."""
@@ -0,0 +1,114 @@
+"""Tests for request coalescing."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from shepherd_mcp.providers.aiobs import AsyncAIOBSClient
+from shepherd_mcp.providers.singleflight import SingleFlight, request_key
+
+
+class TestRequestKey:
+    """Tests for request_key."""
+
+    def test_param_order_does_not_matter(self):
+        assert request_key("langfuse", "/t", {"a": 1, "b": 2}, ("pk",)) == request_key(
+            "langfuse", "/t", {"b": 2, "a": 1}, ("pk",)
+        )
+
+    def test_credentials_are_hashed(self):
+        key = request_key("aiobs", "/v1/sessions", None, ("secret-key",))
+        assert "secret-key" not in "".join(key)
+        assert key != request_key("aiobs", "/v1/sessions", None, ("other-key",))
+
+
+class TestSingleFlight:
+    """Tests for SingleFlight."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_result(self):
+        flight = SingleFlight()
+        gate = asyncio.Event()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await gate.wait()
+            return {"sessions": []}
+
+        waiters = [asyncio.ensure_future(flight.do("k", fetch)) for _ in range(5)]
+        await asyncio.sleep(0)
+        gate.set()
+        results = await asyncio.gather(*waiters)
+
+        assert len(calls) == 1
+        assert all(r is results[0] for r in results)
+        assert flight.snapshot() == {"calls": 1, "coalesced": 4, "in_flight": 0}
+
+    @pytest.mark.asyncio
+    async def test_sequential_calls_are_not_cached(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            return len(calls)
+
+        assert await flight.do("k", fetch) == 1
+        assert await flight.do("k", fetch) == 2
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_caller(self):
+        flight = SingleFlight()
+        gate = asyncio.Event()
+
+        async def fetch():
+            await gate.wait()
+            raise RuntimeError("boom")
+
+        waiters = [asyncio.ensure_future(flight.do("k", fetch)) for _ in range(3)]
+        await asyncio.sleep(0)
+        gate.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert len(flight) == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelling_first_caller_keeps_call_alive(self):
+        flight = SingleFlight()
+        gate = asyncio.Event()
+
+        async def fetch():
+            await gate.wait()
+            return "done"
+
+        leader = asyncio.ensure_future(flight.do("k", fetch))
+        follower = asyncio.ensure_future(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        gate.set()
+
+        assert await follower == "done"
+        assert leader.cancelled()
+
+    @pytest.mark.asyncio
+    async def test_client_coalesces_list_sessions(self):
+        requests = []
+        gate = asyncio.Event()
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request.url.path)
+            await gate.wait()
+            return httpx.Response(200, json={"sessions": []})
+
+        client = AsyncAIOBSClient(api_key="key", transport=httpx.MockTransport(handler))
+        async with client:
+            waiters = [asyncio.ensure_future(client.list_sessions()) for _ in range(3)]
+            await asyncio.sleep(0.01)
+            gate.set()
+            results = await asyncio.gather(*waiters)
+
+        assert requests == ["/v1/sessions"]
+        assert results[0] is results[1] is results[2]
@@ -0,0 +1,221 @@
+"""Tests for the on-disk record store."""
+
+import sqlite3
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+
+from shepherd_mcp.models.aiobs import Session, SessionsResponse
+from shepherd_mcp.models.langfuse import LangfuseObservation, LangfuseTrace
+from shepherd_mcp.providers.registry import PoolConfig, ProviderRegistry
+from shepherd_mcp.server import cached_call
+from shepherd_mcp.store import RecordStore
+
+
+def make_session_response(ended_at: float | None = 200.0) -> SessionsResponse:
+    return SessionsResponse(
+        sessions=[Session(id="s1", name="run", started_at=100.0, ended_at=ended_at)],
+        generated_at=300.0,
+    )
+
+
+def make_trace(timestamp: str = "2024-01-01T00:00:00Z", **kwargs) -> LangfuseTrace:
+    return LangfuseTrace(id="t1", timestamp=timestamp, latency=1.5, **kwargs)
+
+
+class TestRecordStore:
+    """Tests for RecordStore."""
+
+    def test_round_trip(self, tmp_path):
+        store = RecordStore(tmp_path / "records.sqlite3")
+        response = make_session_response()
+
+        store.put("aiobs.get_session", "acct", "s1", response)
+
+        assert store.get("aiobs.get_session", "acct", "s1", SessionsResponse) == response
+        assert store.get("aiobs.get_session", "other", "s1", SessionsResponse) is None
+        assert store.hits == 1
+        assert store.misses == 1
+
+    def test_variants_are_kept_apart(self, tmp_path):
+        store = RecordStore(tmp_path / "records.sqlite3")
+
+        store.put("aiobs.get_session", "acct", "s1", make_session_response(), "max_bytes=4096")
+
+        assert store.get("aiobs.get_session", "acct", "s1", SessionsResponse) is None
+        assert (
+            store.get("aiobs.get_session", "acct", "s1", SessionsResponse, "max_bytes=8192") is None
+        )
+        assert (
+            store.get("aiobs.get_session", "acct", "s1", SessionsResponse, "max_bytes=4096")
+            is not None
+        )
+
+    def test_store_of_older_layout_is_cleared(self, tmp_path):
+        path = tmp_path / "records.sqlite3"
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE records (kind TEXT, account TEXT, id TEXT, payload BLOB)")
+        conn.execute("INSERT INTO records VALUES ('aiobs.get_session', 'acct', 's1', x'00')")
+        conn.commit()
+        conn.close()
+
+        store = RecordStore(path)
+        store.put("aiobs.get_session", "acct", "s1", make_session_response())
+
+        assert len(store) == 1
+        assert store.get("aiobs.get_session", "acct", "s1", SessionsResponse) is not None
+
+    def test_round_trip_aliased_model(self, tmp_path):
+        store = RecordStore(tmp_path / "records.sqlite3")
+        observation = LangfuseObservation(
+            id="o1", traceId="t1", type="GENERATION", startTime="2024-01-01T00:00:00Z"
+        )
+        store.put("langfuse.get_observation", "acct", "o1", observation)
+        loaded = store.get("langfuse.get_observation", "acct", "o1", LangfuseObservation)
+        assert loaded == observation
+
+    def test_persists_across_instances(self, tmp_path):
+        path = tmp_path / "records.sqlite3"
+        first = RecordStore(path)
+        first.put("aiobs.get_session", "acct", "s1", make_session_response())
+        first.close()
+
+        second = RecordStore(path)
+        assert second.get("aiobs.get_session", "acct", "s1", SessionsResponse) is not None
+
+    def test_evicts_least_recently_read(self, tmp_path):
+        now = [0.0]
+        store = RecordStore(tmp_path / "records.sqlite3", clock=lambda: now[0])
+        response = make_session_response()
+        store.put("aiobs.get_session", "acct", "a", response)
+        size = store.total_bytes()
+        store.max_bytes = 2 * size
+
+        now[0] = 1.0
+        store.put("aiobs.get_session", "acct", "b", response)
+        now[0] = 2.0
+        store.get("aiobs.get_session", "acct", "a", SessionsResponse)
+        now[0] = 3.0
+        store.put("aiobs.get_session", "acct", "c", response)
+
+        assert store.get("aiobs.get_session", "acct", "b", SessionsResponse) is None
+        assert store.get("aiobs.get_session", "acct", "a", SessionsResponse) is not None
+        assert store.evictions == 1
+        assert store.total_bytes() <= store.max_bytes
+
+    def test_from_env(self, tmp_path):
+        with patch.dict("os.environ", {}, clear=True):
+            assert RecordStore.from_env() is None
+        with patch.dict("os.environ", {"SHEPHERD_CACHE_DIR": str(tmp_path)}):
+            store = RecordStore.from_env()
+        assert store.path == tmp_path / "records.sqlite3"
+
+    @pytest.mark.asyncio
+    async def test_only_final_records_are_stored(self, tmp_path):
+        store = RecordStore(tmp_path / "records.sqlite3")
+
+        await store.get_or_load(
+            "aiobs.get_session", "acct", "live", AsyncMock(return_value=make_session_response(None))
+        )
+        await store.get_or_load(
+            "aiobs.get_session", "acct", "done", AsyncMock(return_value=make_session_response())
+        )
+
+        assert store.get("aiobs.get_session", "acct", "live", SessionsResponse) is None
+        assert store.get("aiobs.get_session", "acct", "done", SessionsResponse) is not None
+
+    @pytest.mark.asyncio
+    async def test_recent_and_unfinished_traces_are_not_stored(self, tmp_path):
+        store = RecordStore(tmp_path / "records.sqlite3")
+        open_observation = LangfuseObservation(
+            id="o1", traceId="t1", type="SPAN", startTime="2024-01-01T00:00:00Z"
+        )
+        traces = {
+            "old": make_trace(),
+            "recent": make_trace(timestamp="2999-01-01T00:00:00Z"),
+            "open": make_trace(observations=[open_observation]),
+        }
+        for trace_id, trace in traces.items():
+            await store.get_or_load(
+                "langfuse.get_trace", "acct", trace_id, AsyncMock(return_value=trace)
+            )
+
+        assert len(store) == 1
+        assert store.get("langfuse.get_trace", "acct", "old", LangfuseTrace) is not None
+
+
+class TestCachedCallWithStore:
+    """Tests for serving records from the store through cached_call."""
+
+    @pytest.mark.asyncio
+    async def test_new_process_reads_session_from_disk(self, tmp_path):
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url.path)
+            return httpx.Response(200, json=make_session_response().model_dump())
+
+        for _ in range(2):
+            registry = ProviderRegistry(
+                PoolConfig(),
+                transport=httpx.MockTransport(handler),
+                store=RecordStore(tmp_path / "records.sqlite3"),
+            )
+            async with registry:
+                with patch("shepherd_mcp.server.get_registry", return_value=registry):
+                    response = await cached_call(registry.aiobs(api_key="key"), "get_session", "s1")
+            assert response.sessions[0].id == "s1"
+
+        assert calls == ["/v1/sessions/s1/tree"]
+
+    @pytest.mark.asyncio
+    async def test_changed_caps_refetch_session(self, tmp_path, monkeypatch):
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url.path)
+            return httpx.Response(200, json=make_session_response().model_dump())
+
+        for max_kb in ("4", "4", "8"):
+            monkeypatch.setenv("SHEPHERD_MAX_FIELD_KB", max_kb)
+            registry = ProviderRegistry(
+                PoolConfig(),
+                transport=httpx.MockTransport(handler),
+                store=RecordStore(tmp_path / "records.sqlite3"),
+            )
+            async with registry:
+                with patch("shepherd_mcp.server.get_registry", return_value=registry):
+                    await cached_call(registry.aiobs(api_key="key"), "get_session", "s1")
+
+        assert calls == ["/v1/sessions/s1/tree", "/v1/sessions/s1/tree"]
+
+    @pytest.mark.asyncio
+    async def test_scores_are_refetched(self, tmp_path):
+        calls = []
+        score = {
+            "id": "sc1",
+            "traceId": "t1",
+            "name": "quality",
+            "value": 1.0,
+            "timestamp": "2024-01-01T00:00:00Z",
+            "source": "ANNOTATION",
+            "dataType": "NUMERIC",
+        }
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url.path)
+            return httpx.Response(200, json=score)
+
+        for _ in range(2):
+            registry = ProviderRegistry(
+                PoolConfig(),
+                transport=httpx.MockTransport(handler),
+                store=RecordStore(tmp_path / "records.sqlite3"),
+            )
+            async with registry:
+                with patch("shepherd_mcp.server.get_registry", return_value=registry):
+                    client = registry.langfuse(public_key="pk", secret_key="sk")
+                    await cached_call(client, "get_score", "sc1")
+
+        assert calls == ["/api/public/scores/sc1"] * 2
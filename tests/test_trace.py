@@ -0,0 +1,152 @@
+"""Tests for the flattened trace tree."""
+
+import sys
+
+import pytest
+
+from shepherd_mcp.models.aiobs import SessionsResponse, TraceNode
+from shepherd_mcp.models.compact import SessionRecords
+from shepherd_mcp.models.decode import FastDecoder, decode_sessions
+from shepherd_mcp.models.trace import NONE, FlatTrace
+from shepherd_mcp.server import get_trace_depth, trace_node_to_dict
+
+
+def make_node(span_id: str, duration_ms: float = 1.0, children: list | None = None) -> TraceNode:
+    return TraceNode(
+        provider="function",
+        api="call",
+        name=span_id,
+        started_at=0.0,
+        ended_at=1.0,
+        duration_ms=duration_ms,
+        span_id=span_id,
+        session_id="s1",
+        children=children or [],
+    )
+
+
+def make_tree() -> list[TraceNode]:
+    #   a          e
+    #  / \\
+    # b   d
+    # |
+    # c
+    return [
+        make_node(
+            "a",
+            10.0,
+            [make_node("b", 4.0, [make_node("c", 3.0)]), make_node("d", 2.0)],
+        ),
+        make_node("e", 1.0),
+    ]
+
+
+def make_chain(depth: int) -> TraceNode:
+    # Built bottom-up so constructing the fixture needs no recursion.
+    fields = make_node("n").model_dump(exclude={"span_id", "children"})
+    node = TraceNode.model_construct(**fields, span_id=f"n{depth - 1}", children=[])
+    for level in range(depth - 2, -1, -1):
+        node = TraceNode.model_construct(**fields, span_id=f"n{level}", children=[node])
+    return node
+
+
+def nested_dict(node: TraceNode) -> dict:
+    # Reference serialization, recursive like the original helper.
+    result = {"span_id": node.span_id}
+    if node.children:
+        result["children"] = [nested_dict(child) for child in node.children]
+    return result
+
+
+class TestFlatTrace:
+    """Tests for FlatTrace."""
+
+    def test_arrays_are_in_pre_order(self):
+        flat = FlatTrace(make_tree())
+
+        assert [node.span_id for node in flat.nodes] == ["a", "b", "c", "d", "e"]
+        assert list(flat.parent) == [NONE, 0, 1, 0, NONE]
+        assert list(flat.depth) == [0, 1, 2, 1, 0]
+        assert list(flat.first_child) == [1, 2, NONE, NONE, NONE]
+        assert list(flat.next_sibling) == [4, 3, NONE, NONE, NONE]
+        assert flat.children(0) == [1, 3]
+
+    def test_nodes_are_the_nested_nodes(self):
+        roots = make_tree()
+        flat = FlatTrace(roots)
+
+        assert flat.roots is roots
+        assert flat.nodes[2] is roots[0].children[0].children[0]
+
+    def test_depth_sizes_and_durations(self):
+        flat = FlatTrace(make_tree())
+
+        assert flat.max_depth() == 3
+        assert list(flat.subtree_sizes()) == [4, 2, 1, 1, 1]
+        assert list(flat.subtree_durations()) == [19.0, 7.0, 3.0, 2.0, 1.0]
+
+    def test_empty_tree(self):
+        flat = FlatTrace([])
+
+        assert len(flat) == 0
+        assert flat.max_depth() == 0
+        assert flat.to_dicts(nested_dict) == []
+
+    def test_to_dicts_matches_recursive_serialization(self):
+        roots = make_tree()
+
+        dicts = FlatTrace(roots).to_dicts(lambda node: {"span_id": node.span_id})
+
+        assert dicts == [nested_dict(node) for node in roots]
+
+    def test_rebuild_keeps_structure(self):
+        roots = make_tree()
+
+        rebuilt = FlatTrace(roots).rebuild(lambda node, children: (node.span_id, children))
+
+        assert rebuilt == [("a", [("b", [("c", [])]), ("d", [])]), ("e", [])]
+
+
+class TestDeepTraces:
+    """Trace helpers on chains deeper than the recursion limit."""
+
+    DEPTH = sys.getrecursionlimit() * 3
+
+    def test_helpers_do_not_recurse(self):
+        root = make_chain(self.DEPTH)
+
+        assert get_trace_depth([root]) == self.DEPTH
+        result = trace_node_to_dict(root)
+        for _ in range(self.DEPTH - 1):
+            result = result["children"][0]
+        assert result["span_id"] == f"n{self.DEPTH - 1}"
+        assert "children" not in result
+
+    def test_records_convert_without_recursion(self):
+        response = SessionsResponse.model_construct(
+            sessions=[], events=[], function_events=[], trace_tree=[make_chain(self.DEPTH)]
+        )
+
+        records = SessionRecords.from_response(response)
+
+        assert records.flat_trace.max_depth() == self.DEPTH
+        assert records.to_response().flat_trace.max_depth() == self.DEPTH
+
+    def test_decode_constructs_deep_tree(self):
+        fields = make_node("n").model_dump(exclude={"children"})
+        node = {**fields, "children": []}
+        for _ in range(self.DEPTH - 1):
+            node = {**fields, "children": [node]}
+
+        response = decode_sessions({"sessions": [], "trace_tree": [node]}, FastDecoder())
+
+        assert response.flat_trace.max_depth() == self.DEPTH
+
+    @pytest.mark.parametrize("model", [SessionsResponse, SessionRecords])
+    def test_flat_trace_is_cached(self, model):
+        response = SessionsResponse.model_construct(
+            sessions=[], events=[], function_events=[], trace_tree=make_tree()
+        )
+        source = response if model is SessionsResponse else SessionRecords.from_response(response)
+
+        assert source.flat_trace is source.flat_trace